@@ -1,21 +1,35 @@
 #!/usr/bin/env python3
 """Backfill SHA-256 metadata for existing S3 objects."""
 
+import base64
 import hashlib
 import os
 import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import closing
+from functools import partial
+
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
+# Each object costs several S3 round-trips, so keys are processed concurrently;
+# override with BACKFILL_WORKERS for very large buckets
+MAX_WORKERS = int(os.getenv("BACKFILL_WORKERS", "32"))
+# Object bodies are hashed while streaming, one chunk in memory at a time
+HASH_CHUNK_SIZE = 1024 * 1024
+
 
-def calculate_sha256(content: bytes) -> str:
+def calculate_sha256(stream) -> str:
     hash_sha256 = hashlib.sha256()
-    hash_sha256.update(content)
+    for chunk in iter(partial(stream.read, HASH_CHUNK_SIZE), b""):
+        hash_sha256.update(chunk)
     return hash_sha256.hexdigest()
 
 
 def get_s3_client():
-    return boto3.client("s3")
+    # boto3 clients are thread-safe; size the pool so workers don't queue for connections
+    return boto3.client("s3", config=Config(max_pool_connections=2 * MAX_WORKERS))
 
 
 def list_s3_objects(s3_client, bucket, prefix=""):
@@ -30,15 +44,48 @@ def list_s3_objects(s3_client, bucket, prefix=""):
     return objects
 
 
+def backfill_concurrently(s3_client, bucket, keys):
+    # Keep a bounded window of requests in flight instead of one future per object
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        pending = {}
+        for key in keys:
+            if len(pending) >= 2 * MAX_WORKERS:
+                yield from _collect_completed(pending)
+            pending[executor.submit(backfill_metadata, s3_client, bucket, key)] = key
+        while pending:
+            yield from _collect_completed(pending)
+
+
+def _collect_completed(pending):
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    for future in done:
+        yield pending.pop(future), future.result()
+
+
+def stored_sha256(head):
+    # Objects uploaded with ChecksumAlgorithm=SHA256 already carry their digest; multipart
+    # uploads store a checksum of part checksums instead, which is not the file's hash
+    checksum = head.get("ChecksumSHA256")
+    if not checksum or head.get("ChecksumType", "FULL_OBJECT") != "FULL_OBJECT":
+        return None
+    if "-" in checksum:
+        return None
+    return base64.b64decode(checksum).hex()
+
+
+def download_sha256(s3_client, bucket, key):
+    obj = s3_client.get_object(Bucket=bucket, Key=key)
+    with closing(obj["Body"]) as body:
+        return calculate_sha256(body)
+
+
 def backfill_metadata(s3_client, bucket, key):
     try:
-        head = s3_client.head_object(Bucket=bucket, Key=key)
+        head = s3_client.head_object(Bucket=bucket, Key=key, ChecksumMode="ENABLED")
         existing_metadata = head.get("Metadata", {})
         if "sha256" in existing_metadata:
             return "skipped"
-        obj = s3_client.get_object(Bucket=bucket, Key=key)
-        content = obj["Body"].read()
-        file_hash = calculate_sha256(content)
+        file_hash = stored_sha256(head) or download_sha256(s3_client, bucket, key)
         existing_metadata["sha256"] = file_hash
         copy_source = {"Bucket": bucket, "Key": key}
         s3_client.copy_object(
@@ -79,8 +126,7 @@ def main():
     print("━" * 50)
     all_objects = list_s3_objects(s3, bucket)
     total = len(all_objects)
-    for i, key in enumerate(all_objects, 1):
-        result = backfill_metadata(s3, bucket, key)
+    for i, (key, result) in enumerate(backfill_concurrently(s3, bucket, all_objects), 1):
         if result == "updated":
             updated += 1
             print(f"✅ [{i}/{total}] Updated: {key}")
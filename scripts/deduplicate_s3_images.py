@@ -2,19 +2,37 @@
 """Deduplicate S3 images by SHA-256 hash, keeping only the oldest copy."""
 
 import os
+import shelve
 import sys
-from collections import defaultdict
 from datetime import datetime
+from operator import itemgetter
+import queue
+import threading
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
+# Metadata lookups are one HEAD request per object, so they run concurrently
+MAX_WORKERS = 64
+# Listed objects waiting for a HEAD worker; bounds memory on very large buckets
+PIPELINE_QUEUE_SIZE = 1024
+# Marks the end of a pipeline stage's output
+DONE = object()
+# S3 DeleteObjects accepts at most 1000 keys per request
+DELETE_BATCH_SIZE = 1000
+# SHA-256 values seen in earlier runs, keyed by bucket, key and ETag
+CACHE_PATH = os.getenv("DEDUP_CACHE", ".dedup_cache.db")
+
 
 def get_s3_client():
-    return boto3.client("s3")
+    # Shared by all workers; adaptive retries back off if S3 starts throttling
+    return boto3.client("s3", config=Config(
+        max_pool_connections=2 * MAX_WORKERS,
+        retries={"max_attempts": 10, "mode": "adaptive"}
+    ))
 
 
 def list_all_objects(s3_client, bucket):
-    objects = []
     paginator = s3_client.get_paginator("list_objects_v2")
 
     for page in paginator.paginate(Bucket=bucket):
@@ -22,12 +40,12 @@ def list_all_objects(s3_client, bucket):
             for obj in page["Contents"]:
                 key = obj["Key"]
                 if not key.endswith("/"):
-                    objects.append({
+                    yield {
                         "Key": key,
                         "LastModified": obj["LastModified"],
-                        "Size": obj["Size"]
-                    })
-    return objects
+                        "Size": obj["Size"],
+                        "ETag": obj.get("ETag", "")
+                    }
 
 
 def get_object_metadata(s3_client, bucket, key):
@@ -39,28 +57,108 @@ def get_object_metadata(s3_client, bucket, key):
         return {}
 
 
-def group_by_hash(s3_client, bucket, objects):
-    hash_groups = defaultdict(list)
-    no_hash_count = 0
-
-    print("📊 Analyzing files...")
-    for i, obj in enumerate(objects, 1):
-        if i % 20 == 0 or i == len(objects):
-            print(f"   Processing {i}/{len(objects)}...", end="\r")
+def cache_key(bucket, obj):
+    # An overwritten object gets a new ETag, so stale entries are never hit
+    return f"{bucket}/{obj['Key']}@{obj['ETag']}"
 
-        metadata = get_object_metadata(s3_client, bucket, obj["Key"])
-        sha256 = metadata.get("sha256")
 
-        if sha256:
-            hash_groups[sha256].append(obj)
-        else:
+def list_into_queue(s3_client, bucket, cache, cache_lock, pending, results, errors):
+    # Cached hashes skip the HEAD workers and go straight to the grouping stage
+    try:
+        for obj in list_all_objects(s3_client, bucket):
+            with cache_lock:
+                sha256 = cache.get(cache_key(bucket, obj))
+            if sha256:
+                results.put((obj, sha256, True))
+            else:
+                pending.put(obj)
+    except Exception as e:
+        errors.append(e)
+    finally:
+        for _ in range(MAX_WORKERS):
+            pending.put(DONE)
+
+
+def head_worker(s3_client, bucket, pending, results):
+    while True:
+        obj = pending.get()
+        if obj is DONE:
+            results.put(DONE)
+            return
+        sha256 = get_object_metadata(s3_client, bucket, obj["Key"]).get("sha256")
+        results.put((obj, sha256, False))
+
+
+def prune_cache(cache, bucket, seen_keys):
+    # Drops entries for objects that were deleted or overwritten since the last run,
+    # so the shelf doesn't keep growing; entries of other buckets are left alone
+    prefix = f"{bucket}/"
+    stale_keys = [key for key in cache.keys() if key.startswith(prefix) and key not in seen_keys]
+    for key in stale_keys:
+        del cache[key]
+
+
+def group_by_hash(s3_client, bucket, cache):
+    hash_groups = {}
+    total = no_hash_count = cached_count = 0
+
+    print("📊 Listing and analyzing files...")
+    # Listing, HEAD requests and grouping overlap; the bounded queue keeps the
+    # lister from running arbitrarily far ahead of the workers. The lister reads
+    # the shelf while this thread writes it, so both go through cache_lock.
+    cache_lock = threading.Lock()
+    seen_keys = set()
+    pending = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    results = queue.Queue()
+    errors = []
+    threads = [threading.Thread(
+        target=list_into_queue,
+        args=(s3_client, bucket, cache, cache_lock, pending, results, errors),
+        daemon=True
+    )]
+    threads += [
+        threading.Thread(
+            target=head_worker, args=(s3_client, bucket, pending, results), daemon=True
+        )
+        for _ in range(MAX_WORKERS)
+    ]
+    for thread in threads:
+        thread.start()
+
+    finished_workers = 0
+    while finished_workers < MAX_WORKERS:
+        result = results.get()
+        if result is DONE:
+            finished_workers += 1
+            continue
+
+        obj, sha256, from_cache = result
+        seen_keys.add(cache_key(bucket, obj))
+        total += 1
+        if total % 20 == 0:
+            print(f"   Processed {total} files...", end="\r")
+
+        if not sha256:
             no_hash_count += 1
+            continue
+        hash_groups.setdefault(sha256, []).append(obj)
+        if from_cache:
+            cached_count += 1
+        else:
+            with cache_lock:
+                cache[cache_key(bucket, obj)] = sha256
 
-    print(f"\n   ✅ Analyzed {len(objects)} files")
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    prune_cache(cache, bucket, seen_keys)
+
+    print(f"\n   ✅ Analyzed {total} files ({cached_count} hashes found in cache)")
     if no_hash_count > 0:
         print(f"   ⚠️  {no_hash_count} files without SHA-256 metadata (skipped)")
 
-    return hash_groups
+    return hash_groups, total
 
 
 def find_duplicates(hash_groups):
@@ -69,7 +167,7 @@ def find_duplicates(hash_groups):
     for sha256, objects in hash_groups.items():
         if len(objects) > 1:
             # Sort by LastModified (oldest first)
-            objects.sort(key=lambda x: x["LastModified"])
+            objects.sort(key=itemgetter("LastModified"))
             oldest = objects[0]
             duplicates = objects[1:]
 
@@ -139,16 +237,24 @@ def delete_duplicates(s3_client, bucket, duplicates):
 
     print("\n🗑️  Deleting duplicate files...")
 
-    for dup in duplicates:
-        for obj in dup["delete"]:
-            try:
-                s3_client.delete_object(Bucket=bucket, Key=obj["Key"])
-                deleted_count += 1
-                if deleted_count % 10 == 0:
-                    print(f"   Deleted {deleted_count} files...", end="\r")
-            except ClientError as e:
-                print(f"\n❌ Error deleting {obj['Key']}: {e}")
-                failed_count += 1
+    keys = [{"Key": obj["Key"]} for dup in duplicates for obj in dup["delete"]]
+    for start in range(0, len(keys), DELETE_BATCH_SIZE):
+        batch = keys[start:start + DELETE_BATCH_SIZE]
+        try:
+            response = s3_client.delete_objects(
+                Bucket=bucket, Delete={"Objects": batch, "Quiet": True}
+            )
+        except ClientError as e:
+            print(f"\n❌ Error deleting batch of {len(batch)} files: {e}")
+            failed_count += len(batch)
+            continue
+        # Quiet mode only reports the keys that could not be deleted
+        errors = response.get("Errors", [])
+        for error in errors:
+            print(f"\n❌ Error deleting {error['Key']}: {error.get('Message', error.get('Code'))}")
+        failed_count += len(errors)
+        deleted_count += len(batch) - len(errors)
+        print(f"   Deleted {deleted_count} files...", end="\r")
 
     print(f"\n   ✅ Deleted {deleted_count} duplicate files")
     if failed_count > 0:
@@ -168,13 +274,9 @@ def main():
 
     s3 = get_s3_client()
 
-    # Step 1: List all objects
-    print("📦 Listing all S3 objects...")
-    objects = list_all_objects(s3, bucket)
-    print(f"   Found {len(objects)} files")
-
-    # Step 2: Group by hash
-    hash_groups = group_by_hash(s3, bucket, objects)
+    # Steps 1 and 2: List all objects and group them by hash as they are listed
+    with shelve.open(CACHE_PATH) as cache:
+        hash_groups, total_objects = group_by_hash(s3, bucket, cache)
 
     # Step 3: Find duplicates
     print("\n🔍 Finding duplicates...")
@@ -199,11 +301,11 @@ def main():
     deleted, failed = delete_duplicates(s3, bucket, duplicates)
 
     # Step 7: Final report
-    remaining = len(objects) - deleted
+    remaining = total_objects - deleted
     print("\n" + "=" * 80)
     print("📊 FINAL SUMMARY")
     print("=" * 80)
-    print(f"📁 Original files:     {len(objects)}")
+    print(f"📁 Original files:     {total_objects}")
     print(f"🗑️  Duplicates deleted: {deleted}")
     print(f"📄 Files remaining:    {remaining}")
     if failed > 0:
@@ -4,19 +4,19 @@
 from pathlib import Path
 import re
 
+# Top-level class definitions
+CLASS_RE = re.compile(r'^class\s+(\w+)', re.MULTILINE)
+
 def get_classes(file_path):
     """Get class names from a file."""
     try:
         with open(file_path, 'r') as f:
             content = f.read()
-
-        # Find all class definitions
-        pattern = r'^class\s+(\w+)'
-        matches = re.findall(pattern, content, re.MULTILINE)
-        return matches
-    except:
+    except (OSError, UnicodeDecodeError):
         return []
 
+    return [match.group(1) for match in CLASS_RE.finditer(content)]
+
 # Find all Python files in stable_delusion
 files = list(Path('stable_delusion').rglob('*.py'))
 
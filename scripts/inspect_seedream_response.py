@@ -14,6 +14,15 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from stable_delusion.seedream import SeedreamClient
 
 
+def response_payload(response):
+    """Convert an SDK response to a plain dict with a single serialization pass."""
+    if hasattr(response, 'model_dump'):
+        return response.model_dump()
+    if hasattr(response, 'dict'):
+        return response.dict()
+    return {k: v for k, v in vars(response).items() if not k.startswith('_')}
+
+
 def inspect_response_structure():
     """Make a Seedream API call and inspect the full response."""
 
@@ -45,61 +54,39 @@ def inspect_response_structure():
         print("RESPONSE TYPE:", type(response))
         print("="*80)
 
+        # Serialize once; every section below reads from this plain dict
+        payload = response_payload(response)
+
         print("\n" + "="*80)
         print("RESPONSE ATTRIBUTES:")
         print("="*80)
-        for attr in dir(response):
-            if not attr.startswith('_'):
-                print(f"  {attr}")
+        for attr in payload:
+            print(f"  {attr}")
 
         print("\n" + "="*80)
         print("RESPONSE VALUES:")
         print("="*80)
-        for attr in dir(response):
-            if not attr.startswith('_') and not callable(getattr(response, attr)):
-                try:
-                    value = getattr(response, attr)
-                    print(f"\n{attr}:")
-                    print(f"  Type: {type(value)}")
-                    print(f"  Value: {value}")
-                except Exception as e:
-                    print(f"\n{attr}: [Error accessing: {e}]")
-
-        # Try to convert to dict if method exists
+        for attr, value in payload.items():
+            print(f"\n{attr}:")
+            print(f"  Type: {type(value)}")
+            print(f"  Value: {value}")
+
         print("\n" + "="*80)
-        print("ATTEMPTING DICT CONVERSION:")
+        print("DICT CONVERSION:")
         print("="*80)
-
-        if hasattr(response, 'model_dump'):
-            print("\nUsing model_dump():")
-            response_dict = response.model_dump()
-            print(json.dumps(response_dict, indent=2, default=str))
-        elif hasattr(response, 'dict'):
-            print("\nUsing dict():")
-            response_dict = response.dict()
-            print(json.dumps(response_dict, indent=2, default=str))
-        elif hasattr(response, '__dict__'):
-            print("\nUsing __dict__:")
-            response_dict = response.__dict__
-            print(json.dumps(response_dict, indent=2, default=str))
-        else:
-            print("\nNo dict conversion method available")
+        print(json.dumps(payload, indent=2, default=str))
 
         # Inspect the data attribute specifically
-        if hasattr(response, 'data') and response.data:
+        if payload.get('data'):
             print("\n" + "="*80)
             print("DATA ITEMS INSPECTION:")
             print("="*80)
-            for i, item in enumerate(response.data):
+            for i, item in enumerate(payload['data']):
                 print(f"\nItem {i}:")
                 print(f"  Type: {type(item)}")
-                for attr in dir(item):
-                    if not attr.startswith('_') and not callable(getattr(item, attr)):
-                        try:
-                            value = getattr(item, attr)
-                            print(f"  {attr}: {value} (type: {type(value)})")
-                        except Exception as e:
-                            print(f"  {attr}: [Error: {e}]")
+                fields = item if isinstance(item, dict) else response_payload(item)
+                for attr, value in fields.items():
+                    print(f"  {attr}: {value} (type: {type(value)})")
 
         return response
 
@@ -1,36 +1,59 @@
 #!/usr/bin/env python3
 """List source files containing more than 1 class."""
 
-from pathlib import Path
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+# Class statements at any indentation, matching the old stripped-line check
+CLASS_RE = re.compile(rb'^[ \t]*class ', re.MULTILINE)
+
+def scan_py(root):
+    """Yield paths of Python files below root, using the dirent types from scandir."""
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_symlink():
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                yield from scan_py(entry.path)
+            elif entry.name.endswith('.py') and entry.is_file(follow_symlinks=False):
+                yield entry.path
 
 def count_classes(file_path):
     """Count classes in a file."""
     try:
-        with open(file_path, 'r') as f:
-            lines = f.readlines()
-        return sum(1 for line in lines if line.strip().startswith('class '))
-    except:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+    except OSError:
         return 0
-
-# Find all Python files in stable_delusion
-files = list(Path('stable_delusion').rglob('*.py'))
-
-# Filter and sort by class count
-multiclass_files = []
-for file in files:
-    class_count = count_classes(file)
-    if class_count > 1:
-        multiclass_files.append((class_count, str(file)))
-
-# Sort by class count (descending)
-multiclass_files.sort(reverse=True)
-
-print(f"\nSource files with multiple classes ({len(multiclass_files)} files):\n")
-print(f"{'Classes':<10} {'File'}")
-print("-" * 80)
-
-for count, filepath in multiclass_files:
-    print(f"{count:<10} {filepath}")
-
-print(f"\nTotal: {len(multiclass_files)} files with multiple classes")
-print(f"Total classes to refactor: {sum(c for c, _ in multiclass_files)}")
+    return len(CLASS_RE.findall(data))
+
+def main():
+    # Find all Python files in stable_delusion
+    files = list(scan_py('stable_delusion'))
+
+    # Count classes in worker processes; chunks keep the per-file IPC cost low
+    multiclass_files = []
+    with ProcessPoolExecutor() as executor:
+        for file, class_count in zip(files, executor.map(count_classes, files, chunksize=64)):
+            if class_count > 1:
+                multiclass_files.append((class_count, file))
+
+    # Sort by class count (descending)
+    multiclass_files.sort(reverse=True)
+
+    # Build the whole report first and emit it with a single write
+    lines = [
+        f"\nSource files with multiple classes ({len(multiclass_files)} files):\n",
+        f"{'Classes':<10} {'File'}",
+        "-" * 80,
+    ]
+    lines.extend(f"{count:<10} {filepath}" for count, filepath in multiclass_files)
+    lines.append(f"\nTotal: {len(multiclass_files)} files with multiple classes")
+    lines.append(f"Total classes to refactor: {sum(c for c, _ in multiclass_files)}")
+    sys.stdout.write("\n".join(lines) + "\n")
+
+
+if __name__ == "__main__":
+    main()
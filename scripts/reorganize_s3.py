@@ -2,46 +2,142 @@
 """Reorganize S3 bucket to match new structure."""
 
 import os
+import queue
 import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
+# Copies are independent round-trips, so they run concurrently
+MAX_WORKERS = int(os.getenv("S3_WORKERS", "32"))
+# Listing pages buffered ahead of the consumer; continuation tokens keep paging serial
+PREFETCH_PAGES = 2
+# Large objects are copied as concurrent multipart part copies (CopyObject caps at 5 GB)
+TRANSFER_CONFIG = TransferConfig(multipart_threshold=64 * 1024 * 1024, max_concurrency=8)
+# S3 DeleteObjects accepts at most 1000 keys per request
+DELETE_BATCH_SIZE = 1000
+
 
 def get_s3_client():
     """Create S3 client with credentials from environment."""
-    return boto3.client("s3")
+    # boto3 clients are thread-safe; give every worker its own pooled connection
+    return boto3.client("s3", config=Config(max_pool_connections=MAX_WORKERS))
 
 
-def move_s3_object(s3_client, bucket, source_key, dest_key):
-    """Move an object in S3 from source to destination."""
+def copy_s3_object(s3_client, bucket, source_key, dest_key):
+    """Copy an object in S3 from source to destination."""
     try:
-        # Copy object to new location
         copy_source = {"Bucket": bucket, "Key": source_key}
-        s3_client.copy_object(CopySource=copy_source, Bucket=bucket, Key=dest_key)
-
-        # Delete original object
-        s3_client.delete_object(Bucket=bucket, Key=source_key)
-
+        s3_client.copy(CopySource=copy_source, Bucket=bucket, Key=dest_key, Config=TRANSFER_CONFIG)
         return True
     except ClientError as e:
         print(f"❌ Error moving {source_key}: {e}")
         return False
 
 
-def list_s3_objects(s3_client, bucket, prefix):
-    """List all objects with the given prefix."""
-    objects = []
-    paginator = s3_client.get_paginator("list_objects_v2")
+def delete_s3_objects(s3_client, bucket, keys):
+    """Delete keys in batches, returning the set of keys that could not be deleted."""
+    failed = set()
+    for start in range(0, len(keys), DELETE_BATCH_SIZE):
+        batch = keys[start : start + DELETE_BATCH_SIZE]
+        try:
+            response = s3_client.delete_objects(
+                Bucket=bucket,
+                Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+            )
+        except ClientError as e:
+            print(f"❌ Error deleting batch of {len(batch)} originals: {e}")
+            failed.update(batch)
+            continue
+        # Quiet mode only reports the keys that could not be deleted
+        for error in response.get("Errors", []):
+            print(f"❌ Error deleting original {error['Key']}: {error.get('Message')}")
+            failed.add(error["Key"])
+    return failed
+
+
+def move_all(s3_client, bucket, source_keys, dest_prefix):
+    """Move objects into dest_prefix, returning (moved, failed) counts.
+
+    Copies run concurrently in a bounded window; the originals of successful
+    copies are removed with batched DeleteObjects requests as each batch fills.
+    """
+    total = 0
+    moved = 0
+    copied = []
+
+    def delete_copied():
+        nonlocal moved
+        not_deleted = delete_s3_objects(s3_client, bucket, copied)
+        for key in copied:
+            if key not in not_deleted:
+                print(f"✅ Moved: {os.path.basename(key)}")
+        moved += len(copied) - len(not_deleted)
+        copied.clear()
+
+    for key, ok in copy_concurrently(s3_client, bucket, source_keys, dest_prefix):
+        total += 1
+        if ok:
+            copied.append(key)
+            if len(copied) >= DELETE_BATCH_SIZE:
+                delete_copied()
+    if copied:
+        delete_copied()
+    return moved, total - moved
+
+
+def copy_concurrently(s3_client, bucket, source_keys, dest_prefix):
+    """Yield (source_key, copied) as copies finish, reading source_keys lazily."""
+    # Keep a bounded window of copies in flight instead of one future per object
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        pending = {}
+        for source_key in source_keys:
+            if len(pending) >= 2 * MAX_WORKERS:
+                yield from _collect_completed(pending)
+            dest_key = f"{dest_prefix}{os.path.basename(source_key)}"
+            future = executor.submit(copy_s3_object, s3_client, bucket, source_key, dest_key)
+            pending[future] = source_key
+        while pending:
+            yield from _collect_completed(pending)
+
+
+def _collect_completed(pending):
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    for future in done:
+        yield pending.pop(future), future.result()
+
 
-    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+def list_s3_objects(s3_client, bucket, prefix):
+    """Yield the keys of all objects with the given prefix."""
+    pages = queue.Queue(maxsize=PREFETCH_PAGES)
+
+    def fetch_pages():
+        # The next page is requested while the caller is still working on this one
+        try:
+            paginator = s3_client.get_paginator("list_objects_v2")
+            for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+                pages.put(page)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            # Any failure (including BotoCoreError) is re-raised by the consumer
+            pages.put(e)
+        finally:
+            # Always unblock the consumer, even if the listing failed
+            pages.put(None)
+
+    threading.Thread(target=fetch_pages, daemon=True).start()
+
+    while (page := pages.get()) is not None:
+        if isinstance(page, Exception):
+            raise page
         if "Contents" in page:
             for obj in page["Contents"]:
                 key = obj["Key"]
                 # Skip directory markers
                 if not key.endswith("/"):
-                    objects.append(key)
-
-    return objects
+                    yield key
 
 
 def main():
@@ -69,8 +165,6 @@ def main():
     s3 = get_s3_client()
 
     # Counters
-    seedream_input_count = 0
-    gemini_output_count = 0
     errors = 0
 
     # Step 1: Move Seedream inputs
@@ -79,40 +173,25 @@ def main():
     print("━" * 50)
 
     seedream_inputs = list_s3_objects(s3, bucket, "images/seedream/inputs/")
-    for source_key in seedream_inputs:
-        filename = os.path.basename(source_key)
-        dest_key = f"input/{filename}"
-
-        if move_s3_object(s3, bucket, source_key, dest_key):
-            seedream_input_count += 1
-            print(f"✅ Moved: {filename}")
-        else:
-            errors += 1
+    seedream_input_count, failed = move_all(s3, bucket, seedream_inputs, "input/")
+    errors += failed
 
     # Step 2: Move Gemini outputs
     print()
     print("📦 Step 2: Moving Gemini output images to output/gemini/")
     print("━" * 50)
 
-    # Get all images in the images/ prefix
-    all_images = list_s3_objects(s3, bucket, "images/")
-
-    # Filter for generated and upscaled images (not in seedream/ subfolder)
-    gemini_outputs = [
+    # Filter the images/ listing lazily for generated and upscaled images (not in
+    # seedream/ subfolder); the names may appear below any subfolder, so a narrower
+    # Prefix would miss some of them
+    gemini_outputs = (
         key
-        for key in all_images
+        for key in list_s3_objects(s3, bucket, "images/")
         if ("generated_" in key or "upscaled_" in key) and "/seedream/" not in key
-    ]
-
-    for source_key in gemini_outputs:
-        filename = os.path.basename(source_key)
-        dest_key = f"output/gemini/{filename}"
+    )
 
-        if move_s3_object(s3, bucket, source_key, dest_key):
-            gemini_output_count += 1
-            print(f"✅ Moved: {filename}")
-        else:
-            errors += 1
+    gemini_output_count, failed = move_all(s3, bucket, gemini_outputs, "output/gemini/")
+    errors += failed
 
     # Summary
     print()
@@ -128,8 +207,8 @@ def main():
     print("📋 Verifying new structure:")
     print()
 
-    input_count = len(list_s3_objects(s3, bucket, "input/"))
-    gemini_count = len(list_s3_objects(s3, bucket, "output/gemini/"))
+    input_count = sum(1 for _ in list_s3_objects(s3, bucket, "input/"))
+    gemini_count = sum(1 for _ in list_s3_objects(s3, bucket, "output/gemini/"))
 
     print(f"Input images: {input_count}")
     print(f"Gemini output images: {gemini_count}")
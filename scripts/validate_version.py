@@ -14,6 +14,16 @@ import sys
 import subprocess
 from pathlib import Path
 
+try:
+    import tomllib
+except ImportError:  # Python < 3.11 falls back to the regex below
+    tomllib = None
+
+# version = "X.Y.Z" line in pyproject.toml, used where tomllib is unavailable
+VERSION_RE = re.compile(r'^version\s*=\s*"([^"]+)"', re.MULTILINE)
+# Accepted version format, with a restricted pre-release suffix
+SEMVER_FORMAT_RE = re.compile(r"^\d+\.\d+\.\d+(?:-[a-zA-Z0-9.-]+)?$")
+
 
 def get_current_version():
     """Get version from pyproject.toml."""
@@ -22,13 +32,24 @@ def get_current_version():
         print("❌ pyproject.toml not found")
         sys.exit(1)
 
-    content = pyproject.read_text(encoding="utf-8")
-    match = re.search(r'^version\s*=\s*"([^"]+)"', content, re.MULTILINE)
-    if not match:
+    version = read_pyproject_version(pyproject)
+    if not version:
         print("❌ Version not found in pyproject.toml")
         sys.exit(1)
 
-    return match.group(1)
+    return version
+
+
+def read_pyproject_version(pyproject):
+    """Read the package version from the Poetry or PEP 621 table."""
+    if tomllib is None:
+        match = VERSION_RE.search(pyproject.read_text(encoding="utf-8"))
+        return match.group(1) if match else None
+
+    with pyproject.open("rb") as f:
+        data = tomllib.load(f)
+    poetry_version = data.get("tool", {}).get("poetry", {}).get("version")
+    return poetry_version or data.get("project", {}).get("version")
 
 
 def get_latest_git_tag():
@@ -53,16 +74,20 @@ def get_latest_git_tag():
 
 def parse_version(version_string):
     """Parse semantic version string into tuple of integers."""
-    match = re.match(r"^(\d+)\.(\d+)\.(\d+)(?:-(.+))?$", version_string)
-    if not match:
+    # X.Y.Z with an optional non-empty -suffix; plain string splitting is enough here
+    core, separator, suffix = version_string.partition("-")
+    parts = core.split(".")
+    if len(parts) != 3 or (separator and not suffix):
+        return None
+    if not all(part.isascii() and part.isdigit() for part in parts):
         return None
-    major, minor, patch = match.groups()[:3]
+    major, minor, patch = parts
     return (int(major), int(minor), int(patch))
 
 
 def validate_version_format(version):
     """Validate version follows semantic versioning."""
-    if not re.match(r"^\d+\.\d+\.\d+(?:-[a-zA-Z0-9.-]+)?$", version):
+    if not SEMVER_FORMAT_RE.match(version):
         print(f"❌ Version '{version}' does not follow semantic versioning (X.Y.Z)")
         return False
     return True
@@ -126,16 +151,17 @@ def validate_changelog(version):
     content = changelog.read_text(encoding="utf-8")
 
     # Check for version entry with date: ## [X.Y.Z] - YYYY-MM-DD
-    version_pattern = rf"^## \[{re.escape(version)}\] - \d{{4}}-\d{{2}}-\d{{2}}"
-    if not re.search(version_pattern, content, re.MULTILINE):
+    escaped = re.escape(version)
+    version_pattern = re.compile(rf"^## \[{escaped}\] - \d{{4}}-\d{{2}}-\d{{2}}", re.MULTILINE)
+    if not version_pattern.search(content):
         print(f"❌ Version {version} not found in CHANGELOG.md")
         print(f"   Expected format: ## [{version}] - YYYY-MM-DD")
         print("   Please add a changelog entry for this version")
         return False
 
     # Check for version link at the bottom
-    link_pattern = rf"^\[{re.escape(version)}\]:\s+https://"
-    if not re.search(link_pattern, content, re.MULTILINE):
+    link_pattern = re.compile(rf"^\[{escaped}\]:\s+https://", re.MULTILINE)
+    if not link_pattern.search(content):
         print(f"⚠️  Version link for {version} not found in CHANGELOG.md")
         print(
             f"   Add: [{version}]: "
@@ -8,63 +8,64 @@ __author__ = "Lene Preuss <lene.preuss@gmail.com>"
 from pathlib import Path
 from typing import Optional
 
-from stable_delusion.config import ConfigManager
+from stable_delusion.config import Config, ConfigManager
 from stable_delusion.utils import log_service_creation
 from stable_delusion.repositories.interfaces import (
     ImageRepository,
     FileRepository,
     MetadataRepository,
 )
+from stable_delusion.repositories.local_file_repository import LocalFileRepository
+from stable_delusion.repositories.local_image_repository import LocalImageRepository
+from stable_delusion.repositories.local_metadata_repository import LocalMetadataRepository
+from stable_delusion.repositories.s3_file_repository import S3FileRepository
+from stable_delusion.repositories.s3_image_repository import S3ImageRepository
+from stable_delusion.repositories.s3_metadata_repository import S3MetadataRepository
 from stable_delusion.services.interfaces import (
     ImageGenerationService,
     ImageUpscalingService,
 )
+from stable_delusion.services.gemini_service import GeminiImageGenerationService
+from stable_delusion.services.seedream_service import SeedreamImageGenerationService
+from stable_delusion.services.upscaling_service import VertexAIUpscalingService
 
 
 def create_image_repository(
-    storage_type: Optional[str] = None, model: str = "gemini"
+    storage_type: Optional[str] = None, model: str = "gemini", config: Optional[Config] = None
 ) -> ImageRepository:
     """Create image repository based on storage type."""
-    config = ConfigManager.get_config()
+    config = config or ConfigManager.get_config()
     storage = storage_type or config.storage_type
 
     if storage == "s3":
-        from stable_delusion.repositories.s3_image_repository import S3ImageRepository
-
         return S3ImageRepository(config, model=model)
 
-    from stable_delusion.repositories.local_image_repository import LocalImageRepository
-
     return LocalImageRepository()
 
 
-def create_file_repository(storage_type: Optional[str] = None) -> FileRepository:
+def create_file_repository(
+    storage_type: Optional[str] = None, config: Optional[Config] = None
+) -> FileRepository:
     """Create file repository based on storage type."""
-    config = ConfigManager.get_config()
+    config = config or ConfigManager.get_config()
     storage = storage_type or config.storage_type
 
     if storage == "s3":
-        from stable_delusion.repositories.s3_file_repository import S3FileRepository
-
         return S3FileRepository(config)
 
-    from stable_delusion.repositories.local_file_repository import LocalFileRepository
-
     return LocalFileRepository()
 
 
-def create_metadata_repository(storage_type: Optional[str] = None) -> MetadataRepository:
+def create_metadata_repository(
+    storage_type: Optional[str] = None, config: Optional[Config] = None
+) -> MetadataRepository:
     """Create metadata repository based on storage type."""
-    config = ConfigManager.get_config()
+    config = config or ConfigManager.get_config()
     storage = storage_type or config.storage_type
 
     if storage == "s3":
-        from stable_delusion.repositories.s3_metadata_repository import S3MetadataRepository
-
         return S3MetadataRepository(config)
 
-    from stable_delusion.repositories.local_metadata_repository import LocalMetadataRepository
-
     return LocalMetadataRepository(config)
 
 
@@ -87,14 +88,10 @@ def create_image_generation_service(
     )
 
     if model == "seedream":
-        from stable_delusion.services.seedream_service import SeedreamImageGenerationService
-
         return SeedreamImageGenerationService.create(
             output_dir=output_dir, image_repository=image_repo
         )
 
-    from stable_delusion.services.gemini_service import GeminiImageGenerationService
-
     return GeminiImageGenerationService.create(
         project_id=project_id,
         location=location,
@@ -107,8 +104,6 @@ def create_upscaling_service(
     project_id: Optional[str] = None, location: Optional[str] = None
 ) -> ImageUpscalingService:
     """Create upscaling service."""
-    from stable_delusion.services.upscaling_service import VertexAIUpscalingService
-
     return VertexAIUpscalingService.create(project_id=project_id, location=location)
 
 
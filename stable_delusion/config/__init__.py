@@ -14,6 +14,7 @@ from stable_delusion.config.constants import (
     DEFAULT_PROJECT_ID,
     DEFAULT_SEEDREAM_MODEL,
     SUPPORTED_MODELS,
+    VALID_SCALE_FACTORS,
 )
 
 __all__ = [
@@ -24,4 +25,5 @@ __all__ = [
     "DEFAULT_GEMINI_MODEL",
     "DEFAULT_SEEDREAM_MODEL",
     "SUPPORTED_MODELS",
+    "VALID_SCALE_FACTORS",
 ]
@@ -28,6 +28,8 @@ class Config:
     s3_region: Optional[str]
     aws_access_key_id: Optional[str]
     aws_secret_access_key: Optional[str]
+    # Seconds to cache S3 HEAD (existence) results; 0 disables the cache
+    s3_head_cache_ttl: float = 0.0
 
     def __post_init__(self) -> None:
         # GEMINI_API_KEY validation is now done only when needed in GeminiClient
@@ -47,4 +47,5 @@ class ConfigManager:
             s3_region=os.getenv("AWS_S3_REGION"),
             aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
             aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+            s3_head_cache_ttl=float(os.getenv("AWS_S3_HEAD_CACHE_TTL", "0")),
         )
@@ -14,3 +14,6 @@ DEFAULT_SEEDREAM_MODEL = "seedream-4-0-250828"
 
 # Supported models for image generation
 SUPPORTED_MODELS = ["gemini", "seedream"]
+
+# Upscale factors accepted by the generate endpoint's scale parameter
+VALID_SCALE_FACTORS = frozenset({2, 4})
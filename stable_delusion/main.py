@@ -90,9 +90,10 @@ def _validate_and_save_uploaded_files() -> List[Path]:
 def _create_request_dto(saved_files: List[Path]) -> GenerateImageRequest:
     config = get_config()
     scale = None
-    if request.form.get("scale"):
+    scale_value = request.form.get("scale")
+    if scale_value:
         try:
-            scale = int(request.form["scale"])
+            scale = int(scale_value)
         except ValueError as e:
             raise ValidationError(f"Invalid scale parameter: {e}", field="scale") from e
 
@@ -7,7 +7,7 @@ from pathlib import Path
 from typing import List, Optional
 
 from stable_delusion.exceptions import ValidationError
-from stable_delusion.config import SUPPORTED_MODELS
+from stable_delusion.config import SUPPORTED_MODELS, VALID_SCALE_FACTORS
 from stable_delusion.models.requests.validation import validate_image_size
 
 
@@ -35,7 +35,7 @@ class GenerateImageRequest:
             raise ValidationError("At least one image is required", field="images")
 
         # Validate scale if provided
-        if self.scale is not None and self.scale not in [2, 4]:
+        if self.scale is not None and self.scale not in VALID_SCALE_FACTORS:
             raise ValidationError("Scale must be 2 or 4", field="scale", value=str(self.scale))
 
     def _validate_model_specific_parameters(self) -> None:
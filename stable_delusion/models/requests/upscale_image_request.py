@@ -8,6 +8,8 @@ from typing import Optional
 
 from stable_delusion.exceptions import ValidationError
 
+VALID_UPSCALE_FACTORS = frozenset({"x2", "x4"})
+
 
 @dataclass
 class UpscaleImageRequest:
@@ -22,10 +24,9 @@ class UpscaleImageRequest:
         if not self.image_path:
             raise ValidationError("Image path is required", field="image_path")
 
-        valid_scales = ["x2", "x4"]
-        if self.scale_factor not in valid_scales:
+        if self.scale_factor not in VALID_UPSCALE_FACTORS:
             raise ValidationError(
-                f"Scale factor must be one of {valid_scales}",
+                f"Scale factor must be one of {sorted(VALID_UPSCALE_FACTORS)}",
                 field="scale_factor",
                 value=self.scale_factor,
             )
@@ -4,11 +4,11 @@ Token usage entry data model.
 
 __author__ = "Lene Preuss <lene.preuss@gmail.com>"
 
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from typing import Dict, Any, Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class TokenUsageEntry:
     """Represents a single token usage record."""
 
@@ -19,4 +19,11 @@ class TokenUsageEntry:
     prompt_hash: Optional[str] = None
 
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        # One entry is serialized per API call; a literal avoids asdict's recursive copy
+        return {
+            "timestamp": self.timestamp,
+            "model": self.model,
+            "tokens": self.tokens,
+            "operation": self.operation,
+            "prompt_hash": self.prompt_hash,
+        }
@@ -4,11 +4,11 @@ Token usage statistics data model.
 
 __author__ = "Lene Preuss <lene.preuss@gmail.com>"
 
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from typing import Dict, Any
 
 
-@dataclass
+@dataclass(slots=True)
 class TokenUsageStats:
     """Aggregate token usage statistics."""
 
@@ -19,4 +19,11 @@ class TokenUsageStats:
     tokens_by_operation: Dict[str, int]
 
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        # Shallow copies keep the result independent of this instance, as asdict did
+        return {
+            "total_tokens": self.total_tokens,
+            "total_requests": self.total_requests,
+            "tokens_by_model": dict(self.tokens_by_model),
+            "requests_by_model": dict(self.requests_by_model),
+            "tokens_by_operation": dict(self.tokens_by_operation),
+        }
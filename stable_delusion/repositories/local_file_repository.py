@@ -5,23 +5,52 @@ Handles file operations including uploads on local filesystem.
 
 __author__ = "Lene Preuss <lene.preuss@gmail.com>"
 
+import errno
+import os
+import shutil
 import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from werkzeug.datastructures import FileStorage
-from werkzeug.utils import secure_filename
 
 from stable_delusion.exceptions import ValidationError
 from stable_delusion.repositories.interfaces import FileRepository
-from stable_delusion.utils import get_current_timestamp, safe_file_operation
+from stable_delusion.repositories.ttl_cache import TTLCache
+from stable_delusion.utils import (
+    deduplicate_filename,
+    ensure_directory_exists,
+    get_current_timestamp,
+    safe_file_operation,
+    secure_filename,
+    write_into_directory,
+)
+
+# How long a positive exists() result is trusted before the filesystem is asked again
+EXISTS_CACHE_TTL_SECONDS = 2.0
+# Upper bound for parallel writes in a single save_uploaded_files() call
+MAX_SAVE_WORKERS = 8
+# Upper bound for parallel unlinks in a single cleanup_old_uploads() call
+MAX_DELETE_WORKERS = 16
 
 
 class LocalFileRepository(FileRepository):
     """Local filesystem implementation of file repository with upload support."""
 
+    def __init__(self, exists_cache_ttl: float = EXISTS_CACHE_TTL_SECONDS) -> None:
+        # Only files known to exist are cached, so newly created files are seen immediately
+        self._exists_cache: TTLCache[str, bool] = TTLCache(exists_cache_ttl)
+
     def exists(self, file_path: Path) -> bool:
-        return file_path.exists()
+        key = str(file_path)
+        if self._exists_cache.get(key):
+            return True
+        found = file_path.exists()
+        if found:
+            self._exists_cache.set(key, True)
+        return found
 
     def create_directory(self, dir_path: Path) -> Path:
         def _create_operation():
@@ -31,11 +60,13 @@ class LocalFileRepository(FileRepository):
         return safe_file_operation("create_directory", str(dir_path), _create_operation)
 
     def delete_file(self, file_path: Path) -> bool:
-        if not file_path.exists():
-            return False
-
         def _delete_operation():
-            file_path.unlink()
+            self._exists_cache.invalidate(str(file_path))
+            # A single unlink both checks for and removes the file, without a stat() race
+            try:
+                file_path.unlink()
+            except FileNotFoundError:
+                return False
             return True
 
         return safe_file_operation("delete", str(file_path), _delete_operation)
@@ -43,7 +74,15 @@ class LocalFileRepository(FileRepository):
     def move_file(self, source: Path, destination: Path) -> Path:
         def _move_operation():
             destination.parent.mkdir(parents=True, exist_ok=True)
-            source.rename(destination)
+            self._exists_cache.invalidate(str(source))
+            try:
+                os.replace(source, destination)
+            except OSError as e:
+                # Renames cannot cross filesystems; fall back to copy and unlink
+                if e.errno != errno.EXDEV:
+                    raise
+                shutil.move(os.fspath(source), os.fspath(destination))
+            self._exists_cache.set(str(destination), True)
             return destination
 
         return safe_file_operation(
@@ -54,21 +93,46 @@ class LocalFileRepository(FileRepository):
 
     def save_uploaded_files(self, files: List[FileStorage], upload_dir: Path) -> List[Path]:
         def _save_operation():
-            upload_dir.mkdir(parents=True, exist_ok=True)
-            saved_files = []
-            for file in files:
-                if not self.validate_uploaded_file(file):
-                    continue
-
-                timestamp = get_current_timestamp("compact")
-                filename = self.generate_secure_filename(file.filename, timestamp)
-                filepath = upload_dir / filename
-                file.save(str(filepath))
-                saved_files.append(filepath)
-            return saved_files
+            ensure_directory_exists(upload_dir)
+            targets = self._plan_upload_targets(files, upload_dir)
+            self._write_uploads(targets, upload_dir)
+            return [Path(filepath) for _, filepath in targets]
 
         return safe_file_operation("save_uploads", str(upload_dir), _save_operation)
 
+    def _plan_upload_targets(
+        self, files: List[FileStorage], upload_dir: Path
+    ) -> List[Tuple[FileStorage, str]]:
+        # Target paths stay plain strings inside the batch; Path objects are built once at the end
+        dir_str = os.fspath(upload_dir)
+        targets = []
+        timestamp = get_current_timestamp("compact")
+        used_names: Dict[str, int] = {}
+        for file in files:
+            if not self.validate_uploaded_file(file):
+                continue
+
+            filename = self.generate_secure_filename(file.filename, timestamp)
+            # Same-named files in one batch would otherwise overwrite each other
+            filename = deduplicate_filename(filename, used_names)
+            targets.append((file, os.path.join(dir_str, filename)))
+        return targets
+
+    def _write_uploads(self, targets: List[Tuple[FileStorage, str]], upload_dir: Path) -> None:
+        write_upload = partial(self._write_upload, upload_dir=upload_dir)
+        if len(targets) <= 1:
+            for target in targets:
+                write_upload(target)
+            return
+        with ThreadPoolExecutor(max_workers=min(MAX_SAVE_WORKERS, len(targets))) as executor:
+            # Consume the iterator so the first failed write is re-raised here
+            list(executor.map(write_upload, targets))
+
+    def _write_upload(self, target: Tuple[FileStorage, str], upload_dir: Path) -> None:
+        file, filepath = target
+        write_into_directory(upload_dir, lambda: file.save(filepath))
+        self._exists_cache.set(filepath, True)
+
     def generate_secure_filename(
         self, filename: Optional[str], timestamp: Optional[str] = None
     ) -> str:
@@ -76,7 +140,7 @@ class LocalFileRepository(FileRepository):
             timestamp = timestamp or get_current_timestamp("compact")
             return f"uploaded_file_{timestamp}.bin"
 
-        # Use werkzeug's secure_filename to sanitize
+        # Same sanitization as werkzeug's secure_filename, without the regex
         secure_name = secure_filename(filename)
 
         # If secure_filename returns empty string, generate a fallback
@@ -87,24 +151,38 @@ class LocalFileRepository(FileRepository):
         return secure_name
 
     def cleanup_old_uploads(self, upload_dir: Path, max_age_hours: int = 24) -> int:
-        if not upload_dir.exists():
-            return 0
-
         def _cleanup_operation():
-            current_time = time.time()
-            max_age_seconds = max_age_hours * 3600
-            cleanup_count = 0
-
-            for file_path in upload_dir.iterdir():
-                if file_path.is_file():
-                    file_age = current_time - file_path.stat().st_mtime
-                    if file_age > max_age_seconds:
-                        file_path.unlink()
-                        cleanup_count += 1
-            return cleanup_count
+            try:
+                entries = os.scandir(os.fspath(upload_dir))
+            except FileNotFoundError:
+                return 0
+            with entries:
+                return self._remove_expired_files(entries, time.time() - max_age_hours * 3600)
 
         return safe_file_operation("cleanup", str(upload_dir), _cleanup_operation)
 
+    def _remove_expired_files(self, entries: Iterator[os.DirEntry], cutoff: float) -> int:
+        # DirEntry.is_file() uses the dirent type, so only stat() hits the filesystem
+        expired = [
+            entry.path
+            for entry in entries
+            if entry.is_file(follow_symlinks=False) and entry.stat().st_mtime < cutoff
+        ]
+        for path in expired:
+            self._exists_cache.invalidate(path)
+        self._unlink_all(expired)
+        return len(expired)
+
+    @staticmethod
+    def _unlink_all(paths: List[str]) -> None:
+        if len(paths) <= 1:
+            for path in paths:
+                os.unlink(path)
+            return
+        with ThreadPoolExecutor(max_workers=min(MAX_DELETE_WORKERS, len(paths))) as executor:
+            # Consume the iterator so the first failed unlink is re-raised here
+            list(executor.map(os.unlink, paths))
+
     def validate_uploaded_file(self, file: FileStorage) -> bool:
         if file is None:
             raise ValidationError("No file provided")
@@ -113,13 +191,12 @@ class LocalFileRepository(FileRepository):
             raise ValidationError("No filename provided")
 
         # Check if file has content
-        if not hasattr(file, "stream") or not file.stream:
+        if not getattr(file, "stream", None):
             raise ValidationError("File has no content")
 
         # Basic content type validation for images
-        if file.content_type and not file.content_type.startswith("image/"):
-            raise ValidationError(
-                f"Invalid file type: {file.content_type}. Only images are allowed."
-            )
+        content_type = file.content_type
+        if content_type and not content_type.startswith("image/"):
+            raise ValidationError(f"Invalid file type: {content_type}. Only images are allowed.")
 
         return True
@@ -5,13 +5,38 @@ Handles image storage and retrieval operations on local filesystem.
 
 __author__ = "Lene Preuss <lene.preuss@gmail.com>"
 
+import math
+import os
+import stat
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
 
 from PIL import Image
 
 from stable_delusion.exceptions import FileOperationError
 from stable_delusion.repositories.interfaces import ImageRepository
-from stable_delusion.utils import generate_timestamped_filename
+from stable_delusion.repositories.ttl_cache import TTLCache
+from stable_delusion.repositories.vips_encoder import save_image_file
+from stable_delusion.utils import generate_timestamped_filename, write_into_directory
+
+FileIdentity = Tuple[str, int, int, int]
+
+# Files that passed Image.verify(), keyed by (path, inode, mtime_ns, size). Entries never
+# expire since any change to the file changes its key; failed verifications are not cached.
+_verified_images: TTLCache[FileIdentity, bool] = TTLCache(math.inf, maxsize=1024)
+
+
+def _file_identity(file_path: Path, file_stat: os.stat_result) -> FileIdentity:
+    return (str(file_path), file_stat.st_ino, file_stat.st_mtime_ns, file_stat.st_size)
+
+
+def _verify_image(path: str, identity: FileIdentity) -> None:
+    if _verified_images.get(identity):
+        return
+    with Image.open(path) as img:
+        img.verify()
+    _verified_images.set(identity, True)
 
 
 class LocalImageRepository(ImageRepository):
@@ -19,12 +44,8 @@ class LocalImageRepository(ImageRepository):
 
     def save_image(self, image: Image.Image, file_path: Path) -> Path:
         try:
-            # Ensure parent directory exists
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-
-            # Save the image
-            image.save(str(file_path))
-
+            # Parent directory is created on first use and remembered afterwards
+            write_into_directory(file_path.parent, lambda: save_image_file(image, file_path))
             return file_path
         except (OSError, IOError) as e:
             raise FileOperationError(
@@ -40,20 +61,27 @@ class LocalImageRepository(ImageRepository):
             ) from e
 
     def validate_image_file(self, file_path: Path) -> bool:
-        if not file_path.exists():
+        file_stat = self._stat_regular_file(file_path)
+        self._verify(file_path, file_stat)
+        return True
+
+    def _stat_regular_file(self, file_path: Path) -> os.stat_result:
+        try:
+            file_stat = file_path.stat()
+        except OSError as e:
             raise FileOperationError(
                 f"File does not exist: {file_path}", file_path=str(file_path), operation="validate"
-            )
+            ) from e
 
-        if not file_path.is_file():
+        if not stat.S_ISREG(file_stat.st_mode):
             raise FileOperationError(
                 f"Path is not a file: {file_path}", file_path=str(file_path), operation="validate"
             )
+        return file_stat
 
+    def _verify(self, file_path: Path, file_stat: os.stat_result) -> None:
         try:
-            with Image.open(file_path) as img:
-                img.verify()
-            return True
+            _verify_image(str(file_path), _file_identity(file_path, file_stat))
         except (OSError, IOError) as e:
             raise FileOperationError(
                 f"File is not a valid image: {file_path}",
@@ -61,6 +89,30 @@ class LocalImageRepository(ImageRepository):
                 operation="validate",
             ) from e
 
+    def validate_image_files(self, file_paths: Sequence[Path]) -> List[bool]:
+        if len(file_paths) <= 1:
+            return [self.validate_image_file(file_path) for file_path in file_paths]
+        # Pillow releases the GIL while decoding, so verification scales across threads
+        workers = min(os.cpu_count() or 1, len(file_paths))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            outcomes = list(executor.map(self._try_validate_image_file, file_paths))
+        errors = [outcome for outcome in outcomes if isinstance(outcome, FileOperationError)]
+        if errors:
+            raise FileOperationError(
+                f"{len(errors)} of {len(file_paths)} image files failed validation: "
+                f"{'; '.join(str(e) for e in errors)}",
+                file_path=", ".join(e.file_path for e in errors),
+                operation="validate",
+            ) from errors[0]
+        return [True] * len(file_paths)
+
+    def _try_validate_image_file(self, file_path: Path) -> Optional[FileOperationError]:
+        try:
+            self.validate_image_file(file_path)
+            return None
+        except FileOperationError as e:
+            return e
+
     def generate_image_path(self, base_name: str, output_dir: Path) -> Path:
         # Use existing utility function to generate timestamped filename
         filename = generate_timestamped_filename(base_name)
@@ -6,6 +6,8 @@ Provides reusable S3 client setup and common operations.
 __author__ = "Lene Preuss <lene.preuss@gmail.com>"
 
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, Any, Tuple, TYPE_CHECKING
 
 from stable_delusion.config import Config
@@ -13,6 +15,7 @@ from stable_delusion.exceptions import ConfigurationError, FileOperationError
 
 try:
     import boto3
+    from boto3.s3.transfer import TransferConfig
     from botocore.config import Config as BotocoreConfig
     from botocore.exceptions import ClientError, NoCredentialsError
 
@@ -34,13 +37,49 @@ except ImportError as e:
         """Dummy NoCredentialsError class when boto3 is not available."""
 
     BotocoreConfig = None  # type: ignore[misc,assignment]
+    TransferConfig = None  # type: ignore[misc,assignment]
 
 if TYPE_CHECKING:
     from mypy_boto3_s3 import S3Client
 
+MB = 1024 * 1024
+
+# Distinct (region, credentials, bucket) combinations whose clients are kept for reuse
+MAX_SHARED_CLIENTS = 8
+# Sized for concurrent batch uploads plus multipart transfer threads
+MAX_POOL_CONNECTIONS = 50
+# Concurrent HEAD requests while reading content hashes into the duplicate-detection cache
+HASH_CACHE_WORKERS = 16
+# Fail fast on a stuck connection and let the retries try again, rather than wedging a
+# batch worker for botocore's default 60 s; adaptive retries back off when S3 throttles
+CONNECT_TIMEOUT_SECONDS = 3
+READ_TIMEOUT_SECONDS = 30
+MAX_RETRY_ATTEMPTS = 10
+
+ClientKey = Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]
+
+# Managed-transfer settings for uploads: objects above 8 MB go multipart in 16 MB parts
+TRANSFER_CONFIG = (
+    TransferConfig(
+        multipart_threshold=8 * MB,
+        multipart_chunksize=16 * MB,
+        max_concurrency=8,
+        use_threads=True,
+    )
+    if BOTO3_AVAILABLE
+    else None
+)
+
 
 class S3ClientManager:
-    """Manages S3 client creation and configuration."""
+    """Manages S3 client creation and configuration.
+
+    Clients are thread-safe, so one client (and its connection pool) is shared by all
+    repositories created with the same region, credentials and bucket.
+    """
+
+    _shared_clients: Dict[ClientKey, "S3Client"] = {}
+    _shared_clients_lock = threading.Lock()
 
     @staticmethod
     def _check_boto3_availability() -> None:
@@ -55,8 +94,11 @@ class S3ClientManager:
         # Configure boto3 client settings
         boto_config = BotocoreConfig(
             region_name=config.s3_region,
-            retries={"max_attempts": 3, "mode": "standard"},
-            max_pool_connections=10,
+            retries={"max_attempts": MAX_RETRY_ATTEMPTS, "mode": "adaptive"},
+            connect_timeout=CONNECT_TIMEOUT_SECONDS,
+            read_timeout=READ_TIMEOUT_SECONDS,
+            tcp_keepalive=True,
+            max_pool_connections=MAX_POOL_CONNECTIONS,
         )
 
         # Create client with explicit credentials if provided
@@ -98,6 +140,45 @@ class S3ClientManager:
         """
         S3ClientManager._check_boto3_availability()
 
+        client_key = S3ClientManager._client_key(config)
+        with S3ClientManager._shared_clients_lock:
+            s3_client = S3ClientManager._shared_clients.get(client_key)
+        if s3_client is not None:
+            return s3_client
+
+        # Built and validated outside the lock, so a slow HeadBucket for one bucket doesn't
+        # hold up callers whose client is already cached
+        s3_client = S3ClientManager._create_new_client(config)
+        with S3ClientManager._shared_clients_lock:
+            # Threads that raced to create the same client all end up sharing the first one
+            shared_client = S3ClientManager._shared_clients.get(client_key)
+            if shared_client is not None:
+                return shared_client
+            S3ClientManager._remember_client(client_key, s3_client)
+            return s3_client
+
+    @staticmethod
+    def _client_key(config: Config) -> ClientKey:
+        return (
+            config.s3_region,
+            config.aws_access_key_id,
+            config.aws_secret_access_key,
+            config.s3_bucket,
+        )
+
+    @staticmethod
+    def _remember_client(client_key: ClientKey, s3_client: "S3Client") -> None:
+        if len(S3ClientManager._shared_clients) >= MAX_SHARED_CLIENTS:
+            del S3ClientManager._shared_clients[next(iter(S3ClientManager._shared_clients))]
+        S3ClientManager._shared_clients[client_key] = s3_client
+
+    @staticmethod
+    def clear_shared_clients() -> None:
+        with S3ClientManager._shared_clients_lock:
+            S3ClientManager._shared_clients.clear()
+
+    @staticmethod
+    def _create_new_client(config: Config) -> "S3Client":
         try:
             _, client_kwargs = S3ClientManager._build_s3_client_config(config)
             return S3ClientManager._create_and_validate_client(client_kwargs, config.s3_bucket)
@@ -323,23 +404,24 @@ def _get_object_hash_from_metadata(
 def _process_s3_objects_for_cache(
     s3_client: "S3Client", bucket_name: str, pages
 ) -> tuple[Dict[str, str], int]:
+    keys = [
+        obj["Key"]
+        for page in pages
+        for obj in page.get("Contents", [])
+        if not obj["Key"].endswith("/")
+    ]
+
+    def get_hash(key: str) -> Optional[str]:
+        return _get_object_hash_from_metadata(s3_client, bucket_name, key)
+
     hash_cache: Dict[str, str] = {}
-    object_count = 0
-
-    for page in pages:
-        if "Contents" not in page:
-            continue
-        for obj in page["Contents"]:
-            key = obj["Key"]
-            if key.endswith("/"):
-                continue
-
-            object_count += 1
-            stored_hash = _get_object_hash_from_metadata(s3_client, bucket_name, key)
+    # Each hash needs its own HEAD round-trip; map() keeps listing order, so the first key wins
+    with ThreadPoolExecutor(max_workers=HASH_CACHE_WORKERS) as executor:
+        for key, stored_hash in zip(keys, executor.map(get_hash, keys)):
             if stored_hash and stored_hash not in hash_cache:
                 hash_cache[stored_hash] = key
 
-    return hash_cache, object_count
+    return hash_cache, len(keys)
 
 
 def build_s3_hash_cache(s3_client: "S3Client", bucket_name: str, prefix: str) -> Dict[str, str]:
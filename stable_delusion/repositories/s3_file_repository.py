@@ -11,7 +11,6 @@ from pathlib import Path
 from typing import TYPE_CHECKING, Dict, List, Optional
 
 from werkzeug.datastructures import FileStorage
-from werkzeug.utils import secure_filename
 
 from stable_delusion.config import Config
 from stable_delusion.exceptions import FileOperationError, ValidationError
@@ -22,7 +21,12 @@ from stable_delusion.repositories.s3_client import (
     build_s3_url,
     parse_s3_url,
 )
-from stable_delusion.utils import get_current_timestamp, calculate_file_sha256
+from stable_delusion.utils import (
+    calculate_file_sha256,
+    deduplicate_filename,
+    get_current_timestamp,
+    secure_filename,
+)
 
 if TYPE_CHECKING:
     from mypy_boto3_s3 import S3Client
@@ -266,12 +270,15 @@ class S3FileRepository(FileRepository):
             },
         )
 
-    def _process_single_uploaded_file(self, file: FileStorage, upload_dir: Path) -> Optional[Path]:
+    def _process_single_uploaded_file(
+        self, file: FileStorage, upload_dir: Path, timestamp: str, used_names: Dict[str, int]
+    ) -> Optional[Path]:
         if not self.validate_uploaded_file(file):
             return None
 
-        timestamp = get_current_timestamp("compact")
         filename = self.generate_secure_filename(file.filename, timestamp)
+        # Same-named files in one batch would otherwise overwrite each other's S3 object
+        filename = deduplicate_filename(filename, used_names)
         s3_key = self._generate_upload_s3_key(upload_dir, filename)
         content_type = file.content_type or "application/octet-stream"
 
@@ -287,8 +294,10 @@ class S3FileRepository(FileRepository):
         try:
             self.create_directory(upload_dir)
             saved_files = []
+            timestamp = get_current_timestamp("compact")
+            used_names: Dict[str, int] = {}
             for file in files:
-                result = self._process_single_uploaded_file(file, upload_dir)
+                result = self._process_single_uploaded_file(file, upload_dir, timestamp, used_names)
                 if result:
                     saved_files.append(result)
             return saved_files
@@ -306,7 +315,7 @@ class S3FileRepository(FileRepository):
             timestamp = timestamp or get_current_timestamp("compact")
             return f"uploaded_file_{timestamp}.bin"
 
-        # Use werkzeug's secure_filename to sanitize
+        # Same sanitization as werkzeug's secure_filename, without the regex
         secure_name = secure_filename(filename)
 
         # If secure_filename returns empty string, generate a fallback
@@ -328,13 +337,12 @@ class S3FileRepository(FileRepository):
             raise ValidationError("No filename provided")
 
         # Check if file has content
-        if not hasattr(file, "stream") or not file.stream:
+        if not getattr(file, "stream", None):
             raise ValidationError("File has no content")
 
         # Basic content type validation for images
-        if file.content_type and not file.content_type.startswith("image/"):
-            raise ValidationError(
-                f"Invalid file type: {file.content_type}. Only images are allowed."
-            )
+        content_type = file.content_type
+        if content_type and not content_type.startswith("image/"):
+            raise ValidationError(f"Invalid file type: {content_type}. Only images are allowed.")
 
         return True
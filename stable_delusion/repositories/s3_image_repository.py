@@ -7,8 +7,11 @@ __author__ = "Lene Preuss <lene.preuss@gmail.com>"
 
 import io
 import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, BinaryIO, Dict, List, Optional, Sequence, Tuple, Union
 
 from PIL import Image
 
@@ -16,16 +19,47 @@ from stable_delusion.config import Config
 from stable_delusion.exceptions import FileOperationError, ValidationError
 from stable_delusion.repositories.interfaces import ImageRepository
 from stable_delusion.repositories.s3_client import (
+    TRANSFER_CONFIG,
+    ClientError,
     S3ClientManager,
     generate_s3_key,
     build_s3_url,
+    build_https_s3_url,
     build_s3_hash_cache,
+    parse_https_s3_url,
+    parse_s3_url,
 )
+from stable_delusion.repositories.sized_lru_cache import SizedLRUCache
+from stable_delusion.repositories.ttl_cache import TTLCache
+from stable_delusion.repositories.vips_encoder import encode_image
 from stable_delusion.utils import calculate_file_sha256
 
 if TYPE_CHECKING:
     from mypy_boto3_s3 import S3Client
 
+# Upper bound for concurrent uploads in a single save_images() batch
+MAX_UPLOAD_WORKERS = 32
+# Encoding is CPU-bound; a few threads keep the uploaders fed
+MAX_ENCODE_WORKERS = 4
+# Encoded images held in memory awaiting upload, per repository
+MAX_INFLIGHT_BUFFERS = 16
+# Upper bound for concurrent HEAD requests in a single validate_image_files() batch
+MAX_VALIDATE_WORKERS = 32
+# Downloaded image bytes kept per repository for ETag-conditional reloads
+MAX_CACHED_IMAGES = 64
+MAX_CACHED_IMAGE_BYTES = 256 * 1024 * 1024
+
+# File extension -> (PIL save format, S3 ContentType); unknown extensions are saved as PNG
+_FORMAT_TABLE: Dict[str, Tuple[str, str]] = {
+    ".png": ("PNG", "image/png"),
+    ".jpg": ("JPEG", "image/jpeg"),
+    ".jpeg": ("JPEG", "image/jpeg"),
+    ".gif": ("GIF", "image/gif"),
+    ".bmp": ("BMP", "image/bmp"),
+    ".webp": ("WEBP", "image/webp"),
+}
+_DEFAULT_FORMAT = _FORMAT_TABLE[".png"]
+
 
 class S3ImageRepository(ImageRepository):
     """S3-based implementation of ImageRepository interface."""
@@ -38,53 +72,61 @@ class S3ImageRepository(ImageRepository):
         self.model = model
         self.key_prefix = f"output/{model}/"
         self._s3_hash_cache: Optional[dict] = None  # Cache for SHA-256 -> S3 key mappings
+        self._hash_cache_lock = threading.Lock()
+        self._inflight_buffers = threading.BoundedSemaphore(MAX_INFLIGHT_BUFFERS)
+        # Opt-in cache of S3 key -> exists, saving a HEAD round-trip per validation
+        self._head_cache: TTLCache[str, bool] = TTLCache(config.s3_head_cache_ttl)
+        # S3 key -> (ETag, bytes) of recent downloads, revalidated with If-None-Match
+        self._image_cache: SizedLRUCache[str, Tuple[str, bytes]] = SizedLRUCache(
+            MAX_CACHED_IMAGES, MAX_CACHED_IMAGE_BYTES
+        )
 
-    def _convert_image_to_bytes(self, image: Image.Image, file_path: Path) -> bytes:
-        image_buffer = io.BytesIO()
-        file_format = self._get_image_format(file_path)
-        image.save(image_buffer, format=file_format)
-        return image_buffer.getvalue()
+    def _encode_image(self, image: Image.Image, file_format: str, image_buffer: io.BytesIO) -> str:
+        encode_image(image, file_format, image_buffer)
+        # Hash the buffer contents in place rather than copying them out with getvalue()
+        with image_buffer.getbuffer() as image_view:
+            file_hash = calculate_file_sha256(image_view)
+        image_buffer.seek(0)
+        return file_hash
 
     def _upload_to_s3(  # pylint: disable=too-many-arguments,too-many-positional-arguments
-        self, s3_key: str, image_bytes: bytes, file_format: str, file_path: Path, file_hash: str
+        self, s3_key: str, body: BinaryIO, content_type: str, path_str: str, file_hash: str
     ) -> None:
-        self.s3_client.put_object(
+        # upload_fileobj issues a single PUT for small images and a concurrent
+        # multipart upload above TRANSFER_CONFIG's threshold
+        self.s3_client.upload_fileobj(
+            Fileobj=body,
             Bucket=self.bucket_name,
             Key=s3_key,
-            Body=image_bytes,
-            ContentType=f"image/{file_format.lower()}",
-            Metadata={
-                "original_filename": file_path.name,
-                "uploaded_by": "stable-delusion",
-                "sha256": file_hash,
+            ExtraArgs={
+                "ContentType": content_type,
+                "Metadata": {
+                    "original_filename": os.path.basename(path_str),
+                    "uploaded_by": "stable-delusion",
+                    "sha256": file_hash,
+                },
             },
+            Config=TRANSFER_CONFIG,
         )
 
     def _build_result_path(self, s3_key: str) -> Path:
-        https_url = f"https://{self.bucket_name}.s3.{self.config.s3_region}.amazonaws.com/{s3_key}"
-        result_path = Path(https_url)
-        # Fix URL normalization issue with Path objects
-        result_str = str(result_path)
-        if result_str.startswith("https:/") and not result_str.startswith("https://"):
-            result_str = result_str.replace("https:/", "https://", 1)
-            result_path = Path(result_str)
-        return result_path
+        # Path collapses "https://" to "https:/"; _extract_s3_key accepts both forms
+        return Path(build_https_s3_url(self.bucket_name, s3_key, self.config.s3_region))
 
     def _find_file_by_hash(self, file_hash: str) -> Optional[str]:
         """Find S3 file with matching hash using cached hash map."""
-        # Build cache if not already built
-        if self._s3_hash_cache is None:
-            self._s3_hash_cache = build_s3_hash_cache(
-                self.s3_client, self.bucket_name, self.key_prefix
-            )
+        # Build cache if not already built; concurrent batch uploads share one build
+        with self._hash_cache_lock:
+            if self._s3_hash_cache is None:
+                self._s3_hash_cache = build_s3_hash_cache(
+                    self.s3_client, self.bucket_name, self.key_prefix
+                )
 
         # O(1) lookup in cache
         return self._s3_hash_cache.get(file_hash)
 
     def file_exists(self, file_path: Path) -> bool:
         try:
-            from botocore.exceptions import ClientError
-
             s3_key = generate_s3_key(str(file_path), self.key_prefix)
             self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)
             logging.debug("File exists in S3: %s", s3_key)
@@ -100,29 +142,115 @@ class S3ImageRepository(ImageRepository):
             return False
 
     def save_image(self, image: Image.Image, file_path: Path) -> Path:
+        return self.save_images([image], [file_path])[0]
+
+    def save_image_file(self, file_path: Path) -> Path:
+        """Upload an already encoded image file as-is, without decoding it first."""
+        # OSError from reading the local file propagates unchanged, as it does from Image.open
+        file_hash = calculate_file_sha256(file_path)
+        with open(file_path, "rb") as image_file:
+            try:
+                return self._store_encoded(file_path, image_file, file_hash)
+            except Exception as e:
+                raise self._save_error(file_path, e) from e
+
+    def save_images(self, images: Sequence[Image.Image], file_paths: Sequence[Path]) -> List[Path]:
+        if len(images) != len(file_paths):
+            raise ValidationError(
+                f"Got {len(images)} images but {len(file_paths)} file paths",
+                field="file_paths",
+                value=str(len(file_paths)),
+            )
+        if len(images) <= 1:
+            return [self._save_single_image(img, path) for img, path in zip(images, file_paths)]
+        # Encodes (CPU, GIL released by Pillow) overlap with uploads (network) of earlier images
+        with ThreadPoolExecutor(max_workers=min(MAX_ENCODE_WORKERS, len(images))) as encoders:
+            with ThreadPoolExecutor(max_workers=min(MAX_UPLOAD_WORKERS, len(images))) as uploaders:
+                futures = self._submit_save_pipeline(encoders, uploaders, images, file_paths)
+                return self._collect_upload_results(futures, file_paths)
+
+    def _submit_save_pipeline(
+        self,
+        encoders: ThreadPoolExecutor,
+        uploaders: ThreadPoolExecutor,
+        images: Sequence[Image.Image],
+        file_paths: Sequence[Path],
+    ) -> Dict[Future, int]:
+        futures = {}
+        for index, (image, file_path) in enumerate(zip(images, file_paths)):
+            # Blocks while MAX_INFLIGHT_BUFFERS encoded images are waiting for upload
+            self._inflight_buffers.acquire()  # pylint: disable=consider-using-with
+            encoded = encoders.submit(self._encode_for_upload, image, file_path)
+            futures[uploaders.submit(self._upload_encoded, encoded, file_path)] = index
+        return futures
+
+    def _collect_upload_results(
+        self, futures: Dict[Future, int], file_paths: Sequence[Path]
+    ) -> List[Path]:
+        results: List[Optional[Path]] = [None] * len(file_paths)
+        errors: List[FileOperationError] = []
+        for future in as_completed(futures):
+            try:
+                results[futures[future]] = future.result()
+            except FileOperationError as e:
+                errors.append(e)
+        if errors:
+            details = "; ".join(str(e) for e in errors)
+            raise FileOperationError(
+                f"Failed to save {len(errors)} of {len(file_paths)} images to S3: {details}",
+                file_path=", ".join(e.file_path for e in errors),
+                operation="save_images_s3",
+            ) from errors[0]
+        return results  # type: ignore[return-value]
+
+    def _save_single_image(self, image: Image.Image, file_path: Path) -> Path:
+        image_buffer = io.BytesIO()
         try:
-            s3_key = generate_s3_key(str(file_path), self.key_prefix)
-            image_bytes = self._convert_image_to_bytes(image, file_path)
-            file_hash = calculate_file_sha256(image_bytes)
-            existing_key = self._find_file_by_hash(file_hash)
-            if existing_key:
-                existing_url = self._build_result_path(existing_key)
-                logging.info(
-                    "Skipping upload - file with same content already exists in S3: %s",
-                    existing_url,
-                )
-                return existing_url
-            file_format = self._get_image_format(file_path)
-            self._upload_to_s3(s3_key, image_bytes, file_format, file_path, file_hash)
-            result_path = self._build_result_path(s3_key)
-            logging.info("Uploaded to S3: %s", result_path)
-            return result_path
+            file_hash = self._encode_image(
+                image, self._get_image_format(os.fspath(file_path))[0], image_buffer
+            )
+            return self._store_encoded(file_path, image_buffer, file_hash)
         except Exception as e:
-            raise FileOperationError(
-                f"Failed to save image to S3: {str(e)}",
-                file_path=str(file_path),
-                operation="save_image_s3",
-            ) from e
+            raise self._save_error(file_path, e) from e
+
+    def _encode_for_upload(self, image: Image.Image, file_path: Path) -> Tuple[io.BytesIO, str]:
+        image_buffer = io.BytesIO()
+        file_format, _ = self._get_image_format(os.fspath(file_path))
+        return image_buffer, self._encode_image(image, file_format, image_buffer)
+
+    def _upload_encoded(self, encoded: "Future[Tuple[io.BytesIO, str]]", file_path: Path) -> Path:
+        try:
+            image_buffer, file_hash = encoded.result()
+            return self._store_encoded(file_path, image_buffer, file_hash)
+        except Exception as e:
+            raise self._save_error(file_path, e) from e
+        finally:
+            self._inflight_buffers.release()
+
+    def _store_encoded(self, file_path: Path, image_buffer: BinaryIO, file_hash: str) -> Path:
+        existing_key = self._find_file_by_hash(file_hash)
+        if existing_key:
+            existing_url = self._build_result_path(existing_key)
+            logging.info(
+                "Skipping upload - file with same content already exists in S3: %s", existing_url
+            )
+            return existing_url
+        path_str = os.fspath(file_path)
+        s3_key = generate_s3_key(path_str, self.key_prefix)
+        _, content_type = self._get_image_format(path_str)
+        self._upload_to_s3(s3_key, image_buffer, content_type, path_str, file_hash)
+        self._head_cache.set(s3_key, True)
+        result_path = self._build_result_path(s3_key)
+        logging.info("Uploaded to S3: %s", result_path)
+        return result_path
+
+    @staticmethod
+    def _save_error(file_path: Path, error: Exception) -> FileOperationError:
+        return FileOperationError(
+            f"Failed to save image to S3: {str(error)}",
+            file_path=str(file_path),
+            operation="save_image_s3",
+        )
 
     def load_image(self, file_path: Path) -> Image.Image:
         try:
@@ -142,9 +270,39 @@ class S3ImageRepository(ImageRepository):
             raise  # pragma: no cover
 
     def _download_image_from_s3(self, s3_key: str) -> bytes:
-        """Download image data from S3."""
-        response = self.s3_client.get_object(Bucket=self.bucket_name, Key=s3_key)
-        return response["Body"].read()
+        """Download image data from S3, reusing cached bytes while the ETag is unchanged."""
+        cached = self._image_cache.get(s3_key)
+        if cached is None:
+            return self._fetch_image_bytes(s3_key)
+        etag, image_data = cached
+        try:
+            return self._fetch_image_bytes(s3_key, IfNoneMatch=etag)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            if not self._is_not_modified(e):
+                raise
+            logging.debug("S3 object unchanged, using cached bytes: %s", s3_key)
+            return image_data
+
+    def _fetch_image_bytes(self, s3_key: str, **conditions: str) -> bytes:
+        response = self.s3_client.get_object(Bucket=self.bucket_name, Key=s3_key, **conditions)
+        image_data = response["Body"].read()
+        etag = response.get("ETag")
+        if etag:
+            self._image_cache.put(s3_key, (etag, image_data), len(image_data))
+        return image_data
+
+    @staticmethod
+    def _is_not_modified(error: Exception) -> bool:
+        error_code = getattr(error, "response", {}).get("Error", {}).get("Code", None)
+        return error_code in ("304", "NotModified")
+
+    @staticmethod
+    def _is_not_found(error: Exception) -> bool:
+        # Modeled NoSuchKey exceptions are matched by class name, without formatting the class
+        if type(error).__name__ == "NoSuchKey":
+            return True
+        error_code = getattr(error, "response", {}).get("Error", {}).get("Code", None)
+        return error_code == "NoSuchKey"
 
     def _convert_bytes_to_image(self, image_data: bytes) -> Image.Image:
         """Convert bytes data to PIL Image."""
@@ -153,10 +311,7 @@ class S3ImageRepository(ImageRepository):
 
     def _handle_load_image_error(self, error: Exception, file_path: Path) -> None:
         """Handle errors during image loading."""
-        error_code = getattr(error, "response", {}).get("Error", {}).get("Code", None)
-        if error_code == "NoSuchKey" or (
-            hasattr(error, "__class__") and "NoSuchKey" in str(error.__class__)
-        ):
+        if self._is_not_found(error):
             raise FileOperationError(
                 f"Image not found in S3: {file_path}",
                 file_path=str(file_path),
@@ -169,27 +324,34 @@ class S3ImageRepository(ImageRepository):
         ) from error
 
     def validate_image_file(self, file_path: Path) -> bool:
+        # Raises ValidationError (e.g. bucket mismatch) before any S3 call
+        s3_key = self._extract_s3_key(file_path)
         try:
-            s3_key = self._extract_s3_key(file_path)
+            cached = self._head_cache.get(s3_key)
+            if cached is not None:
+                return cached
 
             # Check if object exists using head_object
             self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)
             logging.debug("S3 image file validated: %s", s3_key)
+            self._head_cache.set(s3_key, True)
             return True
 
-        except ValidationError:
-            # Re-raise validation errors (e.g., bucket mismatch)
-            raise
         except Exception as e:  # pylint: disable=broad-exception-caught
             # Handle boto3 ClientError and other S3 exceptions
-            error_code = getattr(e, "response", {}).get("Error", {}).get("Code", None)
-            if error_code == "NoSuchKey" or (
-                hasattr(e, "__class__") and "NoSuchKey" in str(e.__class__)
-            ):
+            if self._is_not_found(e):
+                self._head_cache.set(s3_key, False)
                 return False
             logging.warning("Failed to validate S3 image file %s: %s", file_path, e)
             return False
 
+    def validate_image_files(self, file_paths: Sequence[Path]) -> List[bool]:
+        if len(file_paths) <= 1:
+            return [self.validate_image_file(file_path) for file_path in file_paths]
+        # HEAD requests are latency-bound; keys already in the HEAD cache return immediately
+        with ThreadPoolExecutor(max_workers=min(MAX_VALIDATE_WORKERS, len(file_paths))) as executor:
+            return list(executor.map(self.validate_image_file, file_paths))
+
     def generate_image_path(self, base_name: str, output_dir: Path) -> Path:
         # For S3, output_dir becomes part of the key prefix
         key_prefix = (
@@ -201,21 +363,10 @@ class S3ImageRepository(ImageRepository):
         s3_url = build_s3_url(self.bucket_name, s3_key)
         return Path(s3_url)
 
-    def _get_image_format(self, file_path: Path) -> str:
-        extension = file_path.suffix.lower()
-        format_mapping = {
-            ".png": "PNG",
-            ".jpg": "JPEG",
-            ".jpeg": "JPEG",
-            ".gif": "GIF",
-            ".bmp": "BMP",
-            ".webp": "WEBP",
-        }
-        return format_mapping.get(extension, "PNG")  # Default to PNG
+    def _get_image_format(self, path_str: str) -> Tuple[str, str]:
+        return _FORMAT_TABLE.get(os.path.splitext(path_str)[1].lower(), _DEFAULT_FORMAT)
 
     def _parse_s3_url_and_validate_bucket(self, path_str: str) -> str:
-        from stable_delusion.repositories.s3_client import parse_s3_url
-
         try:
             bucket, key = parse_s3_url(path_str)
             if bucket != self.bucket_name:
@@ -231,8 +382,6 @@ class S3ImageRepository(ImageRepository):
             ) from e
 
     def _parse_https_s3_url_and_validate_bucket(self, path_str: str) -> str:
-        from stable_delusion.repositories.s3_client import parse_https_s3_url
-
         try:
             bucket, key = parse_https_s3_url(path_str)
             if bucket != self.bucket_name:
@@ -247,8 +396,8 @@ class S3ImageRepository(ImageRepository):
                 f"Invalid HTTPS S3 URL format: {path_str}", field="file_path", value=path_str
             ) from e
 
-    def _extract_s3_key(self, file_path: Path) -> str:
-        path_str = str(file_path)
+    def _extract_s3_key(self, file_path: Union[str, Path]) -> str:
+        path_str = os.fspath(file_path)
 
         # Handle S3 URLs (s3:// format)
         if path_str.startswith("s3://"):
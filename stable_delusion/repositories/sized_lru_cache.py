@@ -0,0 +1,56 @@
+"""
+Thread-safe LRU cache bounded by both entry count and total payload size.
+"""
+
+__author__ = "Lene Preuss <lene.preuss@gmail.com>"
+
+import threading
+from collections import OrderedDict
+from typing import Generic, Hashable, Optional, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class SizedLRUCache(Generic[K, V]):
+    """LRU mapping that evicts least recently used entries beyond maxsize or max_bytes.
+
+    Callers pass each value's size in bytes; values larger than max_bytes are not stored.
+    """
+
+    def __init__(self, maxsize: int, max_bytes: int) -> None:
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: "OrderedDict[K, Tuple[V, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: K) -> Optional[V]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: K, value: V, size: int) -> None:
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (value, size)
+            self.total_bytes += size
+            while len(self._entries) > self.maxsize or self.total_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, key: K) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: K) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry[1]
+
+    def __len__(self) -> int:
+        return len(self._entries)
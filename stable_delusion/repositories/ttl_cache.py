@@ -0,0 +1,61 @@
+"""
+Small thread-safe TTL cache used by repositories to avoid repeated remote lookups.
+"""
+
+__author__ = "Lene Preuss <lene.preuss@gmail.com>"
+
+import threading
+import time
+from typing import Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """Size-bounded mapping whose entries expire after a fixed time-to-live.
+
+    A non-positive TTL disables the cache: nothing is stored and every lookup misses.
+    When full, the oldest entry is evicted first.
+    """
+
+    def __init__(self, ttl_seconds: float, maxsize: int = 10_000) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self._entries: Dict[K, Tuple[float, V]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def get(self, key: K) -> Optional[V]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key: K, value: V) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            if len(self._entries) >= self.maxsize:
+                del self._entries[next(iter(self._entries))]
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+
+    def invalidate(self, key: K) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
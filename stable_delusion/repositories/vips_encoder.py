@@ -0,0 +1,61 @@
+"""
+Optional libvips-backed image encoding for large images.
+Falls back to Pillow when pyvips (and the libvips shared library) is not installed.
+"""
+
+__author__ = "Lene Preuss <lene.preuss@gmail.com>"
+
+import logging
+from pathlib import Path
+from typing import BinaryIO
+
+from PIL import Image
+
+try:
+    import pyvips  # type: ignore[import-untyped]
+
+    PYVIPS_AVAILABLE = True
+except (ImportError, OSError) as e:
+    # pyvips raises OSError when the libvips shared library itself is missing
+    logging.debug("pyvips not available, using Pillow for all image encoding: %s", e)
+    pyvips = None
+    PYVIPS_AVAILABLE = False
+
+# Below this size Pillow is fast enough that copying pixels into libvips does not pay off
+VIPS_MIN_PIXELS = 2_000_000
+
+# PIL format -> libvips save suffix; libvips defaults match Pillow's (PNG level 6, JPEG Q 75)
+_VIPS_SAVE_SUFFIXES = {"PNG": ".png", "JPEG": ".jpg"}
+_VIPS_MODES = {
+    "PNG": {"L": 1, "LA": 2, "RGB": 3, "RGBA": 4},
+    "JPEG": {"L": 1, "RGB": 3},
+}
+
+
+def can_encode_with_vips(image: Image.Image, file_format: str) -> bool:
+    if not PYVIPS_AVAILABLE or image.mode not in _VIPS_MODES.get(file_format, {}):
+        return False
+    return image.width * image.height > VIPS_MIN_PIXELS
+
+
+def encode_with_vips(image: Image.Image, file_format: str) -> bytes:
+    bands = _VIPS_MODES[file_format][image.mode]
+    vips_image = pyvips.Image.new_from_memory(
+        image.tobytes(), image.width, image.height, bands, "uchar"
+    )
+    return vips_image.write_to_buffer(_VIPS_SAVE_SUFFIXES[file_format])
+
+
+def encode_image(image: Image.Image, file_format: str, output: BinaryIO) -> None:
+    if can_encode_with_vips(image, file_format):
+        output.write(encode_with_vips(image, file_format))
+    else:
+        image.save(output, format=file_format)
+
+
+def save_image_file(image: Image.Image, file_path: Path) -> None:
+    file_format = Image.registered_extensions().get(file_path.suffix.lower(), "")
+    if can_encode_with_vips(image, file_format):
+        file_path.write_bytes(encode_with_vips(image, file_format))
+    else:
+        image.save(str(file_path))
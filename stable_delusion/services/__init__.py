@@ -1,16 +1,29 @@
 """
 Services package for NanoAPIClient.
 Contains service interfaces and implementations for external integrations.
+
+Concrete services are imported on first attribute access (PEP 562), so importing
+one service module does not pull in the SDKs of all the others.
 """
 
 __author__ = "Lene Preuss <lene.preuss@gmail.com>"
 
-from stable_delusion.services.gemini_service import GeminiImageGenerationService
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
 from stable_delusion.services.interfaces import (
     ImageGenerationService,
     ImageUpscalingService,
 )
-from stable_delusion.services.upscaling_service import VertexAIUpscalingService
+
+if TYPE_CHECKING:
+    from stable_delusion.services.gemini_service import GeminiImageGenerationService
+    from stable_delusion.services.upscaling_service import VertexAIUpscalingService
+
+_LAZY_IMPORTS = {
+    "GeminiImageGenerationService": "stable_delusion.services.gemini_service",
+    "VertexAIUpscalingService": "stable_delusion.services.upscaling_service",
+}
 
 __all__ = [
     "ImageGenerationService",
@@ -18,3 +31,16 @@ __all__ = [
     "GeminiImageGenerationService",
     "VertexAIUpscalingService",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -6,18 +6,39 @@ Wraps the Seedream client functionality in a service interface.
 __author__ = "Lene Preuss <lene.preuss@gmail.com>"
 
 import logging
+import mimetypes
+import threading
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, cast
 
-from stable_delusion.config import ConfigManager
+from stable_delusion.config import Config, ConfigManager
 from stable_delusion.models.requests import GenerateImageRequest
 from stable_delusion.models.responses import GenerateImageResponse
 from stable_delusion.models.client_config import GCPConfig, ImageGenerationConfig
 from stable_delusion.models.metadata import GenerationMetadata
 from stable_delusion.repositories.interfaces import ImageRepository, MetadataRepository
+from stable_delusion.repositories.s3_client import (
+    TRANSFER_CONFIG,
+    build_https_s3_url,
+    build_s3_hash_cache,
+    generate_s3_key,
+)
+from stable_delusion.repositories.s3_file_repository import S3FileRepository
+from stable_delusion.repositories.s3_image_repository import S3ImageRepository
 from stable_delusion.services.interfaces import ImageGenerationService
 from stable_delusion.seedream import SeedreamClient
 from stable_delusion.exceptions import ConfigurationError, FileOperationError
+from stable_delusion.utils import (
+    calculate_file_sha256,
+    deduplicate_filename,
+    generate_timestamped_filename,
+    get_current_timestamp,
+    optimize_image_size,
+)
+
+# Upper bound for parallel input uploads in a single upload_images_to_s3() call
+MAX_UPLOAD_WORKERS = 16
 
 
 class SeedreamImageGenerationService(ImageGenerationService):
@@ -32,7 +53,16 @@ class SeedreamImageGenerationService(ImageGenerationService):
         self.client = seedream_client
         self.image_repository = image_repository
         self.metadata_repository = metadata_repository
+        # The repository never changes after construction, so its type is checked only once
+        self._is_s3_repo = isinstance(image_repository, S3ImageRepository)
         self._s3_hash_cache: Optional[dict] = None  # Cache for SHA-256 -> S3 key mappings
+        # Parallel uploads must not list the bucket once per thread to build the cache
+        self._s3_hash_cache_lock = threading.Lock()
+        # Created on first upload and shared by all uploads, so each image does not pay for
+        # config loading and a fresh boto3 client with its own connection pool
+        self._config: Optional[Config] = None
+        self._file_repo: Optional[S3FileRepository] = None
+        self._file_repo_lock = threading.Lock()
 
     @classmethod
     def create(
@@ -64,9 +94,8 @@ class SeedreamImageGenerationService(ImageGenerationService):
         logging.debug("Image count: %d, Output dir: %s", len(request.images), effective_output_dir)
 
     def _create_generation_response(
-        self, request: GenerateImageRequest, generated_file: Optional[Path] = None
+        self, request: GenerateImageRequest, config: Config, generated_file: Optional[Path] = None
     ) -> GenerateImageResponse:
-        config = ConfigManager.get_config()
         return GenerateImageResponse(
             image_config=ImageGenerationConfig(
                 generated_file=generated_file,
@@ -153,13 +182,13 @@ class SeedreamImageGenerationService(ImageGenerationService):
         return generated_file
 
     def _handle_generation_error(
-        self, error: Exception, request: GenerateImageRequest
+        self, error: Exception, request: GenerateImageRequest, config: Config
     ) -> GenerateImageResponse:
         if isinstance(error, ConfigurationError):
             logging.error("Configuration error during image generation: %s", error)
         else:
             logging.error("Unexpected error during image generation: %s", error)
-        return self._create_generation_response(request)
+        return self._create_generation_response(request, config)
 
     def generate_image(self, request: GenerateImageRequest) -> GenerateImageResponse:
         config = ConfigManager.get_config()
@@ -175,9 +204,9 @@ class SeedreamImageGenerationService(ImageGenerationService):
             )
             final_path = self._upload_generated_image_to_s3(generated_file, config)
             self._save_generation_metadata(metadata, final_path)
-            return self._create_generation_response(request, final_path)
+            return self._create_generation_response(request, config, final_path)
         except (ConfigurationError, Exception) as e:  # pylint: disable=broad-exception-caught
-            return self._handle_generation_error(e, request)
+            return self._handle_generation_error(e, request, config)
 
     def _upload_generated_image_to_s3(
         self, generated_file: Optional[Path], config
@@ -187,18 +216,16 @@ class SeedreamImageGenerationService(ImageGenerationService):
             return None
 
         if config.storage_type == "s3" and self.image_repository:
-            from PIL import Image
-            from stable_delusion.repositories.s3_image_repository import S3ImageRepository
-
             # Only upload if we have an S3 repository
-            if isinstance(self.image_repository, S3ImageRepository):
+            if self._is_s3_repo:
                 logging.info("Uploading generated image to S3: %s", generated_file)
                 try:
-                    with Image.open(generated_file) as img:
-                        # Upload to S3 and get the S3 path
-                        s3_path = self.image_repository.save_image(img, generated_file)
-                        logging.info("Generated image uploaded to S3: %s", s3_path)
-                        return s3_path
+                    # The client saved the image already encoded; upload the file unchanged
+                    s3_path = cast(S3ImageRepository, self.image_repository).save_image_file(
+                        generated_file
+                    )
+                    logging.info("Generated image uploaded to S3: %s", s3_path)
+                    return s3_path
                 except (OSError, IOError) as e:
                     logging.error("Failed to upload generated image to S3: %s", e)
                     # Return local path as fallback
@@ -213,9 +240,7 @@ class SeedreamImageGenerationService(ImageGenerationService):
                 "Image repository not configured for S3 uploads", config_key="image_repository"
             )
 
-        from stable_delusion.repositories.s3_image_repository import S3ImageRepository
-
-        if not isinstance(self.image_repository, S3ImageRepository):
+        if not self._is_s3_repo:
             raise ConfigurationError(
                 "S3 storage required for Seedream image uploads. Use --storage-type s3",
                 config_key="storage_type",
@@ -224,29 +249,16 @@ class SeedreamImageGenerationService(ImageGenerationService):
     def _find_file_by_hash_in_s3(self, file_repo, file_hash: str) -> Optional[str]:
         """Find S3 file with matching hash using cached hash map."""
         # Build cache if not already built
-        if self._s3_hash_cache is None:
-            from stable_delusion.repositories.s3_client import build_s3_hash_cache
-
-            self._s3_hash_cache = build_s3_hash_cache(
-                file_repo.s3_client, file_repo.bucket_name, file_repo.key_prefix
-            )
+        with self._s3_hash_cache_lock:
+            if self._s3_hash_cache is None:
+                self._s3_hash_cache = build_s3_hash_cache(
+                    file_repo.s3_client, file_repo.bucket_name, file_repo.key_prefix
+                )
 
         # O(1) lookup in cache
         return self._s3_hash_cache.get(file_hash)
 
-    def _convert_image_to_bytes(self, image_path: Path) -> tuple[bytes, str]:
-        from PIL import Image
-        import io
-
-        with Image.open(image_path) as img:
-            img_bytes = io.BytesIO()
-            img_format = img.format or "PNG"
-            img.save(img_bytes, format=img_format)
-            return img_bytes.getvalue(), img_format
-
     def _check_for_duplicate_in_s3(self, file_repo, file_hash: str, config) -> Optional[str]:
-        from stable_delusion.repositories.s3_client import build_https_s3_url
-
         existing_key = self._find_file_by_hash_in_s3(file_repo, file_hash)
         if existing_key:
             https_url = build_https_s3_url(file_repo.bucket_name, existing_key, config.s3_region)
@@ -257,80 +269,120 @@ class SeedreamImageGenerationService(ImageGenerationService):
             return https_url
         return None
 
-    def _upload_image_bytes_to_s3(
+    def _upload_image_file_to_s3(
         # pylint: disable=too-many-arguments,too-many-positional-arguments
         self,
         file_repo,
         image_path: Path,
-        img_bytes: bytes,
         file_hash: str,
-        img_format: str,
         config,
+        s3_filename: str,
     ) -> str:
-        from stable_delusion.utils import generate_timestamped_filename
-        from stable_delusion.repositories.s3_client import generate_s3_key, build_https_s3_url
-
-        s3_filename = generate_timestamped_filename(image_path.stem, image_path.suffix.lstrip("."))
-        s3_key = generate_s3_key(str(Path(s3_filename)), file_repo.key_prefix)
-
-        file_repo.s3_client.put_object(
-            Bucket=file_repo.bucket_name,
-            Key=s3_key,
-            Body=img_bytes,
-            ContentType=f"image/{img_format.lower()}",
-            Metadata={
-                "original_filename": image_path.name,
-                "uploaded_by": "stable-delusion",
-                "sha256": file_hash,
-            },
-        )
+        s3_key = generate_s3_key(s3_filename, file_repo.key_prefix)
+        content_type = mimetypes.guess_type(image_path.name)[0] or "application/octet-stream"
+
+        # The file is uploaded as it is on disk; decoding and re-encoding it would only cost CPU
+        with open(image_path, "rb") as image_file:
+            # Managed transfer: a single PUT for small images, concurrent parts for large ones
+            file_repo.s3_client.upload_fileobj(
+                Fileobj=image_file,
+                Bucket=file_repo.bucket_name,
+                Key=s3_key,
+                ExtraArgs={
+                    "ContentType": content_type,
+                    "Metadata": {
+                        "original_filename": image_path.name,
+                        "uploaded_by": "stable-delusion",
+                        "sha256": file_hash,
+                    },
+                },
+                Config=TRANSFER_CONFIG,
+            )
 
         https_url = build_https_s3_url(file_repo.bucket_name, s3_key, config.s3_region)
         logging.info("Uploaded to S3: %s", https_url)
         return https_url
 
-    def _upload_single_image_to_s3(self, image_path: Path) -> str:
-        from stable_delusion.utils import calculate_file_sha256, optimize_image_size
-        from stable_delusion.repositories.s3_file_repository import S3FileRepository
+    def _get_file_repo(self) -> S3FileRepository:
+        with self._file_repo_lock:
+            if self._file_repo is None:
+                self._config = ConfigManager.get_config()
+                self._file_repo = S3FileRepository(self._config)
+            return self._file_repo
+
+    @staticmethod
+    def _timestamped_s3_filename(image_path: Path, timestamp: Optional[str]) -> str:
+        return generate_timestamped_filename(
+            image_path.stem, image_path.suffix.lstrip("."), timestamp=timestamp
+        )
 
-        config = ConfigManager.get_config()
-        file_repo = S3FileRepository(config)
+    def _upload_single_image_to_s3(
+        self, image_path: Path, s3_filename: Optional[str] = None, timestamp: Optional[str] = None
+    ) -> str:
+        file_repo = self._get_file_repo()
+        config = self._config
 
         optimized_path = optimize_image_size(image_path, max_size_mb=7.0)
+        try:
+            file_hash = calculate_file_sha256(optimized_path)
 
-        img_bytes, img_format = self._convert_image_to_bytes(optimized_path)
-        file_hash = calculate_file_sha256(img_bytes)
+            duplicate_url = self._check_for_duplicate_in_s3(file_repo, file_hash, config)
+            if duplicate_url:
+                return duplicate_url
 
-        duplicate_url = self._check_for_duplicate_in_s3(file_repo, file_hash, config)
-        if duplicate_url:
+            if optimized_path != image_path:
+                # Re-encoded copies are named after their (unique) temporary file
+                s3_filename = self._timestamped_s3_filename(optimized_path, timestamp)
+            elif s3_filename is None:
+                s3_filename = self._timestamped_s3_filename(image_path, timestamp)
+            return self._upload_image_file_to_s3(
+                file_repo, optimized_path, file_hash, config, s3_filename
+            )
+        finally:
             if optimized_path != image_path:
                 optimized_path.unlink(missing_ok=True)
-            return duplicate_url
-
-        result = self._upload_image_bytes_to_s3(
-            file_repo, optimized_path, img_bytes, file_hash, img_format, config
-        )
 
-        if optimized_path != image_path:
-            optimized_path.unlink(missing_ok=True)
-
-        return result
+    def _upload_image_or_raise(
+        self, image_path: Path, s3_filename: Optional[str] = None, timestamp: Optional[str] = None
+    ) -> str:
+        try:
+            return self._upload_single_image_to_s3(image_path, s3_filename, timestamp)
+        except Exception as e:
+            logging.error("❌ Failed to upload %s to S3: %s", image_path, str(e))
+            raise ConfigurationError(
+                f"Failed to upload image {image_path} to S3: {str(e)}", config_key="s3_upload"
+            ) from e
 
     def upload_images_to_s3(self, image_paths: List[Path]) -> List[str]:
         self._validate_s3_repository()
-        uploaded_urls = []
-
-        for image_path in image_paths:
-            try:
-                s3_url = self._upload_single_image_to_s3(image_path)
-                uploaded_urls.append(s3_url)
-            except Exception as e:
-                logging.error("❌ Failed to upload %s to S3: %s", image_path, str(e))
-                raise ConfigurationError(
-                    f"Failed to upload image {image_path} to S3: {str(e)}", config_key="s3_upload"
-                ) from e
-
-        return uploaded_urls
+        # The clock is read once per batch; all its keys carry the same timestamp
+        timestamp = get_current_timestamp("filename")
+        # Same-named inputs (a/photo.png, b/photo.png) would otherwise get the same S3 key
+        used_names: Dict[str, int] = {}
+        s3_filenames = [
+            deduplicate_filename(self._timestamped_s3_filename(path, timestamp), used_names)
+            for path in image_paths
+        ]
+        if len(image_paths) <= 1:
+            return [
+                self._upload_image_or_raise(path, s3_filename, timestamp)
+                for path, s3_filename in zip(image_paths, s3_filenames)
+            ]
+
+        with ThreadPoolExecutor(max_workers=min(MAX_UPLOAD_WORKERS, len(image_paths))) as executor:
+            futures = [
+                executor.submit(self._upload_image_or_raise, path, s3_filename, timestamp)
+                for path, s3_filename in zip(image_paths, s3_filenames)
+            ]
+            done, pending = wait(futures, return_when=FIRST_EXCEPTION)
+            failed = next((future for future in done if future.exception()), None)
+            if failed:
+                # Uploads that have not started yet are pointless once the request is failing
+                for future in pending:
+                    future.cancel()
+                raise failed.exception()  # type: ignore[misc]
+            # Results come back in input order, which the Seedream API call relies on
+            return [future.result() for future in futures]
 
     def upload_files(self, image_paths: List[Path]) -> List[str]:
         return self.upload_images_to_s3(image_paths)
@@ -7,25 +7,194 @@ Supports both CLI usage and programmatic integration.
 __author__ = "Lene Preuss <lene.preuss@gmail.com>"
 
 import argparse
-import base64
+import copy
 import io
+import logging
+import mmap
+import threading
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Dict, Any
+from typing import Any, BinaryIO, Dict, Optional, Tuple, Type
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import HTTPError as TransportError
+from urllib3.util.retry import Retry
 from google.auth import default
+from google.auth.credentials import Credentials
 from google.auth.transport.requests import Request
 from PIL import Image
 
 from stable_delusion.config import ConfigManager
 from stable_delusion.exceptions import UpscalingError, APIError, AuthenticationError
 
+try:
+    # Drop-in replacement for the base64 module with SIMD-accelerated codecs
+    import pybase64 as base64  # type: ignore[import-not-found]
+
+    PYBASE64_AVAILABLE = True
+except ImportError:
+    import base64  # type: ignore[no-redef]
+
+    PYBASE64_AVAILABLE = False
+    logging.debug("pybase64 not available, using the standard library base64 codec")
+
+try:
+    # Lets the multi-megabyte image be pulled out of the response without parsing it whole
+    import ijson  # type: ignore[import-untyped]
+
+    IJSON_AVAILABLE = True
+except ImportError:
+    ijson = None
+    IJSON_AVAILABLE = False
+
+# Errors raised while reading a (possibly streamed) upscale response body
+_RESPONSE_READ_ERRORS: Tuple[Type[Exception], ...] = (KeyError, ValueError, TransportError) + (
+    (ijson.JSONError,) if IJSON_AVAILABLE else ()
+)
+
+# Input images are base64-encoded in blocks of this size; a multiple of 3 keeps padding
+# out of the middle of the encoded stream
+B64_CHUNK_SIZE = 48 * 1024
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Cached access tokens are refreshed once they are this close to expiring
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+# A background timer renews the token earlier still, so requests don't wait for a refresh
+BACKGROUND_REFRESH_LEAD = 2 * TOKEN_REFRESH_MARGIN
+
+
+@dataclass
+class _TokenState:
+    """Credentials shared by all upscale requests; guarded by _credentials_lock."""
+
+    # Looked up on first use; a background refresh swaps in a renewed copy
+    credentials: Optional[Credentials] = None
+    # Pending background refresh timer, if any
+    refresh_timer: Optional[threading.Timer] = None
+    # time.monotonic() of the last request for the token; an unused token is not renewed
+    last_use: float = float("-inf")
+
+
+_credentials_lock = threading.Lock()
+_token_state = _TokenState()
+
+
+def _create_http_session() -> requests.Session:
+    # POSTs are retried on connect errors, throttling and server errors only: after a read
+    # timeout the request may already have been processed (and billed), so it is not resent.
+    # The final response is returned as-is so its status still reaches raise_for_status()
+    retries = Retry(
+        total=3,
+        read=0,
+        backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=frozenset({"POST"}),
+        raise_on_status=False,
+    )
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=32, max_retries=retries))
+    return session
+
+
+# Shared so consecutive upscale requests reuse kept-alive TLS connections
+_SESSION = _create_http_session()
+
+
+@lru_cache(maxsize=1)
+def _auth_request() -> Request:
+    return Request()
+
+
+def clear_credentials_cache() -> None:
+    with _credentials_lock:
+        _cancel_background_refresh()
+        _token_state.credentials = None
+        _token_state.last_use = float("-inf")
+
+
+def _utcnow() -> datetime:
+    # google-auth keeps expiry as a naive UTC datetime
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _token_needs_refresh(credentials: Credentials) -> bool:
+    if not credentials.valid:
+        return True
+    return credentials.expiry is not None and credentials.expiry - _utcnow() < TOKEN_REFRESH_MARGIN
+
+
+def _cancel_background_refresh() -> None:
+    timer = _token_state.refresh_timer
+    _token_state.refresh_timer = None
+    if timer is not None:
+        timer.cancel()
+
+
+def _schedule_background_refresh(credentials: Credentials) -> None:
+    _cancel_background_refresh()
+    if not isinstance(credentials.expiry, datetime):
+        return
+    delay = (credentials.expiry - _utcnow() - BACKGROUND_REFRESH_LEAD).total_seconds()
+    if delay <= 0:
+        # Token lifetime too short to renew ahead of time; requests refresh it themselves
+        return
+    timer = threading.Timer(delay, _refresh_in_background, args=(time.monotonic(),))
+    timer.daemon = True
+    _token_state.refresh_timer = timer
+    timer.start()
+
+
+def _is_current_refresh_timer() -> bool:
+    # Called with _credentials_lock held; a Timer runs its function in its own thread, and
+    # clear_credentials_cache() or a request-side refresh replaces or removes the timer
+    return _token_state.refresh_timer is threading.current_thread()
+
+
+def _refresh_in_background(scheduled_at: float) -> None:
+    with _credentials_lock:
+        if not _is_current_refresh_timer() or _token_state.credentials is None:
+            return
+        if _token_state.last_use < scheduled_at:
+            # Idle since the last renewal: stop here, the next request refreshes on demand
+            _token_state.refresh_timer = None
+            return
+        # Refresh a copy outside the lock so requests keep using the current token meanwhile
+        refreshed = copy.copy(_token_state.credentials)
+
+    try:
+        refreshed.refresh(_auth_request())
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logging.warning("Background token refresh failed, next request will retry: %s", e)
+        with _credentials_lock:
+            if _is_current_refresh_timer():
+                _token_state.refresh_timer = None
+        return
+
+    with _credentials_lock:
+        if not _is_current_refresh_timer():
+            return
+        _token_state.credentials = refreshed
+        _schedule_background_refresh(refreshed)
+
 
 def _get_authenticated_headers() -> Dict[str, str]:
-    credentials, _ = default()
-    auth_req = Request()
-    credentials.refresh(auth_req)
-    return {"Authorization": f"Bearer {credentials.token}", "Content-Type": "application/json"}
+    # One thread looks up or refreshes the credentials while the others wait for the token
+    with _credentials_lock:
+        if _token_state.credentials is None:
+            _token_state.credentials, _ = default()
+        credentials = _token_state.credentials
+        _token_state.last_use = time.monotonic()
+        if _token_needs_refresh(credentials):
+            credentials.refresh(_auth_request())
+            _schedule_background_refresh(credentials)
+        token = credentials.token
+    return {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
 
 
 def _build_upscale_url(project_id: str, location: str) -> str:
@@ -47,10 +216,14 @@ def _create_upscale_payload(base64_image: str, upscale_factor: str) -> Dict[str,
     }
 
 
-def _decode_upscaled_image(response_data: Dict[str, Any]) -> Image.Image:
-    upscaled_base64 = response_data["predictions"][0]["bytesBase64Encoded"]
-    image_data = base64.b64decode(upscaled_base64)
-    return Image.open(io.BytesIO(image_data))
+def _read_upscaled_base64(response: requests.Response) -> str:
+    if not IJSON_AVAILABLE:
+        return response.json()["predictions"][0]["bytesBase64Encoded"]
+    response.raw.decode_content = True
+    with closing(response):
+        for upscaled_base64 in ijson.items(response.raw, "predictions.item.bytesBase64Encoded"):
+            return upscaled_base64
+    raise KeyError("predictions")
 
 
 def _prepare_authentication() -> Dict[str, str]:
@@ -60,9 +233,28 @@ def _prepare_authentication() -> Dict[str, str]:
         raise AuthenticationError(f"Failed to get authentication credentials: {e}") from e
 
 
+def _encode_file_base64(image_path: Path) -> str:
+    with image_path.open("rb") as image_file:
+        try:
+            # The encoder reads straight from the page cache; no copy of the raw file is made
+            with mmap.mmap(image_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return base64.b64encode(mapped).decode("ascii")
+        except (OSError, ValueError):
+            # Empty files and streams without a file descriptor cannot be mapped
+            return _encode_stream_base64(image_file)
+
+
+def _encode_stream_base64(image_file: BinaryIO) -> str:
+    # Only one raw block is held at a time instead of the whole file next to its encoding
+    encoded = bytearray()
+    for block in iter(partial(image_file.read, B64_CHUNK_SIZE), b""):
+        encoded += base64.b64encode(block)
+    return encoded.decode("ascii")
+
+
 def _prepare_image_data(image_path: Path) -> str:
     try:
-        return base64.b64encode(image_path.read_bytes()).decode("utf-8")
+        return _encode_file_base64(image_path)
     except (IOError, OSError) as e:
         raise UpscalingError(f"Failed to read image file: {e}", image_path=str(image_path)) from e
 
@@ -76,11 +268,12 @@ def _execute_upscale_request(  # pylint: disable=too-many-arguments,too-many-pos
     image_path: Path,
 ) -> requests.Response:
     try:
-        response = requests.post(
+        response = _SESSION.post(
             _build_upscale_url(project_id, location),
             json=_create_upscale_payload(base64_image, upscale_factor),
             headers=headers,
             timeout=60,
+            stream=IJSON_AVAILABLE,
         )
         response.raise_for_status()
         return response
@@ -102,10 +295,10 @@ def _execute_upscale_request(  # pylint: disable=too-many-arguments,too-many-pos
 
 def _process_upscale_response(
     response: requests.Response, upscale_factor: str, image_path: Path
-) -> Image.Image:
+) -> bytes:
     try:
-        return _decode_upscaled_image(response.json())
-    except (KeyError, ValueError) as e:
+        return base64.b64decode(_read_upscaled_base64(response))
+    except _RESPONSE_READ_ERRORS as e:
         raise UpscalingError(
             f"Failed to decode upscaled image: {e}",
             scale_factor=upscale_factor,
@@ -113,12 +306,12 @@ def _process_upscale_response(
         ) from e
 
 
-def upscale_image(
+def upscale_image_data(
     image_path: Path,
     project_id: str,
     location: str = "us-central1",
     upscale_factor: str = "x2",
-) -> Image.Image:
+) -> bytes:
     headers = _prepare_authentication()
     base64_image = _prepare_image_data(image_path)
     response = _execute_upscale_request(
@@ -127,6 +320,24 @@ def upscale_image(
     return _process_upscale_response(response, upscale_factor, image_path)
 
 
+def upscale_image(
+    image_path: Path,
+    project_id: str,
+    location: str = "us-central1",
+    upscale_factor: str = "x2",
+) -> Image.Image:
+    image_data = upscale_image_data(image_path, project_id, location, upscale_factor)
+    return Image.open(io.BytesIO(image_data))
+
+
+def save_upscaled_data(image_data: bytes, output_path: Path) -> None:
+    # The API returns PNG: write it unchanged instead of decoding and re-compressing it
+    if output_path.suffix.lower() == ".png" and image_data.startswith(PNG_SIGNATURE):
+        output_path.write_bytes(image_data)
+    else:
+        Image.open(io.BytesIO(image_data)).save(str(output_path))
+
+
 # --- Run the upscaling process ---
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Upscale an image using Google Vertex AI.")
@@ -142,12 +353,12 @@ if __name__ == "__main__":
 
     config = ConfigManager.get_config()
     input_path = args.image_path
-    upscaled_img = upscale_image(
+    upscaled_data = upscale_image_data(
         input_path,
         config.project_id,
         config.location,
         upscale_factor=f"x{args.scale}",
     )
     output_path = input_path.parent / f"upscaled_{input_path.name}"
-    upscaled_img.save(str(output_path))
+    save_upscaled_data(upscaled_data, output_path)
     print(f"Upscaled image saved to {output_path}")
@@ -7,13 +7,17 @@ __author__ = "Lene Preuss <lene.preuss@gmail.com>"
 
 import hashlib
 import logging
+import os
 import tempfile
+import threading
+import time
+import unicodedata
 from datetime import datetime
+from functools import lru_cache
 from io import BytesIO
 from pathlib import Path
-from typing import Optional, Tuple, Any, Union
+from typing import Callable, Dict, Optional, Tuple, Any, TypeVar, Union
 from flask import jsonify, Response
-from werkzeug.utils import secure_filename
 from PIL import Image
 
 import coloredlogs  # type: ignore[import-untyped]
@@ -21,26 +25,39 @@ import coloredlogs  # type: ignore[import-untyped]
 from stable_delusion.exceptions import FileOperationError
 
 
+T = TypeVar("T")
+
 # Date/time format constants
 STANDARD_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
 FILENAME_DATETIME_FORMAT = "%Y-%m-%d-%H:%M:%S"
 COMPACT_DATETIME_FORMAT = "%y%m%d-%H:%M:%S"
 
+_DATETIME_FORMATS = {
+    "standard": STANDARD_DATETIME_FORMAT,
+    "filename": FILENAME_DATETIME_FORMAT,
+    "compact": COMPACT_DATETIME_FORMAT,
+}
+
+# Deletes every ASCII character except letters, digits and "._-" (str.translate runs in C)
+_UNSAFE_FILENAME_CHARS = str.maketrans(
+    "", "", "".join(c for c in map(chr, range(128)) if not (c.isalnum() or c in "._-"))
+)
+# Reserved device names on Windows that werkzeug prefixes with "_"
+_WINDOWS_DEVICE_NAMES = frozenset(
+    ["CON", "PRN", "AUX", "NUL"] + [f"{port}{n}" for port in ("COM", "LPT") for n in range(1, 10)]
+)
+
 
 def format_timestamp(dt: Optional[datetime], format_type: str = "standard") -> str:
     if not dt:
         return "Unknown"
 
-    formats = {
-        "standard": STANDARD_DATETIME_FORMAT,
-        "filename": FILENAME_DATETIME_FORMAT,
-        "compact": COMPACT_DATETIME_FORMAT,
-    }
-    return dt.strftime(formats.get(format_type, STANDARD_DATETIME_FORMAT))
+    return dt.strftime(_DATETIME_FORMATS.get(format_type, STANDARD_DATETIME_FORMAT))
 
 
 def get_current_timestamp(format_type: str = "filename") -> str:
-    return format_timestamp(datetime.now(), format_type)
+    # time.strftime formats the local time directly, without building a datetime first
+    return time.strftime(_DATETIME_FORMATS.get(format_type, STANDARD_DATETIME_FORMAT))
 
 
 def create_error_response(message: str, status_code: int = 400) -> Tuple[Response, int]:
@@ -56,6 +73,9 @@ def safe_format_timestamps(
 
 
 def log_upload_info(image_path: Any, uploaded_file: Any) -> None:
+    # Skip the two strftime calls when INFO records would be dropped anyway
+    if not logging.getLogger().isEnabledFor(logging.INFO):
+        return
 
     create_time_str, expiration_time_str = safe_format_timestamps(
         uploaded_file.create_time, uploaded_file.expiration_time
@@ -74,10 +94,42 @@ def log_upload_info(image_path: Any, uploaded_file: Any) -> None:
     )
 
 
+@lru_cache(maxsize=1024)
+def secure_filename(filename: str) -> str:
+    # Same result as werkzeug.utils.secure_filename
+    if not filename.isascii():
+        filename = unicodedata.normalize("NFKD", filename)
+        filename = filename.encode("ascii", "ignore").decode("ascii")
+    for sep in (os.sep, os.path.altsep):
+        if sep:
+            filename = filename.replace(sep, " ")
+    filename = "_".join(filename.split())
+    filename = filename.translate(_UNSAFE_FILENAME_CHARS).strip("._")
+    if os.name == "nt" and filename.partition(".")[0].upper() in _WINDOWS_DEVICE_NAMES:
+        filename = f"_{filename}"
+    return filename
+
+
+def deduplicate_filename(filename: str, seen: Dict[str, int]) -> str:
+    # Appends _1, _2, ... before the extension to names already used in this batch
+    count = seen.get(filename, 0)
+    seen[filename] = count + 1
+    if not count:
+        return filename
+    stem, dot, suffix = filename.rpartition(".")
+    candidate = f"{stem}_{count}{dot}{suffix}" if stem else f"{filename}_{count}"
+    return deduplicate_filename(candidate, seen)
+
+
 def generate_timestamped_filename(
-    base_name: str, extension: str = "png", format_type: str = "filename", secure: bool = False
+    base_name: str,
+    extension: str = "png",
+    format_type: str = "filename",
+    secure: bool = False,
+    timestamp: Optional[str] = None,
 ) -> str:
-    timestamp = get_current_timestamp(format_type)
+    if timestamp is None:
+        timestamp = get_current_timestamp(format_type)
     filename = f"{base_name}_{timestamp}.{extension}"
 
     if secure:
@@ -93,10 +145,45 @@ def validate_image_file(path: Path) -> None:
         )
 
 
+# Directories already created by ensure_directory_cached(), oldest first for FIFO eviction
+MAX_ENSURED_DIRECTORIES = 4096
+_ensured_directories: Dict[str, None] = {}
+_ensured_directories_lock = threading.Lock()
+
+
 def ensure_directory_exists(path: Path) -> None:
     path.mkdir(parents=True, exist_ok=True)
 
 
+def ensure_directory_cached(path: Path) -> None:
+    # Only safe where a later write recovers from the directory having been removed since,
+    # as write_into_directory() does
+    key = os.fspath(path)
+    if key in _ensured_directories:
+        return
+    path.mkdir(parents=True, exist_ok=True)
+    with _ensured_directories_lock:
+        if len(_ensured_directories) >= MAX_ENSURED_DIRECTORIES:
+            del _ensured_directories[next(iter(_ensured_directories))]
+        _ensured_directories[key] = None
+
+
+def forget_ensured_directory(path: Path) -> None:
+    with _ensured_directories_lock:
+        _ensured_directories.pop(os.fspath(path), None)
+
+
+def write_into_directory(directory: Path, write: Callable[[], T]) -> T:
+    ensure_directory_cached(directory)
+    try:
+        return write()
+    except FileNotFoundError:
+        # The directory was removed since it was cached as existing: recreate it and retry once
+        forget_ensured_directory(directory)
+        ensure_directory_cached(directory)
+        return write()
+
+
 # Logging utilities for consistent service and operation logging
 def log_service_creation(service_name: str, model: str = "", **kwargs) -> None:
 
@@ -111,6 +198,8 @@ def log_service_creation(service_name: str, model: str = "", **kwargs) -> None:
 
 
 def log_operation_start(operation: str, **details) -> None:
+    if not logging.getLogger().isEnabledFor(logging.INFO):
+        return
 
     logging.info("🚀 Starting %s", operation)
     for key, value in details.items():
@@ -119,6 +208,8 @@ def log_operation_start(operation: str, **details) -> None:
 
 
 def log_operation_success(operation: str, result_count: Optional[int] = None, **details) -> None:
+    if not logging.getLogger().isEnabledFor(logging.INFO):
+        return
 
     if result_count is not None:
         logging.info("✅ %s completed: %d items", operation, result_count)
@@ -160,7 +251,8 @@ def normalize_path_for_key(path: str) -> str:
 
 
 def is_s3_url(url: str) -> bool:
-    return url.startswith("s3://")
+    # Comparing a 5-character slice is cheaper than the startswith method call
+    return url[:5] == "s3://"
 
 
 def is_https_s3_url(url: str) -> bool:
@@ -168,7 +260,8 @@ def is_https_s3_url(url: str) -> bool:
 
 
 def is_any_s3_url(url: str) -> bool:
-    return is_s3_url(url) or is_https_s3_url(url)
+    # Same checks as is_s3_url/is_https_s3_url, inlined to save two calls per URL
+    return url[:5] == "s3://" or (url[:8] == "https://" and (".s3." in url or ".s3-" in url))
 
 
 def setup_logging(quiet: bool = False, debug: bool = False) -> None:
@@ -186,13 +279,14 @@ def setup_logging(quiet: bool = False, debug: bool = False) -> None:
         logging.warning("Both --quiet and --debug specified. Using --debug mode.")
 
 
-def calculate_file_sha256(file_content: Union[bytes, Path]) -> str:
+def calculate_file_sha256(file_content: Union[bytes, bytearray, memoryview, Path]) -> str:
     hash_sha256 = hashlib.sha256()
-    if isinstance(file_content, bytes):
+    if isinstance(file_content, (bytes, bytearray, memoryview)):
         hash_sha256.update(file_content)
     else:
         with open(file_content, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
+            # 1 MiB reads keep the per-chunk Python overhead negligible for large images
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
                 hash_sha256.update(chunk)
     return hash_sha256.hexdigest()
 
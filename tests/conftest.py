@@ -4,19 +4,41 @@ Pytest configuration and shared fixtures for the test suite.
 
 import json
 import os
-import sys
-import tempfile
+from datetime import datetime
+from io import BytesIO
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from types import SimpleNamespace
+from unittest.mock import DEFAULT, MagicMock, patch
 
 import pytest
+from botocore.exceptions import ClientError
 from PIL import Image
-
-# Import for type hints in fixtures
+from werkzeug.datastructures import FileStorage
+
+# Imported once here rather than inside every fixture invocation
+import stable_delusion
+from stable_delusion import generate, main, upscale, utils
+from stable_delusion.config import DEFAULT_SEEDREAM_MODEL, ConfigManager, config_manager
+from stable_delusion.main import app
+from stable_delusion.models.client_config import GCPConfig, ImageGenerationConfig
+from stable_delusion.models.requests import GenerateImageRequest
+from stable_delusion.models.responses import GenerateImageResponse
+from stable_delusion.repositories import s3_image_repository
+from stable_delusion.repositories.s3_client import S3ClientManager
 from stable_delusion.repositories.s3_image_repository import S3ImageRepository
+from stable_delusion.upscale import clear_credentials_cache
 
-# Add the stable_delusion package to the Python path for testing
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "stable_delusion"))
+# Minimal valid PNG file (1x1 pixel, white), shared by all fixtures that need image bytes
+PNG_1X1 = (
+    b"\x89PNG\r\n\x1a\n"  # PNG signature
+    b"\x00\x00\x00\rIHDR"  # IHDR chunk
+    b"\x00\x00\x00\x01"  # Width: 1
+    b"\x00\x00\x00\x01"  # Height: 1
+    b"\x08\x02\x00\x00\x00"  # Bit depth: 8, Color type: 2 (RGB), etc.
+    b"\x90wS\xde"  # IHDR CRC
+    b"\x00\x00\x00\x0cIDATx\x9cc\x00\x01\x00\x00\x05\x00\x01\r\n-\xdb"  # IDAT
+    b"\x00\x00\x00\x00IEND\xaeB`\x82"  # IEND chunk
+)
 
 
 # Environment variable fixtures
@@ -53,22 +75,33 @@ def s3_env():
 
 
 @pytest.fixture
-def mock_env(request):
+def mock_env(request, monkeypatch):
     # Get env vars from test parameter or use base_env as default
     env_vars = getattr(request, "param", {"GEMINI_API_KEY": "test-key", "STORAGE_TYPE": "local"})
-    with patch.dict(os.environ, env_vars, clear=True):
-        yield env_vars
+    # Start from an empty environment; monkeypatch undoes only the keys it touched
+    for key in list(os.environ):
+        monkeypatch.delenv(key)
+    for key, value in env_vars.items():
+        monkeypatch.setenv(key, value)
+    return env_vars
+
+
+@pytest.fixture(scope="session", autouse=True)
+def prevent_dotenv_loading():
+    # Patch load_dotenv to prevent .env file loading during tests; one patch serves the session
+    with patch.object(config_manager, "load_dotenv"):
+        yield
 
 
 @pytest.fixture(autouse=True)
 def reset_config_manager():
-    from stable_delusion.config import ConfigManager
-
-    # Patch load_dotenv to prevent .env file loading during tests
-    with patch("stable_delusion.config.config_manager.load_dotenv"):
-        ConfigManager.reset_config()
-        yield
-        ConfigManager.reset_config()
+    ConfigManager.reset_config()
+    S3ClientManager.clear_shared_clients()
+    clear_credentials_cache()
+    yield
+    ConfigManager.reset_config()
+    S3ClientManager.clear_shared_clients()
+    clear_credentials_cache()
 
 
 @pytest.fixture(scope="session")
@@ -83,94 +116,68 @@ def test_env_vars():
         yield
 
 
-@pytest.fixture
-def mock_gemini_response():
-    mock_response = MagicMock()
-    mock_candidate = MagicMock()
-    mock_part = MagicMock()
+@pytest.fixture(scope="session")
+def shared_gemini_response():
+    # Built once per session; tests that modify the response should call
+    # create_mock_gemini_response() for a private copy instead
+    return create_mock_gemini_response()
 
-    # Configure the mock response structure
-    mock_part.text = None
-    mock_part.inline_data = MagicMock()
-    mock_part.inline_data.data = b"fake_generated_image_data"
 
-    mock_candidate.content.parts = [mock_part]
+@pytest.fixture
+def mock_gemini_response(shared_gemini_response):
+    return shared_gemini_response
 
-    # Create a proper FinishReason-like object with name attribute
-    mock_finish_reason = MagicMock()
-    mock_finish_reason.name = "STOP"
-    mock_candidate.finish_reason = mock_finish_reason
 
-    mock_response.candidates = [mock_candidate]
-    mock_response.usage_metadata = MagicMock()
-    mock_response.usage_metadata.total_token_count = 100
-
-    return mock_response
+@pytest.fixture
+def patched_genai():
+    # Single patch of the Gemini client and Vertex AI init, shared by the fixtures below
+    with patch.object(generate.genai, "Client") as mock_client_class, patch.object(
+        generate.aiplatform, "init"
+    ) as mock_init:
+        mock_client = MagicMock()
+        mock_client_class.return_value = mock_client
+        yield {"client_class": mock_client_class, "client": mock_client, "init": mock_init}
 
 
 @pytest.fixture
-def mock_gemini_setup():
-    with patch("stable_delusion.generate.genai.Client") as mock_client_class:
-        with patch("stable_delusion.generate.aiplatform.init") as mock_init:
-            mock_client = MagicMock()
-            mock_client_class.return_value = mock_client
+def mock_gemini_setup(patched_genai, shared_gemini_response):
+    mock_client = patched_genai["client"]
 
-            # Standard file upload mock
-            mock_uploaded_file = MagicMock()
-            mock_uploaded_file.name = "test_file"
-            mock_uploaded_file.mime_type = "image/png"
-            mock_uploaded_file.size_bytes = 1024
-            mock_uploaded_file.uri = "test_uri"
-            from datetime import datetime
+    # Standard file upload mock
+    mock_uploaded_file = MagicMock()
+    mock_uploaded_file.name = "test_file"
+    mock_uploaded_file.mime_type = "image/png"
+    mock_uploaded_file.size_bytes = 1024
+    mock_uploaded_file.uri = "test_uri"
+    mock_uploaded_file.create_time = datetime.now()
+    mock_uploaded_file.expiration_time = datetime.now()
+    mock_client.files.upload.return_value = mock_uploaded_file
 
-            mock_uploaded_file.create_time = datetime.now()
-            mock_uploaded_file.expiration_time = datetime.now()
-            mock_client.files.upload.return_value = mock_uploaded_file
+    # Configure generate_content with default response
+    mock_client.models.generate_content.return_value = shared_gemini_response
 
-            # Configure generate_content with default response
-            mock_client.models.generate_content.return_value = create_mock_gemini_response()
-
-            yield {
-                "client_class": mock_client_class,
-                "client": mock_client,
-                "init": mock_init,
-                "uploaded_file": mock_uploaded_file,
-            }
+    return {**patched_genai, "uploaded_file": mock_uploaded_file}
 
 
 @pytest.fixture
-def mock_gemini_client():
-    with patch("stable_delusion.generate.genai.Client") as mock_client_class:
-        mock_client = MagicMock()
-        mock_client_class.return_value = mock_client
+def mock_gemini_client(patched_genai):
+    mock_client = patched_genai["client"]
 
-        # Configure the mock client
-        mock_client.models.generate_content.return_value = MagicMock()
-        mock_client.files.upload.return_value = MagicMock()
+    # Configure the mock client
+    mock_client.models.generate_content.return_value = MagicMock()
+    mock_client.files.upload.return_value = MagicMock()
 
-        yield mock_client
-
-
-@pytest.fixture
-def mock_aiplatform_init():
-    with patch("stable_delusion.generate.aiplatform.init") as mock_init:
-        yield mock_init
+    return mock_client
 
 
 @pytest.fixture
-def mock_upscale_function():
-    with patch("stable_delusion.generate.upscale_image") as mock_upscale:
-        mock_upscaled_image = MagicMock()
-        mock_upscaled_image.save.return_value = None
-        mock_upscale.return_value = mock_upscaled_image
-        yield mock_upscale
+def mock_aiplatform_init(patched_genai):
+    return patched_genai["init"]
 
 
 @pytest.fixture
 def mock_main_gemini_service():
-    with patch(
-        "stable_delusion.main.builders.create_image_generation_service"
-    ) as mock_service_create:
+    with patch.object(main.builders, "create_image_generation_service") as mock_service_create:
         mock_service = MagicMock()
         mock_service_create.return_value = mock_service
 
@@ -203,70 +210,38 @@ def mock_main_gemini_service():
 
 
 @pytest.fixture
-def mock_generate_gemini_client():
-    with patch("stable_delusion.generate.genai.Client") as mock_client_class:
-        with patch("stable_delusion.generate.aiplatform.init"):
-            mock_client = MagicMock()
-            mock_client_class.return_value = mock_client
-            mock_client.files.upload.return_value = MagicMock()
-            yield mock_client
-
+def mock_generate_gemini_client(patched_genai):
+    mock_client = patched_genai["client"]
+    mock_client.files.upload.return_value = MagicMock()
+    return mock_client
 
-@pytest.fixture
-def temp_image_file():
-    with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as temp_file:
-        # Create a minimal valid PNG file (1x1 pixel, white)
-        png_data = (
-            b"\x89PNG\r\n\x1a\n"  # PNG signature
-            b"\x00\x00\x00\rIHDR"  # IHDR chunk
-            b"\x00\x00\x00\x01"  # Width: 1
-            b"\x00\x00\x00\x01"  # Height: 1
-            b"\x08\x02\x00\x00\x00"  # Bit depth: 8, Color type: 2 (RGB), etc.
-            b"\x90wS\xde"  # IHDR CRC
-            b"\x00\x00\x00\x0cIDATx\x9cc\x00\x01\x00\x00\x05\x00\x01\r\n-\xdb"  # IDAT
-            b"\x00\x00\x00\x00IEND\xaeB`\x82"  # IEND chunk
-        )
-        temp_file.write(png_data)
-        temp_file.flush()
-        yield temp_file.name
 
-    # Cleanup
-    if os.path.exists(temp_file.name):
-        os.unlink(temp_file.name)
+@pytest.fixture(scope="session")
+def temp_image_file(tmp_path_factory):
+    # Written once per session; tests only read it, and pytest removes the directory
+    image_dir = tmp_path_factory.mktemp("temp_images")
+    image_path = image_dir / "image.png"
+    image_path.write_bytes(PNG_1X1)
+    return str(image_path)
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def temp_images(temp_image_file):
     files = [temp_image_file]  # Start with the first one
 
-    # Create additional files
-    for i in range(1, 3):  # Create 2 more files (total of 3)
-        with tempfile.NamedTemporaryFile(suffix=f"_test_{i}.png", delete=False) as temp_file:
-            png_data = (
-                b"\x89PNG\r\n\x1a\n"
-                b"\x00\x00\x00\rIHDR"
-                b"\x00\x00\x00\x01"
-                b"\x00\x00\x00\x01"
-                b"\x08\x02\x00\x00\x00"
-                b"\x90wS\xde"
-                b"\x00\x00\x00\x0cIDATx\x9cc\x00\x01\x00\x00\x05\x00\x01\r\n-\xdb"
-                b"\x00\x00\x00\x00IEND\xaeB`\x82"
-            )
-            temp_file.write(png_data)
-            temp_file.flush()
-            files.append(temp_file.name)
-
-    yield files
+    # Create additional files next to it (total of 3)
+    image_dir = Path(temp_image_file).parent
+    for i in range(1, 3):
+        image_path = image_dir / f"image_test_{i}.png"
+        image_path.write_bytes(PNG_1X1)
+        files.append(str(image_path))
 
-    # Cleanup (except the first one, which is cleaned by temp_image_file)
-    for file_path in files[1:]:
-        if os.path.exists(file_path):
-            os.unlink(file_path)
+    return files
 
 
 @pytest.fixture
 def mock_pil_image():
-    with patch("stable_delusion.generate.Image.open") as mock_open:
+    with patch.object(generate.Image, "open") as mock_open:
         mock_image = MagicMock()
         mock_open.return_value = mock_image
         yield mock_image
@@ -314,7 +289,7 @@ def mock_pil_image_context_manager():
 
 @pytest.fixture
 def mock_timestamp():
-    with patch("stable_delusion.utils.get_current_timestamp") as mock_ts:
+    with patch.object(utils, "get_current_timestamp") as mock_ts:
         mock_ts.return_value = "2024-01-01-12:00:00"
         yield mock_ts
 
@@ -322,34 +297,50 @@ def mock_timestamp():
 @pytest.fixture
 def custom_mock_timestamp():
     def _mock_timestamp(timestamp="2024-01-01-12:00:00"):
-        return patch("stable_delusion.utils.get_current_timestamp", return_value=timestamp)
+        return patch.object(utils, "get_current_timestamp", return_value=timestamp)
 
     return _mock_timestamp
 
 
 @pytest.fixture
 def mock_datetime():
-    with patch("stable_delusion.generate.datetime") as mock_dt:
-        mock_dt.now.return_value.strftime.return_value = "2024-01-01-12:00:00"
-        yield mock_dt
+    # stable_delusion.generate no longer imports datetime; timestamps come from
+    # get_current_timestamp, frozen here with a plain function instead of a MagicMock chain.
+    # Use mock_timestamp when a test needs to inspect the calls.
+    fixed_timestamp = "2024-01-01-12:00:00"
+    with patch.object(
+        utils,
+        "get_current_timestamp",
+        new=lambda format_type="filename": fixed_timestamp,
+    ):
+        yield fixed_timestamp
 
 
 @pytest.fixture
-def temp_upload_dir():
-    with tempfile.TemporaryDirectory() as temp_dir:
-        yield temp_dir
+def run_in_tmp_path(tmp_path, monkeypatch):
+    # The default output dir is ".", so clients built from the default config would
+    # otherwise write metadata/ into the repository
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
 
 
 @pytest.fixture
-def flask_test_client():
-    from stable_delusion.main import app
+def temp_upload_dir(tmp_path):
+    # tmp_path lives under pytest's per-worker base directory when running with -n
+    return str(tmp_path)
+
+
+@pytest.fixture(scope="session")
+def flask_session_client():
+    return app.test_client()
 
-    with tempfile.TemporaryDirectory() as temp_dir:
-        app.config["TESTING"] = True
-        app.config["UPLOAD_FOLDER"] = temp_dir
 
-        with app.test_client() as client:
-            yield client
+@pytest.fixture
+def flask_test_client(flask_session_client, tmp_path):
+    # The client is created once per session; each test still gets its own empty upload folder
+    app.config["TESTING"] = True
+    app.config["UPLOAD_FOLDER"] = str(tmp_path)
+    return flask_session_client
 
 
 @pytest.fixture
@@ -366,49 +357,36 @@ def sample_test_args():
 
 @pytest.fixture
 def mock_file_operations():
-    mocks = {}
-
-    with patch("builtins.open", create=True) as mock_open:
-        mocks["open"] = mock_open
-
-        with patch("os.path.exists") as mock_exists:
-            mocks["exists"] = mock_exists
-            mock_exists.return_value = True
-
-            with patch("os.path.isfile") as mock_isfile:
-                mocks["isfile"] = mock_isfile
-                mock_isfile.return_value = True
-
-                with patch("os.makedirs") as mock_makedirs:
-                    mocks["makedirs"] = mock_makedirs
+    with patch.multiple("os.path", exists=DEFAULT, isfile=DEFAULT) as path_mocks, patch(
+        "os.makedirs"
+    ) as mock_makedirs, patch("builtins.open", create=True) as mock_open:
+        path_mocks["exists"].return_value = True
+        path_mocks["isfile"].return_value = True
 
-                    yield mocks
+        yield {"open": mock_open, "makedirs": mock_makedirs, **path_mocks}
 
 
 @pytest.fixture
 def mock_logging():
-    with patch("stable_delusion.generate.logging") as mock_log:
+    with patch.object(generate, "logging") as mock_log:
         yield mock_log
 
 
 @pytest.fixture
-def mock_base64_operations():
-    mocks = {}
-
-    with patch("stable_delusion.upscale.base64.b64encode") as mock_encode:
-        mocks["encode"] = mock_encode
-        mock_encode.return_value = b"bW9ja19lbmNvZGVkX2RhdGE="
-
-        with patch("stable_delusion.upscale.base64.b64decode") as mock_decode:
-            mocks["decode"] = mock_decode
-            mock_decode.return_value = b"mock_decoded_image_data"
-
-            yield mocks
+def mock_base64_operations(monkeypatch):
+    # Plain functions instead of MagicMocks; replacing the module reference in upscale leaves
+    # the real base64 module untouched for everything else
+    codec = SimpleNamespace(
+        b64encode=lambda data: b"bW9ja19lbmNvZGVkX2RhdGE=",
+        b64decode=lambda data: b"mock_decoded_image_data",
+    )
+    monkeypatch.setattr("stable_delusion.upscale.base64", codec)
+    return {"encode": codec.b64encode, "decode": codec.b64decode}
 
 
 @pytest.fixture
 def mock_requests():
-    with patch("stable_delusion.upscale.requests.post") as mock_post:
+    with patch.object(upscale._SESSION, "post") as mock_post:
         mock_response = MagicMock()
         mock_response.json.return_value = {
             "predictions": [{"bytesBase64Encoded": "bW9ja19yZXNwb25zZQ=="}]
@@ -421,8 +399,9 @@ def mock_requests():
 
 @pytest.fixture
 def mock_google_auth():
-    with patch("stable_delusion.upscale.default") as mock_default:
+    with patch.object(upscale, "default") as mock_default:
         mock_credentials = MagicMock()
+        mock_credentials.valid = False  # fresh credentials carry no token yet
         # NOTE: This is a test-only mock token, not a real credential
         mock_credentials.token = "mock-access-token"  # nosec B105
         mock_default.return_value = (mock_credentials, None)
@@ -482,9 +461,6 @@ def assert_successful_flask_response(response, expected_message="Image generated
 def create_mock_file_storage(
     content=b"fake image data", filename="test_image.png", content_type="image/png"
 ):
-    from werkzeug.datastructures import FileStorage
-    from io import BytesIO
-
     return FileStorage(stream=BytesIO(content), filename=filename, content_type=content_type)
 
 
@@ -507,16 +483,7 @@ def malicious_mock_file():
 
 
 def create_test_png_data():
-    return (
-        b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01"
-        b"\x00\x00\x00\x01\x08\x02\x00\x00\x00\x90wS\xde\x00\x00"
-        b"\x00\x0cIDATx\x9cc\x00\x01\x00\x00\x05\x00\x01\r\n-\xdb"
-        b"\x00\x00\x00\x00IEND\xaeB`\x82"
-    )
-
-
-def mock_image_operations():
-    return patch("stable_delusion.generate.Image.open"), patch("stable_delusion.generate.datetime")
+    return PNG_1X1
 
 
 # Test configuration
@@ -534,16 +501,20 @@ def pytest_configure(config):
 # Test collection hooks
 def pytest_collection_modifyitems(config, items):
     for item in items:
+        # Lower-case each identifier once per item rather than once per check
+        nodeid = item.nodeid.lower()
+        name = item.name.lower()
+
         # Mark integration tests
-        if "integration" in item.nodeid.lower():
+        if "integration" in nodeid:
             item.add_marker(pytest.mark.integration)
 
         # Mark API tests
-        if "api" in item.name.lower() or "endpoint" in item.name.lower():
+        if "api" in name or "endpoint" in name:
             item.add_marker(pytest.mark.api)
 
         # Mark slow tests
-        if "large" in item.name.lower() or "performance" in item.name.lower():
+        if "large" in name or "performance" in name:
             item.add_marker(pytest.mark.slow)
 
 
@@ -569,10 +540,7 @@ def mock_s3_client():
 
 @pytest.fixture
 def mock_seedream_client():
-    from stable_delusion.seedream import SeedreamClient
-    from stable_delusion.config import DEFAULT_SEEDREAM_MODEL
-
-    mock_client = MagicMock(spec=SeedreamClient)
+    mock_client = MagicMock()
     mock_client.model = DEFAULT_SEEDREAM_MODEL
 
     # Mock successful API response
@@ -648,6 +616,7 @@ def seedream_env():
 
 @pytest.fixture
 def mock_s3_repository():
+    # The spec is needed: SeedreamImageGenerationService checks isinstance(repo, S3ImageRepository)
     mock_repo = MagicMock(spec=S3ImageRepository)
 
     # Mock save_image to return HTTPS URL
@@ -667,9 +636,7 @@ def mock_s3_repository():
 
 @pytest.fixture
 def mock_seedream_service():
-    from stable_delusion.services.seedream_service import SeedreamImageGenerationService
-
-    mock_service = MagicMock(spec=SeedreamImageGenerationService)
+    mock_service = MagicMock()
 
     # Mock upload functionality
     mock_service.upload_images_to_s3.return_value = [
@@ -682,9 +649,6 @@ def mock_seedream_service():
     ]
 
     # Mock generate_image to return successful response
-    from stable_delusion.models.responses import GenerateImageResponse
-    from stable_delusion.models.client_config import ImageGenerationConfig, GCPConfig
-
     def mock_generate_image(request):
         return GenerateImageResponse(
             image_config=ImageGenerationConfig(
@@ -731,20 +695,19 @@ def mock_requests_for_seedream():
 
 @pytest.fixture
 def mock_timestamped_filename():
-    with patch("stable_delusion.utils.generate_timestamped_filename") as mock_timestamp:
+    with patch.object(utils, "generate_timestamped_filename") as mock_timestamp:
         mock_timestamp.return_value = "seedream_generated_2025-09-27-12:34:56.png"
         yield mock_timestamp
 
 
 @pytest.fixture
 def seedream_test_config():
-    from stable_delusion.config import Config
-
-    config = MagicMock(spec=Config)
+    config = MagicMock()
     config.s3_bucket = "test-seedream-bucket"
     config.s3_region = "us-east-1"
     config.aws_access_key_id = "test-access-key"
     config.aws_secret_access_key = "test-secret-key"
+    config.s3_head_cache_ttl = 0.0
     config.storage_type = "s3"
     config.default_output_dir = Path("/tmp")
 
@@ -774,7 +737,7 @@ def mock_boto3_for_seedream():
 
 @pytest.fixture
 def mock_s3_client_manager():
-    with patch("stable_delusion.repositories.s3_image_repository.S3ClientManager") as mock_manager:
+    with patch.object(s3_image_repository, "S3ClientManager") as mock_manager:
         mock_manager.create_s3_client.return_value = MagicMock()
         mock_manager._validate_s3_access.return_value = None
         yield mock_manager
@@ -782,8 +745,6 @@ def mock_s3_client_manager():
 
 @pytest.fixture
 def valid_seedream_request():
-    from stable_delusion.models.requests import GenerateImageRequest
-
     return GenerateImageRequest(
         prompt="Edit this image to make it more colorful",
         images=[Path("/tmp/test_image.jpg")],
@@ -798,8 +759,6 @@ def valid_seedream_request():
 
 @pytest.fixture
 def invalid_seedream_request():
-    from stable_delusion.models.requests import GenerateImageRequest
-
     # This should trigger validation error (Seedream + images + local storage)
     return lambda: GenerateImageRequest(
         prompt="Edit this image",
@@ -809,12 +768,6 @@ def invalid_seedream_request():
     )
 
 
-@pytest.fixture
-def mock_dotenv_for_cli():
-    with patch("stable_delusion.generate.load_dotenv") as mock_load_dotenv:
-        yield mock_load_dotenv
-
-
 # Helper functions for Seedream testing
 def create_mock_seedream_response(urls=None, error=None):
     if urls is None:
@@ -836,14 +789,12 @@ def create_mock_seedream_response(urls=None, error=None):
 
 
 def create_mock_s3_error(error_code="NoSuchKey"):
-    from botocore.exceptions import ClientError
-
     return ClientError(error_response={"Error": {"Code": error_code}}, operation_name="HeadObject")
 
 
 @pytest.fixture
 def mock_service_factory():
-    with patch("stable_delusion.builders") as mock_builders:
+    with patch.object(stable_delusion, "builders") as mock_builders:
         # Configure different service creation methods
         mock_builders.create_image_generation_service.return_value = MagicMock()
         mock_builders.create_file_service.return_value = MagicMock()
@@ -858,7 +809,7 @@ def mock_s3_file_repository():
     mock_repo.key_prefix = "input/"
     mock_repo.bucket_name = "test-bucket"
     mock_repo.s3_client = MagicMock()
-    mock_repo.s3_client.put_object.return_value = {}
+    mock_repo.s3_client.upload_fileobj.return_value = None
     mock_repo.s3_client.head_object.return_value = {"ContentLength": 1024}
     mock_repo.s3_client.get_object.return_value = {"Body": MagicMock()}
     return mock_repo
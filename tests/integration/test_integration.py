@@ -18,46 +18,14 @@ from stable_delusion.models.client_config import GeminiClientConfig, GCPConfig
 
 sys.path.append("stable_delusion")
 
-
-# Note: .env file loading prevention is now handled globally in conftest.py
+# GeminiClient saves metadata below the working directory when no output dir is configured
+pytestmark = pytest.mark.usefixtures("run_in_tmp_path")
 
 
-@pytest.fixture
-def temp_image_file():
-    with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as temp_file:
-        # Write minimal PNG header to make it a valid image file
-        png_header = (
-            b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01"
-            b"\x00\x00\x00\x01\x08\x02\x00\x00\x00\x90wS\xde\x00\x00"
-            b"\x00\x0cIDATx\x9cc\x00\x01\x00\x00\x05\x00\x01\r\n-\xdb"
-            b"\x00\x00\x00\x00IEND\xaeB`\x82"
-        )
-        temp_file.write(png_header)
-        temp_file.flush()
-        yield temp_file.name
-    os.unlink(temp_file.name)
-
-
-@pytest.fixture
-def temp_images():
-    files = []
-    for i in range(2):
-        with tempfile.NamedTemporaryFile(suffix=f"_{i}.png", delete=False) as temp_file:
-            png_header = (
-                b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01"
-                b"\x00\x00\x00\x01\x08\x02\x00\x00\x00\x90wS\xde\x00\x00"
-                b"\x00\x0cIDATx\x9cc\x00\x01\x00\x00\x05\x00\x01\r\n-\xdb"
-                b"\x00\x00\x00\x00IEND\xaeB`\x82"
-            )
-            temp_file.write(png_header)
-            temp_file.flush()
-            files.append(temp_file.name)
+# Note: .env file loading prevention is now handled globally in conftest.py
 
-    yield files
 
-    for file in files:
-        if os.path.exists(file):
-            os.unlink(file)
+# temp_image_file and temp_images are session-scoped fixtures from conftest.py
 
 
 class TestEndToEndWorkflow:
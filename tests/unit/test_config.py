@@ -168,6 +168,27 @@ class TestConfigManager:
         assert config.s3_region == "us-west2"
         # Local directories should not be created for S3 storage
 
+    @patch.dict(
+        os.environ,
+        {
+            "STORAGE_TYPE": "s3",
+            "AWS_S3_BUCKET": "test-bucket",
+            "AWS_S3_REGION": "us-west2",
+            "AWS_S3_HEAD_CACHE_TTL": "300",
+        },
+        clear=True,
+    )
+    def test_config_s3_head_cache_ttl(self):
+        ConfigManager.reset_config()
+        config = ConfigManager.get_config()
+
+        assert config.s3_head_cache_ttl == 300.0
+
+    @patch.dict(os.environ, {"GEMINI_API_KEY": "test-key"}, clear=True)
+    def test_config_s3_head_cache_disabled_by_default(self):
+        ConfigManager.reset_config()
+        assert ConfigManager.get_config().s3_head_cache_ttl == 0.0
+
     @patch.dict(os.environ, {"GEMINI_API_KEY": "test-key", "STORAGE_TYPE": "s3"}, clear=True)
     def test_config_s3_missing_bucket(self):
         ConfigManager.reset_config()
@@ -33,7 +33,7 @@ class TestErrorHandling:  # pylint: disable=too-many-public-methods
         self,
         mock_seedream_client,
         mock_s3_repository,
-        mock_pil_image_context_manager,
+        tmp_path,
         mock_config_with_s3,
         mock_s3_file_repository,
     ):
@@ -41,28 +41,28 @@ class TestErrorHandling:  # pylint: disable=too-many-public-methods
             seedream_client=mock_seedream_client, image_repository=mock_s3_repository
         )
 
-        test_images = [Path("/tmp/test.jpg")]
-        mock_pil_image_context_manager.format = "JPEG"
+        test_images = [tmp_path / "test.jpg"]
+        for image_path in test_images:
+            image_path.write_bytes(b"fake jpeg data")
 
-        mock_s3_file_repository.s3_client.put_object.side_effect = Exception(
+        mock_s3_file_repository.s3_client.upload_fileobj.side_effect = Exception(
             "S3 connection timeout"
         )
 
-        with patch("PIL.Image.open", return_value=mock_pil_image_context_manager):
+        with patch(
+            "stable_delusion.services.seedream_service.ConfigManager.get_config",
+            return_value=mock_config_with_s3,
+        ):
             with patch(
-                "stable_delusion.services.seedream_service.ConfigManager.get_config",
-                return_value=mock_config_with_s3,
+                "stable_delusion.services.seedream_service.S3FileRepository",
+                return_value=mock_s3_file_repository,
             ):
                 with patch(
-                    "stable_delusion.repositories.s3_file_repository.S3FileRepository",
-                    return_value=mock_s3_file_repository,
+                    "stable_delusion.services.seedream_service.optimize_image_size",
+                    side_effect=lambda path, **kwargs: path,
                 ):
-                    with patch(
-                        "stable_delusion.utils.optimize_image_size",
-                        side_effect=lambda path, **kwargs: path,
-                    ):
-                        with pytest.raises(ConfigurationError) as exc_info:
-                            service.upload_images_to_s3(test_images)
+                    with pytest.raises(ConfigurationError) as exc_info:
+                        service.upload_images_to_s3(test_images)
 
         assert "Failed to upload image" in str(exc_info.value)
         assert "S3 connection timeout" in str(exc_info.value)
@@ -133,21 +133,21 @@ class TestErrorHandling:  # pylint: disable=too-many-public-methods
 
         test_images = [Path("/tmp/corrupted.jpg")]
 
-        with patch("PIL.Image.open", side_effect=Exception("Image file is corrupted")):
+        # Corrupted images are first decoded when optimize_image_size checks them
+        with patch(
+            "stable_delusion.services.seedream_service.ConfigManager.get_config",
+            return_value=mock_config_with_s3,
+        ):
             with patch(
-                "stable_delusion.services.seedream_service.ConfigManager.get_config",
-                return_value=mock_config_with_s3,
+                "stable_delusion.services.seedream_service.S3FileRepository",
+                return_value=mock_s3_file_repository,
             ):
                 with patch(
-                    "stable_delusion.repositories.s3_file_repository.S3FileRepository",
-                    return_value=mock_s3_file_repository,
+                    "stable_delusion.services.seedream_service.optimize_image_size",
+                    side_effect=Exception("Image file is corrupted"),
                 ):
-                    with patch(
-                        "stable_delusion.utils.optimize_image_size",
-                        side_effect=lambda path, **kwargs: path,
-                    ):
-                        with pytest.raises(ConfigurationError) as exc_info:
-                            service.upload_images_to_s3(test_images)
+                    with pytest.raises(ConfigurationError) as exc_info:
+                        service.upload_images_to_s3(test_images)
 
         assert "Failed to upload image" in str(exc_info.value)
         assert "Image file is corrupted" in str(exc_info.value)
@@ -171,7 +171,7 @@ class TestErrorHandling:  # pylint: disable=too-many-public-methods
                 return_value=mock_config_with_s3,
             ):
                 with patch(
-                    "stable_delusion.repositories.s3_file_repository.S3FileRepository",
+                    "stable_delusion.services.seedream_service.S3FileRepository",
                     return_value=mock_s3_file_repository,
                 ):
                     with pytest.raises(ConfigurationError) as exc_info:
@@ -340,7 +340,7 @@ class TestErrorHandling:  # pylint: disable=too-many-public-methods
         self,
         mock_seedream_client,
         mock_s3_repository,
-        mock_pil_image_context_manager,
+        tmp_path,
         mock_config_with_s3,
         mock_s3_file_repository,
     ):
@@ -349,29 +349,29 @@ class TestErrorHandling:  # pylint: disable=too-many-public-methods
         )
 
         original_error = "S3 bucket 'test-bucket' access denied: insufficient permissions"
-        test_images = [Path("/tmp/test.jpg")]
-        mock_pil_image_context_manager.format = "JPEG"
+        test_images = [tmp_path / "test.jpg"]
+        for image_path in test_images:
+            image_path.write_bytes(b"fake jpeg data")
 
-        mock_s3_file_repository.s3_client.put_object.side_effect = Exception(original_error)
+        mock_s3_file_repository.s3_client.upload_fileobj.side_effect = Exception(original_error)
 
-        with patch("PIL.Image.open", return_value=mock_pil_image_context_manager):
+        with patch(
+            "stable_delusion.services.seedream_service.ConfigManager.get_config",
+            return_value=mock_config_with_s3,
+        ):
             with patch(
-                "stable_delusion.services.seedream_service.ConfigManager.get_config",
-                return_value=mock_config_with_s3,
+                "stable_delusion.services.seedream_service.S3FileRepository",
+                return_value=mock_s3_file_repository,
             ):
                 with patch(
-                    "stable_delusion.repositories.s3_file_repository.S3FileRepository",
-                    return_value=mock_s3_file_repository,
+                    "stable_delusion.services.seedream_service.optimize_image_size",
+                    side_effect=lambda path, **kwargs: path,
                 ):
-                    with patch(
-                        "stable_delusion.utils.optimize_image_size",
-                        side_effect=lambda path, **kwargs: path,
-                    ):
-                        with pytest.raises(ConfigurationError) as exc_info:
-                            service.upload_images_to_s3(test_images)
+                    with pytest.raises(ConfigurationError) as exc_info:
+                        service.upload_images_to_s3(test_images)
 
         error_str = str(exc_info.value)
-        assert "Failed to upload image /tmp/test.jpg to S3" in error_str
+        assert f"Failed to upload image {test_images[0]} to S3" in error_str
         assert original_error in error_str
 
     def test_chained_exception_preservation(
@@ -379,7 +379,7 @@ class TestErrorHandling:  # pylint: disable=too-many-public-methods
         self,
         mock_seedream_client,
         mock_s3_repository,
-        mock_pil_image_context_manager,
+        tmp_path,
         mock_config_with_s3,
         mock_s3_file_repository,
     ):
@@ -388,25 +388,25 @@ class TestErrorHandling:  # pylint: disable=too-many-public-methods
         )
 
         original_exception = FileNotFoundError("File not found")
-        test_images = [Path("/tmp/test.jpg")]
-        mock_pil_image_context_manager.format = "JPEG"
+        test_images = [tmp_path / "test.jpg"]
+        for image_path in test_images:
+            image_path.write_bytes(b"fake jpeg data")
 
-        mock_s3_file_repository.s3_client.put_object.side_effect = original_exception
+        mock_s3_file_repository.s3_client.upload_fileobj.side_effect = original_exception
 
-        with patch("PIL.Image.open", return_value=mock_pil_image_context_manager):
+        with patch(
+            "stable_delusion.services.seedream_service.ConfigManager.get_config",
+            return_value=mock_config_with_s3,
+        ):
             with patch(
-                "stable_delusion.services.seedream_service.ConfigManager.get_config",
-                return_value=mock_config_with_s3,
+                "stable_delusion.services.seedream_service.S3FileRepository",
+                return_value=mock_s3_file_repository,
             ):
                 with patch(
-                    "stable_delusion.repositories.s3_file_repository.S3FileRepository",
-                    return_value=mock_s3_file_repository,
+                    "stable_delusion.services.seedream_service.optimize_image_size",
+                    side_effect=lambda path, **kwargs: path,
                 ):
-                    with patch(
-                        "stable_delusion.utils.optimize_image_size",
-                        side_effect=lambda path, **kwargs: path,
-                    ):
-                        with pytest.raises(ConfigurationError) as exc_info:
-                            service.upload_images_to_s3(test_images)
+                    with pytest.raises(ConfigurationError) as exc_info:
+                        service.upload_images_to_s3(test_images)
 
         assert exc_info.value.__cause__ == original_exception
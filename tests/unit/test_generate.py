@@ -22,6 +22,9 @@ from ..conftest import create_mock_gemini_response
 
 sys.path.append("stable_delusion")
 
+# GeminiClient saves metadata below the working directory when no output dir is configured
+pytestmark = pytest.mark.usefixtures("run_in_tmp_path")
+
 
 # Note: .env file loading prevention is now handled globally in conftest.py
 
@@ -1,5 +1,6 @@
 """Unit tests for metadata repository implementations."""
 
+import shutil
 import tempfile
 from pathlib import Path
 from unittest.mock import MagicMock, patch
@@ -92,6 +93,13 @@ class TestLocalMetadataRepository:
         with pytest.raises(FileOperationError):
             local_repo.load_metadata("nonexistent.json")
 
+    def test_new_repository_recreates_removed_metadata_dir(self, config, sample_metadata):
+        shutil.rmtree(LocalMetadataRepository(config).metadata_dir)
+
+        saved_path = LocalMetadataRepository(config).save_metadata(sample_metadata)
+
+        assert Path(saved_path).exists()
+
 
 class TestS3MetadataRepository:
     """Test cases for S3MetadataRepository."""
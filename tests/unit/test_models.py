@@ -18,6 +18,7 @@ from stable_delusion.models.responses import (
     ErrorResponse,
 )
 from stable_delusion.models.client_config import GCPConfig, ImageGenerationConfig
+from stable_delusion.models.token_usage import TokenUsageEntry, TokenUsageStats
 
 
 class TestGenerateImageRequest:
@@ -306,3 +307,38 @@ class TestErrorResponse:
         assert response.message == "Validation failed"
         assert response.error_code == "VALIDATION_ERROR"
         assert response.details == "Field 'name' is required"
+
+
+class TestTokenUsageModels:
+    """Test token usage entry and statistics serialization."""
+
+    def test_entry_to_dict_round_trips(self):
+        entry = TokenUsageEntry(
+            timestamp="2025-10-16T12:00:00", model="gemini", tokens=42, operation="generate"
+        )
+
+        data = entry.to_dict()
+
+        assert data == {
+            "timestamp": "2025-10-16T12:00:00",
+            "model": "gemini",
+            "tokens": 42,
+            "operation": "generate",
+            "prompt_hash": None,
+        }
+        assert TokenUsageEntry(**data) == entry
+
+    def test_stats_to_dict_copies_mappings(self):
+        stats = TokenUsageStats(
+            total_tokens=42,
+            total_requests=1,
+            tokens_by_model={"gemini": 42},
+            requests_by_model={"gemini": 1},
+            tokens_by_operation={"generate": 42},
+        )
+
+        data = stats.to_dict()
+        data["tokens_by_model"]["seedream"] = 1
+
+        assert data["total_tokens"] == 42
+        assert stats.tokens_by_model == {"gemini": 42}
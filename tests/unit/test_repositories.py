@@ -1,5 +1,6 @@
 """Unit tests for repository implementations."""
 
+import errno
 import tempfile
 import time
 from io import BytesIO
@@ -109,6 +110,50 @@ class TestLocalImageRepository:
 
         assert "File is not a valid image" in str(excinfo.value)
 
+    def test_validate_image_file_caches_verification(self, repository, test_image, temp_dir):
+        file_path = temp_dir / "cached.png"
+        test_image.save(str(file_path))
+
+        with patch(
+            "stable_delusion.repositories.local_image_repository.Image.open", wraps=Image.open
+        ) as mock_open:
+            assert repository.validate_image_file(file_path) is True
+            assert repository.validate_image_file(file_path) is True
+
+        mock_open.assert_called_once()
+
+    def test_validate_image_file_reverifies_modified_file(self, repository, test_image, temp_dir):
+        file_path = temp_dir / "modified.png"
+        test_image.save(str(file_path))
+        assert repository.validate_image_file(file_path) is True
+
+        file_path.write_text("This is not an image")
+
+        with pytest.raises(FileOperationError, match="File is not a valid image"):
+            repository.validate_image_file(file_path)
+
+    def test_validate_image_files_success(self, repository, test_image, temp_dir):
+        file_paths = [temp_dir / f"image_{i}.png" for i in range(4)]
+        for file_path in file_paths:
+            test_image.save(str(file_path))
+
+        assert repository.validate_image_files(file_paths) == [True] * 4
+
+    def test_validate_image_files_aggregates_failures(self, repository, test_image, temp_dir):
+        valid = temp_dir / "valid.png"
+        test_image.save(str(valid))
+        invalid = temp_dir / "not_image.txt"
+        invalid.write_text("This is not an image")
+        missing = temp_dir / "missing.png"
+
+        with pytest.raises(FileOperationError, match="2 of 3 image files failed") as excinfo:
+            repository.validate_image_files([valid, invalid, missing])
+
+        assert excinfo.value.file_path == f"{invalid}, {missing}"
+
+    def test_validate_image_files_empty(self, repository):
+        assert repository.validate_image_files([]) == []
+
     @patch("stable_delusion.repositories.local_image_repository.generate_timestamped_filename")
     def test_generate_image_path(self, mock_generate, repository, temp_dir):
         mock_generate.return_value = "generated_test_123.png"
@@ -147,6 +192,37 @@ class TestLocalFileRepository:
 
         assert result is False
 
+    def test_exists_is_cached_until_ttl_expires(self, repository, temp_dir):
+        file_path = temp_dir / "test.txt"
+        file_path.write_text("test content")
+        assert repository.exists(file_path) is True
+
+        with patch.object(Path, "exists", side_effect=AssertionError("stat not expected")):
+            assert repository.exists(file_path) is True
+
+    def test_exists_cache_disabled(self, temp_dir):
+        repository = LocalFileRepository(exists_cache_ttl=0)
+        file_path = temp_dir / "test.txt"
+        file_path.write_text("test content")
+        assert repository.exists(file_path) is True
+
+        file_path.unlink()
+
+        assert repository.exists(file_path) is False
+
+    def test_delete_and_move_invalidate_exists_cache(self, repository, temp_dir):
+        source = temp_dir / "source.txt"
+        destination = temp_dir / "destination.txt"
+        source.write_text("test content")
+        assert repository.exists(source) is True
+
+        repository.move_file(source, destination)
+        assert repository.exists(source) is False
+        assert repository.exists(destination) is True
+
+        repository.delete_file(destination)
+        assert repository.exists(destination) is False
+
     def test_create_directory_success(self, repository, temp_dir):
         new_dir = temp_dir / "new_directory"
 
@@ -181,6 +257,10 @@ class TestLocalFileRepository:
 
         assert result is False
 
+    def test_delete_file_other_error_raises(self, repository, temp_dir):
+        with pytest.raises(FileOperationError):
+            repository.delete_file(temp_dir)
+
     def test_move_file_success(self, repository, temp_dir):
         source = temp_dir / "source.txt"
         destination = temp_dir / "destination.txt"
@@ -204,6 +284,22 @@ class TestLocalFileRepository:
         assert destination.exists()
         assert destination.parent.exists()
 
+    def test_move_file_across_filesystems(self, repository, temp_dir):
+        source = temp_dir / "source.txt"
+        destination = temp_dir / "other_mount" / "destination.txt"
+        source.write_text("test content")
+        cross_device = OSError(errno.EXDEV, "Invalid cross-device link")
+
+        with patch(
+            "stable_delusion.repositories.local_file_repository.os.replace",
+            side_effect=cross_device,
+        ):
+            result = repository.move_file(source, destination)
+
+        assert result == destination
+        assert not source.exists()
+        assert destination.read_text() == "test content"
+
 
 class TestLocalFileRepositoryUploads:
     """Test cases for LocalFileRepository upload functionality."""
@@ -244,6 +340,54 @@ class TestLocalFileRepositoryUploads:
         assert len(result) == 2
         assert all(f.exists() for f in result)
 
+    def test_save_uploaded_files_parallel_preserves_order_and_content(self, repository, temp_dir):
+        files = [
+            FileStorage(
+                stream=BytesIO(f"file {i}".encode()),
+                filename=f"file{i}.png",
+                content_type="image/png",
+            )
+            for i in range(10)
+        ]
+
+        result = repository.save_uploaded_files(files, temp_dir)
+
+        assert [path.name for path in result] == [f"file{i}.png" for i in range(10)]
+        assert [path.read_bytes() for path in result] == [f"file {i}".encode() for i in range(10)]
+
+    def test_save_uploaded_files_same_name_not_overwritten(self, repository, temp_dir):
+        files = [
+            FileStorage(stream=BytesIO(b"first"), filename="photo.png", content_type="image/png"),
+            FileStorage(stream=BytesIO(b"second"), filename="photo.png", content_type="image/png"),
+        ]
+
+        result = repository.save_uploaded_files(files, temp_dir)
+
+        assert [path.name for path in result] == ["photo.png", "photo_1.png"]
+        assert [path.read_bytes() for path in result] == [b"first", b"second"]
+
+    @patch("stable_delusion.repositories.local_file_repository.get_current_timestamp")
+    def test_save_uploaded_files_formats_timestamp_once(self, mock_timestamp, repository, temp_dir):
+        mock_timestamp.return_value = "251016-12:00:00"
+        files = [
+            FileStorage(stream=BytesIO(b"1"), filename=f"f{i}.png", content_type="image/png")
+            for i in range(3)
+        ]
+
+        repository.save_uploaded_files(files, temp_dir)
+
+        mock_timestamp.assert_called_once_with("compact")
+
+    def test_save_uploaded_files_write_failure(self, repository, temp_dir):
+        files = [
+            FileStorage(stream=BytesIO(b"file 1"), filename="file1.png", content_type="image/png"),
+            FileStorage(stream=BytesIO(b"file 2"), filename="file2.png", content_type="image/png"),
+        ]
+
+        with patch.object(FileStorage, "save", side_effect=OSError("disk full")):
+            with pytest.raises(FileOperationError):
+                repository.save_uploaded_files(files, temp_dir)
+
     def test_generate_secure_filename_with_filename(self, repository):
         result = repository.generate_secure_filename("test_image.png")
 
@@ -286,6 +430,42 @@ class TestLocalFileRepositoryUploads:
         assert not old_file.exists()
         assert new_file.exists()
 
+    def test_cleanup_old_uploads_skips_directories_and_symlinks(self, repository, temp_dir):
+        import os
+
+        old_time = time.time() - (25 * 3600)
+        old_dir = temp_dir / "old_dir"
+        old_dir.mkdir()
+        target = temp_dir / "target.txt"
+        target.write_text("target")
+        link = temp_dir / "link.txt"
+        link.symlink_to(target)
+        for path in (old_dir, target):
+            os.utime(path, (old_time, old_time))
+
+        result = repository.cleanup_old_uploads(temp_dir, max_age_hours=24)
+
+        assert result == 1
+        assert old_dir.exists()
+        assert not target.exists()
+        assert link.is_symlink()
+
+    def test_cleanup_old_uploads_removes_many_files_in_parallel(self, repository, temp_dir):
+        import os
+
+        old_time = time.time() - (25 * 3600)
+        old_files = [temp_dir / f"old_{i}.txt" for i in range(40)]
+        for path in old_files:
+            path.write_text("old")
+            os.utime(path, (old_time, old_time))
+        (temp_dir / "fresh.txt").write_text("new")
+
+        result = repository.cleanup_old_uploads(temp_dir, max_age_hours=24)
+
+        assert result == 40
+        assert not any(path.exists() for path in old_files)
+        assert (temp_dir / "fresh.txt").exists()
+
     def test_cleanup_old_uploads_no_directory(self, repository, temp_dir):
         nonexistent_dir = temp_dir / "nonexistent"
 
@@ -26,12 +26,13 @@ class TestS3ImageRepositoryURL:  # pylint: disable=too-many-public-methods
         config.s3_region = "us-east-1"
         config.aws_access_key_id = "test-key"
         config.aws_secret_access_key = "test-secret"
+        config.s3_head_cache_ttl = 0.0
         return config
 
     @pytest.fixture
     def mock_s3_client(self):
         mock_client = Mock()
-        mock_client.put_object.return_value = {}
+        mock_client.upload_fileobj.return_value = None
         mock_client.head_object.return_value = {}
         mock_client.get_object.return_value = {"Body": Mock()}
         return mock_client
@@ -78,9 +79,9 @@ class TestS3ImageRepositoryURL:  # pylint: disable=too-many-public-methods
             ):
                 s3_repository.save_image(mock_image, file_path)
 
-        # Verify put_object was called without ACL parameter
-        put_object_call = mock_s3_client.put_object.call_args
-        assert "ACL" not in put_object_call[1]
+        # Verify upload_fileobj was called without ACL parameter
+        upload_call = mock_s3_client.upload_fileobj.call_args
+        assert "ACL" not in upload_call[1]["ExtraArgs"]
 
     def test_https_url_format_correct(self, s3_repository, mock_image):
         file_path = Path("subfolder/image.png")
@@ -105,6 +106,7 @@ class TestS3ImageRepositoryURL:  # pylint: disable=too-many-public-methods
             config.s3_region = region
             config.aws_access_key_id = "test-key"
             config.aws_secret_access_key = "test-secret"
+            config.s3_head_cache_ttl = 0.0
 
             with patch(
                 "stable_delusion.repositories.s3_image_repository.S3ClientManager.create_s3_client",
@@ -168,9 +170,9 @@ class TestS3ImageRepositoryURL:  # pylint: disable=too-many-public-methods
             save_call_args = mock_image.save.call_args
             assert save_call_args[1]["format"] == expected_format
 
-            # Check that put_object was called with correct ContentType
-            put_object_call = mock_s3_client.put_object.call_args
-            assert put_object_call[1]["ContentType"] == expected_content_type
+            # Check that upload_fileobj was called with correct ContentType
+            upload_call = mock_s3_client.upload_fileobj.call_args
+            assert upload_call[1]["ExtraArgs"]["ContentType"] == expected_content_type
 
     def test_metadata_included_in_upload(self, s3_repository, mock_image, mock_s3_client):
         file_path = Path("test_image.jpg")
@@ -183,14 +185,14 @@ class TestS3ImageRepositoryURL:  # pylint: disable=too-many-public-methods
             ):
                 s3_repository.save_image(mock_image, file_path)
 
-        put_object_call = mock_s3_client.put_object.call_args
-        metadata = put_object_call[1]["Metadata"]
+        upload_call = mock_s3_client.upload_fileobj.call_args
+        metadata = upload_call[1]["ExtraArgs"]["Metadata"]
 
         assert metadata["original_filename"] == "test_image.jpg"
         assert metadata["uploaded_by"] == "stable-delusion"
 
     def test_s3_upload_error_handling(self, s3_repository, mock_image, mock_s3_client):
-        mock_s3_client.put_object.side_effect = Exception("S3 upload failed")
+        mock_s3_client.upload_fileobj.side_effect = Exception("S3 upload failed")
 
         # Mock file_exists to return False so upload is attempted
         with patch.object(s3_repository, "file_exists", return_value=False):
@@ -377,8 +379,8 @@ class TestS3ImageRepositoryURL:  # pylint: disable=too-many-public-methods
             "test-bucket.s3.us-east-1.amazonaws.com/output/gemini/existing_image.jpg" in result_str
         )
 
-        # Verify put_object was NOT called (no upload)
-        mock_s3_client.put_object.assert_not_called()
+        # Verify upload_fileobj was NOT called (no upload)
+        mock_s3_client.upload_fileobj.assert_not_called()
 
         # Verify save WAS called to compute the hash but upload was skipped
         mock_image.save.assert_called_once()
@@ -401,8 +403,8 @@ class TestS3ImageRepositoryURL:  # pylint: disable=too-many-public-methods
         result_str = str(result)
         assert "test-bucket.s3.us-east-1.amazonaws.com/output/gemini/new_image.jpg" in result_str
 
-        # Verify put_object WAS called (upload happened)
-        mock_s3_client.put_object.assert_called_once()
+        # Verify upload_fileobj WAS called (upload happened)
+        mock_s3_client.upload_fileobj.assert_called_once()
 
         # Verify save WAS called on the image (conversion happened)
         mock_image.save.assert_called()
@@ -3,16 +3,30 @@ Unit tests for S3-based repository implementations.
 Tests S3ImageRepository and S3FileRepository functionality with mocked S3 operations.
 """
 
+import hashlib
 import io
+import threading
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
 from PIL import Image
+from werkzeug.datastructures import FileStorage
 
 from stable_delusion.config import Config
-from stable_delusion.exceptions import FileOperationError
+from stable_delusion.exceptions import FileOperationError, ValidationError
+from stable_delusion.repositories.s3_client import (
+    CONNECT_TIMEOUT_SECONDS,
+    MAX_POOL_CONNECTIONS,
+    MAX_RETRY_ATTEMPTS,
+    READ_TIMEOUT_SECONDS,
+    ClientError,
+    TRANSFER_CONFIG,
+    S3ClientManager,
+    build_s3_hash_cache,
+)
 from stable_delusion.repositories.s3_image_repository import S3ImageRepository
 from stable_delusion.repositories.s3_file_repository import S3FileRepository
 
@@ -89,15 +103,16 @@ class TestS3ImageRepository:
             # Execute
             result = s3_image_repo.save_image(test_image, file_path)
 
-        # Verify S3 upload was called
-        s3_image_repo.s3_client.put_object.assert_called_once()
-        call_args = s3_image_repo.s3_client.put_object.call_args
+        # Verify S3 upload was called through the managed transfer
+        s3_image_repo.s3_client.upload_fileobj.assert_called_once()
+        call_args = s3_image_repo.s3_client.upload_fileobj.call_args
 
         assert call_args[1]["Bucket"] == "test-bucket"
         assert "output/gemini/test_image.png" in call_args[1]["Key"]
-        assert call_args[1]["ContentType"] == "image/png"
-        assert "Body" in call_args[1]
-        assert "Metadata" in call_args[1]
+        assert call_args[1]["ExtraArgs"]["ContentType"] == "image/png"
+        assert "Fileobj" in call_args[1]
+        assert "Metadata" in call_args[1]["ExtraArgs"]
+        assert call_args[1]["Config"] is TRANSFER_CONFIG
 
         # Verify return value is HTTPS URL for public access
         # Note: Path normalization converts https:// to https:/ - this is expected
@@ -115,6 +130,8 @@ class TestS3ImageRepository:
             (Path("test.gif"), "image/gif"),
             (Path("test.bmp"), "image/bmp"),
             (Path("test.webp"), "image/webp"),
+            (Path("TEST.JPG"), "image/jpeg"),
+            (Path("test.tiff"), "image/png"),  # unknown extensions are saved as PNG
         ],
     )
     def test_save_image_content_types(
@@ -123,11 +140,11 @@ class TestS3ImageRepository:
         # Mock file_exists to return False so upload happens
         with patch.object(s3_image_repo, "file_exists", return_value=False):
             s3_image_repo.save_image(test_image, file_path)
-        call_args = s3_image_repo.s3_client.put_object.call_args
-        assert call_args[1]["ContentType"] == expected_content_type
+        call_args = s3_image_repo.s3_client.upload_fileobj.call_args
+        assert call_args[1]["ExtraArgs"]["ContentType"] == expected_content_type
 
     def test_save_image_failure(self, s3_image_repo, test_image):
-        s3_image_repo.s3_client.put_object.side_effect = Exception("S3 error")
+        s3_image_repo.s3_client.upload_fileobj.side_effect = Exception("S3 error")
 
         # Mock file_exists to return False so upload is attempted
         with patch.object(s3_image_repo, "file_exists", return_value=False):
@@ -165,6 +182,69 @@ class TestS3ImageRepository:
         with pytest.raises(FileOperationError, match="Image not found in S3"):
             s3_image_repo.load_image(Path("nonexistent.png"))
 
+    def test_load_image_not_found_client_error_code(self, s3_image_repo):
+        s3_image_repo.s3_client.get_object.side_effect = ClientError(
+            {"Error": {"Code": "NoSuchKey", "Message": "missing"}}, "GetObject"
+        )
+
+        with pytest.raises(FileOperationError, match="Image not found in S3"):
+            s3_image_repo.load_image(Path("nonexistent.png"))
+
+    def test_load_image_other_client_error(self, s3_image_repo):
+        s3_image_repo.s3_client.get_object.side_effect = ClientError(
+            {"Error": {"Code": "AccessDenied", "Message": "denied"}}, "GetObject"
+        )
+
+        with pytest.raises(FileOperationError, match="Failed to load image from S3"):
+            s3_image_repo.load_image(Path("private.png"))
+
+    @staticmethod
+    def _png_response(etag: str, color: str = "blue") -> dict:
+        img_bytes = io.BytesIO()
+        Image.new("RGB", (8, 8), color=color).save(img_bytes, format="PNG")
+        response = {"Body": MagicMock(), "ETag": etag}
+        response["Body"].read.return_value = img_bytes.getvalue()
+        return response
+
+    def test_load_image_revalidates_cached_bytes_with_etag(self, s3_image_repo):
+        not_modified = Exception("Not Modified")
+        not_modified.response = {"Error": {"Code": "304"}}  # type: ignore[attr-defined]
+        s3_image_repo.s3_client.get_object.side_effect = [
+            self._png_response('"abc"'),
+            not_modified,
+        ]
+
+        first = s3_image_repo.load_image(Path("cached.png"))
+        second = s3_image_repo.load_image(Path("cached.png"))
+
+        s3_image_repo.s3_client.get_object.assert_called_with(
+            Bucket="test-bucket", Key="cached.png", IfNoneMatch='"abc"'
+        )
+        assert second is not first
+        assert second.tobytes() == first.tobytes()
+
+    def test_load_image_refreshes_cache_when_object_changed(self, s3_image_repo):
+        s3_image_repo.s3_client.get_object.side_effect = [
+            self._png_response('"old"', color="blue"),
+            self._png_response('"new"', color="red"),
+        ]
+
+        s3_image_repo.load_image(Path("changed.png"))
+        result = s3_image_repo.load_image(Path("changed.png"))
+
+        assert result.convert("RGB").getpixel((0, 0)) == (255, 0, 0)
+        assert s3_image_repo._image_cache.get("changed.png")[0] == '"new"'
+
+    def test_load_image_conditional_get_errors_are_wrapped(self, s3_image_repo):
+        s3_image_repo.s3_client.get_object.side_effect = [
+            self._png_response('"abc"'),
+            s3_image_repo.s3_client.exceptions.NoSuchKey(),
+        ]
+        s3_image_repo.load_image(Path("gone.png"))
+
+        with pytest.raises(FileOperationError, match="Image not found in S3"):
+            s3_image_repo.load_image(Path("gone.png"))
+
     def test_validate_image_file_exists(self, s3_image_repo):
         # Mock successful head_object response
         s3_image_repo.s3_client.head_object.return_value = {"ContentLength": 1024}
@@ -195,6 +275,54 @@ class TestS3ImageRepository:
 
         assert result is False
 
+    def test_validate_image_file_uncached_by_default(self, s3_image_repo):
+        s3_image_repo.validate_image_file(Path("test.png"))
+        s3_image_repo.validate_image_file(Path("test.png"))
+
+        assert s3_image_repo.s3_client.head_object.call_count == 2
+
+    def test_validate_image_file_uses_head_cache(self, s3_config):
+        s3_config.s3_head_cache_ttl = 300
+        with patch(
+            "stable_delusion.repositories.s3_image_repository.S3ClientManager.create_s3_client"
+        ) as mock_create:
+            repo = S3ImageRepository(s3_config)
+        head_object = mock_create.return_value.head_object
+
+        assert repo.validate_image_file(Path("test.png")) is True
+        assert repo.validate_image_file(Path("test.png")) is True
+        head_object.assert_called_once_with(Bucket="test-bucket", Key="test.png")
+
+    def test_save_image_populates_head_cache(self, s3_config, test_image):
+        s3_config.s3_head_cache_ttl = 300
+        with patch(
+            "stable_delusion.repositories.s3_image_repository.S3ClientManager.create_s3_client"
+        ) as mock_create:
+            repo = S3ImageRepository(s3_config)
+
+        repo.save_image(test_image, Path("cached.png"))
+
+        assert repo.validate_image_file(Path("output/gemini/cached.png")) is True
+        mock_create.return_value.head_object.assert_not_called()
+
+    def test_validate_image_files_batch(self, s3_image_repo):
+        def head_object(Bucket, Key):  # pylint: disable=invalid-name,unused-argument
+            if Key == "missing.png":
+                raise s3_image_repo.s3_client.exceptions.NoSuchKey()
+            return {"ContentLength": 1024}
+
+        s3_image_repo.s3_client.head_object.side_effect = head_object
+        file_paths = [Path("a.png"), Path("missing.png"), Path("b.png")]
+
+        assert s3_image_repo.validate_image_files(file_paths) == [True, False, True]
+        assert s3_image_repo.s3_client.head_object.call_count == 3
+
+    def test_validate_image_files_bucket_mismatch(self, s3_image_repo):
+        file_paths = [Path("a.png"), Path("https://other-bucket.s3.us-east-1.amazonaws.com/b.png")]
+
+        with pytest.raises(ValidationError, match="bucket mismatch"):
+            s3_image_repo.validate_image_files(file_paths)
+
     def test_generate_image_path(self, s3_image_repo):
         result = s3_image_repo.generate_image_path("test_image.png", Path("outputs"))
 
@@ -206,12 +334,264 @@ class TestS3ImageRepository:
 
         assert str(result) == "s3:/test-bucket/output/gemini/test.png"  # Path normalizes URLs
 
+    def test_save_image_uploads_encoded_buffer(self, s3_image_repo, test_image):
+        uploaded = []
+        s3_image_repo.s3_client.upload_fileobj.side_effect = lambda **kwargs: uploaded.append(
+            (kwargs["Fileobj"], kwargs["Fileobj"].read(), kwargs["ExtraArgs"]["Metadata"]["sha256"])
+        )
+
+        s3_image_repo.save_image(test_image, Path("first.png"))
+        s3_image_repo.save_image(Image.new("RGB", (20, 20), color="green"), Path("second.png"))
+
+        (_, first_bytes, first_hash), (_, second_bytes, second_hash) = uploaded
+        assert first_bytes.startswith(b"\x89PNG")
+        assert first_hash == hashlib.sha256(first_bytes).hexdigest()
+        assert second_hash == hashlib.sha256(second_bytes).hexdigest()
+        assert second_bytes != first_bytes
+
+    def test_save_image_file_uploads_file_unchanged(self, s3_image_repo, tmp_path):
+        file_path = tmp_path / "generated.png"
+        file_path.write_bytes(b"\x89PNG already encoded")
+        uploaded = []
+        s3_image_repo.s3_client.upload_fileobj.side_effect = lambda **kwargs: uploaded.append(
+            (kwargs["Fileobj"].read(), kwargs["ExtraArgs"])
+        )
+
+        with patch.object(Image, "open") as mock_open:
+            result = s3_image_repo.save_image_file(file_path)
+
+        mock_open.assert_not_called()
+        [(body, extra_args)] = uploaded
+        assert body == b"\x89PNG already encoded"
+        assert extra_args["ContentType"] == "image/png"
+        assert extra_args["Metadata"]["sha256"] == hashlib.sha256(body).hexdigest()
+        assert str(result).endswith("generated.png")
+
+    def test_save_image_file_failure(self, s3_image_repo, tmp_path):
+        file_path = tmp_path / "generated.png"
+        file_path.write_bytes(b"\x89PNG already encoded")
+        s3_image_repo.s3_client.upload_fileobj.side_effect = Exception("S3 error")
+
+        with pytest.raises(FileOperationError, match="Failed to save image to S3"):
+            s3_image_repo.save_image_file(file_path)
+
+    def test_save_images_preserves_order(self, s3_image_repo, test_image):
+        file_paths = [Path(f"batch_{i}.png") for i in range(5)]
+        images = [Image.new("RGB", (10, 10), color=(i, 0, 0)) for i in range(5)]
+
+        results = s3_image_repo.save_images(images, file_paths)
+
+        assert s3_image_repo.s3_client.upload_fileobj.call_count == 5
+        for file_path, result in zip(file_paths, results):
+            assert str(result).endswith(f"output/gemini/{file_path.name}")
+
+    def test_save_images_aggregates_failures(self, s3_image_repo):
+        def fail_for_second(**kwargs):
+            if kwargs["Key"].endswith("batch_1.png"):
+                raise Exception("S3 error")
+
+        s3_image_repo.s3_client.upload_fileobj.side_effect = fail_for_second
+        images = [Image.new("RGB", (10, 10), color=(i, 0, 0)) for i in range(3)]
+        file_paths = [Path(f"batch_{i}.png") for i in range(3)]
+
+        with pytest.raises(FileOperationError, match="Failed to save 1 of 3 images") as exc_info:
+            s3_image_repo.save_images(images, file_paths)
+        assert exc_info.value.file_path == "batch_1.png"
+        assert s3_image_repo.s3_client.upload_fileobj.call_count == 3
+
+    def test_save_images_bounds_encoded_buffers_in_flight(self, s3_image_repo):
+        s3_image_repo._inflight_buffers = threading.BoundedSemaphore(2)
+        lock = threading.Lock()
+        in_flight = {"current": 0, "max": 0}
+        encode_image = s3_image_repo._encode_image
+
+        def counting_encode(*args):
+            file_hash = encode_image(*args)
+            with lock:
+                in_flight["current"] += 1
+                in_flight["max"] = max(in_flight["max"], in_flight["current"])
+            return file_hash
+
+        def slow_upload(**kwargs):
+            time.sleep(0.01)
+            with lock:
+                in_flight["current"] -= 1
+
+        s3_image_repo.s3_client.upload_fileobj.side_effect = slow_upload
+        images = [Image.new("RGB", (10, 10), color=(i, 0, 0)) for i in range(8)]
+        with patch.object(s3_image_repo, "_encode_image", side_effect=counting_encode):
+            s3_image_repo.save_images(images, [Path(f"batch_{i}.png") for i in range(8)])
+
+        assert s3_image_repo.s3_client.upload_fileobj.call_count == 8
+        assert in_flight["max"] <= 2
+        assert s3_image_repo._inflight_buffers.acquire(blocking=False)
+        assert s3_image_repo._inflight_buffers.acquire(blocking=False)
+
+    def test_save_images_encode_failure(self, s3_image_repo, test_image):
+        broken_image = MagicMock()
+        broken_image.save.side_effect = OSError("encoder error")
+
+        with pytest.raises(FileOperationError, match="Failed to save 1 of 2 images"):
+            s3_image_repo.save_images([test_image, broken_image], [Path("a.png"), Path("b.png")])
+
+        s3_image_repo.s3_client.upload_fileobj.assert_called_once()
+
+    def test_save_images_length_mismatch(self, s3_image_repo, test_image):
+        with pytest.raises(ValidationError):
+            s3_image_repo.save_images([test_image], [Path("a.png"), Path("b.png")])
+
     # Private method tests removed - functionality tested indirectly through public methods
 
 
+class TestS3ClientManager:
+    @staticmethod
+    def _config(bucket: str = "test-bucket") -> Config:
+        config = MagicMock(spec=Config)
+        config.s3_bucket = bucket
+        config.s3_region = "us-east-1"
+        config.aws_access_key_id = "key"
+        config.aws_secret_access_key = "secret"
+        return config
+
+    def test_clients_are_shared_for_identical_settings(self):
+        with patch("boto3.client", side_effect=lambda **_: MagicMock()) as mock_client:
+            first = S3ClientManager.create_s3_client(self._config())
+            second = S3ClientManager.create_s3_client(self._config())
+
+        assert first is second
+        mock_client.assert_called_once()
+        first.head_bucket.assert_called_once_with(Bucket="test-bucket")
+
+    def test_cached_clients_are_returned_while_another_is_being_created(self):
+        with patch("boto3.client", return_value=MagicMock()):
+            cached = S3ClientManager.create_s3_client(self._config("bucket-a"))
+        validating = threading.Event()
+        release = threading.Event()
+        slow_client = MagicMock()
+
+        def slow_head_bucket(**_):
+            validating.set()
+            release.wait(timeout=5)
+
+        slow_client.head_bucket.side_effect = slow_head_bucket
+        with patch("boto3.client", return_value=slow_client):
+            creator = threading.Thread(
+                target=S3ClientManager.create_s3_client, args=(self._config("bucket-b"),)
+            )
+            creator.start()
+            assert validating.wait(timeout=5)
+            results = []
+            reader = threading.Thread(
+                target=lambda: results.append(
+                    S3ClientManager.create_s3_client(self._config("bucket-a"))
+                )
+            )
+            reader.start()
+            reader.join(timeout=1)
+            # Read while bucket-b is still being validated
+            returned_early = list(results)
+            release.set()
+            creator.join()
+            reader.join()
+
+        assert returned_early == [cached]
+
+    def test_first_created_client_wins_a_creation_race(self):
+        created = [MagicMock(), MagicMock()]
+        both_validating = threading.Barrier(2, timeout=5)
+        for client in created:
+            client.head_bucket.side_effect = lambda **_: both_validating.wait()
+        results = []
+
+        with patch("boto3.client", side_effect=created):
+            threads = [
+                threading.Thread(
+                    target=lambda: results.append(S3ClientManager.create_s3_client(self._config()))
+                )
+                for _ in created
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert len(results) == 2
+        assert results[0] is results[1]
+        assert S3ClientManager.create_s3_client(self._config()) is results[0]
+
+    def test_different_buckets_get_separate_clients(self):
+        with patch("boto3.client", side_effect=lambda **_: MagicMock()) as mock_client:
+            first = S3ClientManager.create_s3_client(self._config("bucket-a"))
+            second = S3ClientManager.create_s3_client(self._config("bucket-b"))
+
+        assert first is not second
+        assert mock_client.call_count == 2
+
+    def test_failed_creation_is_not_cached(self):
+        failing = MagicMock()
+        failing.head_bucket.side_effect = ClientError(
+            {"Error": {"Code": "InternalError", "Message": "boom"}}, "HeadBucket"
+        )
+        with patch("boto3.client", side_effect=[failing, MagicMock()]):
+            with pytest.raises(FileOperationError):
+                S3ClientManager.create_s3_client(self._config())
+            S3ClientManager.create_s3_client(self._config())
+
+    def test_connection_pool_is_sized_for_parallel_uploads(self):
+        with patch("boto3.client", return_value=MagicMock()) as mock_client:
+            S3ClientManager.create_s3_client(self._config())
+
+        boto_config = mock_client.call_args.kwargs["config"]
+        assert boto_config.max_pool_connections == MAX_POOL_CONNECTIONS
+
+    def test_client_uses_short_timeouts_and_adaptive_retries(self):
+        with patch("boto3.client", return_value=MagicMock()) as mock_client:
+            S3ClientManager.create_s3_client(self._config())
+
+        boto_config = mock_client.call_args.kwargs["config"]
+        assert boto_config.connect_timeout == CONNECT_TIMEOUT_SECONDS
+        assert boto_config.read_timeout == READ_TIMEOUT_SECONDS
+        assert boto_config.retries == {"max_attempts": MAX_RETRY_ATTEMPTS, "mode": "adaptive"}
+        assert boto_config.tcp_keepalive is True
+
+    def test_hash_cache_keeps_first_key_per_hash(self):
+        mock_client = MagicMock()
+        mock_client.get_paginator.return_value.paginate.return_value = [
+            {"Contents": [{"Key": "input/"}, {"Key": "input/a.png"}, {"Key": "input/b.png"}]},
+            {},
+            {"Contents": [{"Key": "input/c.png"}, {"Key": "input/d.png"}]},
+        ]
+        hashes = {"input/a.png": "h1", "input/b.png": "h2", "input/c.png": "h1"}
+
+        def head_object(Bucket, Key):  # pylint: disable=invalid-name,unused-argument
+            if Key == "input/d.png":
+                raise ClientError({"Error": {"Code": "403", "Message": "denied"}}, "HeadObject")
+            return {"Metadata": {"sha256": hashes[Key]}}
+
+        mock_client.head_object.side_effect = head_object
+
+        cache = build_s3_hash_cache(mock_client, "test-bucket", "input/")
+
+        assert cache == {"h1": "input/a.png", "h2": "input/b.png"}
+        assert mock_client.head_object.call_count == 4
+
+
 class TestS3FileRepository:
     """Test S3FileRepository functionality."""
 
+    @patch("stable_delusion.repositories.s3_file_repository.get_current_timestamp")
+    def test_save_uploaded_files_formats_timestamp_once(self, mock_timestamp, s3_file_repo):
+        mock_timestamp.return_value = "251016-12:00:00"
+        files = [
+            FileStorage(stream=io.BytesIO(b"1"), filename="photo.png", content_type="image/png")
+            for _ in range(3)
+        ]
+
+        result = s3_file_repo.save_uploaded_files(files, Path("uploads"))
+
+        mock_timestamp.assert_called_once_with("compact")
+        assert [path.name for path in result] == ["photo.png", "photo_1.png", "photo_2.png"]
+
     def test_exists_true(self, s3_file_repo):
         s3_file_repo.s3_client.head_object.return_value = {"ContentLength": 1024}
 
@@ -426,6 +806,23 @@ class TestS3RepositoryIntegration:
                     assert isinstance(image_repo, S3ImageRepository)
                     assert isinstance(file_repo, S3FileRepository)
 
+    def test_repository_builders_use_passed_config(self, s3_config):
+        with patch("stable_delusion.builders.ConfigManager.get_config") as mock_config:
+            with patch(
+                "stable_delusion.repositories.s3_image_repository.S3ClientManager.create_s3_client"
+            ):
+                with patch(
+                    "stable_delusion.repositories.s3_file_repository.S3ClientManager.create_s3_client"  # noqa: E501  # pylint: disable=line-too-long
+                ):
+                    from stable_delusion import builders
+
+                    image_repo = builders.create_image_repository(config=s3_config)
+                    file_repo = builders.create_file_repository(config=s3_config)
+
+        mock_config.assert_not_called()
+        assert isinstance(image_repo, S3ImageRepository)
+        assert isinstance(file_repo, S3FileRepository)
+
     def test_configuration_validation_in_repositories(self, s3_config):
         # Test with valid config
         with patch(
@@ -5,11 +5,13 @@ Tests S3 upload functionality, image URL handling, and service integration.
 
 __author__ = "Lene Preuss <lene.preuss@gmail.com>"
 
+import time
 from pathlib import Path
-from unittest.mock import Mock, patch
+from unittest.mock import ANY, Mock, patch
 
 import pytest
 
+from stable_delusion.repositories.s3_client import TRANSFER_CONFIG
 from stable_delusion.services.seedream_service import SeedreamImageGenerationService
 from stable_delusion.models.requests import GenerateImageRequest
 from stable_delusion.models.responses import GenerateImageResponse
@@ -43,50 +45,88 @@ class TestSeedreamImageGenerationService:  # pylint: disable=too-many-public-met
         )
 
     def test_upload_images_to_s3_success(
-        self, service_with_s3_repo, mock_pil_image_context_manager, mock_s3_file_repository
+        self, service_with_s3_repo, tmp_path, mock_s3_file_repository
     ):
-        test_images = [Path("/tmp/test1.jpg"), Path("/tmp/test2.jpg")]
-
-        with patch("PIL.Image.open", return_value=mock_pil_image_context_manager):
+        test_images = [tmp_path / name for name in ["test1.jpg", "test2.jpg"]]
+        for image_path in test_images:
+            image_path.write_bytes(b"fake jpeg data")
+
+        with patch(
+            "stable_delusion.services.seedream_service.generate_timestamped_filename",
+            side_effect=["file1.jpg", "file2.jpg"],
+        ):
             with patch(
-                "stable_delusion.utils.generate_timestamped_filename",
-                side_effect=["file1.jpg", "file2.jpg"],
+                "stable_delusion.services.seedream_service.S3FileRepository",
+                return_value=mock_s3_file_repository,
             ):
                 with patch(
-                    "stable_delusion.repositories.s3_file_repository.S3FileRepository",
-                    return_value=mock_s3_file_repository,
+                    "stable_delusion.services.seedream_service.optimize_image_size",
+                    side_effect=lambda path, **kwargs: path,
                 ):
-                    with patch(
-                        "stable_delusion.utils.optimize_image_size",
-                        side_effect=lambda path, **kwargs: path,
-                    ):
-                        urls = service_with_s3_repo.upload_images_to_s3(test_images)
+                    urls = service_with_s3_repo.upload_images_to_s3(test_images)
 
         assert len(urls) == 2
         assert all(url.startswith("https://") or url.startswith("s3://") for url in urls)
+        upload_call = mock_s3_file_repository.s3_client.upload_fileobj.call_args
+        assert upload_call.kwargs["Config"] is TRANSFER_CONFIG
+        assert upload_call.kwargs["ExtraArgs"]["Metadata"]["uploaded_by"] == "stable-delusion"
 
     def test_upload_images_to_s3_url_normalization_fix(
-        self, service_with_s3_repo, mock_pil_image_context_manager, mock_s3_file_repository
+        self, service_with_s3_repo, tmp_path, mock_s3_file_repository
     ):
-        test_images = [Path("/tmp/test.jpg")]
-
-        with patch("PIL.Image.open", return_value=mock_pil_image_context_manager):
+        test_images = [tmp_path / "test.jpg"]
+        for image_path in test_images:
+            image_path.write_bytes(b"fake jpeg data")
+
+        with patch(
+            "stable_delusion.services.seedream_service.generate_timestamped_filename",
+            return_value="file.jpg",
+        ):
             with patch(
-                "stable_delusion.utils.generate_timestamped_filename", return_value="file.jpg"
+                "stable_delusion.services.seedream_service.S3FileRepository",
+                return_value=mock_s3_file_repository,
             ):
                 with patch(
-                    "stable_delusion.repositories.s3_file_repository.S3FileRepository",
-                    return_value=mock_s3_file_repository,
+                    "stable_delusion.services.seedream_service.optimize_image_size",
+                    side_effect=lambda path, **kwargs: path,
                 ):
-                    with patch(
-                        "stable_delusion.utils.optimize_image_size",
-                        side_effect=lambda path, **kwargs: path,
-                    ):
-                        urls = service_with_s3_repo.upload_images_to_s3(test_images)
+                    urls = service_with_s3_repo.upload_images_to_s3(test_images)
 
         assert len(urls) == 1
         assert urls[0].startswith("https://") or urls[0].startswith("s3://")
 
+    def test_upload_images_to_s3_parallel_preserves_order(self, service_with_s3_repo):
+        test_images = [Path(f"/tmp/test{i}.jpg") for i in range(8)]
+
+        def slow_upload(image_path, _s3_filename, _timestamp):
+            # Later images finish first, so completion order differs from input order
+            time.sleep(0.01 * (8 - int(image_path.stem[4:])))
+            return f"https://bucket.s3.amazonaws.com/{image_path.name}"
+
+        with patch.object(
+            service_with_s3_repo, "_upload_single_image_to_s3", side_effect=slow_upload
+        ):
+            urls = service_with_s3_repo.upload_images_to_s3(test_images)
+
+        assert urls == [f"https://bucket.s3.amazonaws.com/test{i}.jpg" for i in range(8)]
+
+    def test_upload_images_to_s3_parallel_failure_raises(self, service_with_s3_repo):
+        test_images = [Path(f"/tmp/test{i}.jpg") for i in range(4)]
+
+        def fail_for_second(image_path, _s3_filename, _timestamp):
+            if image_path.name == "test1.jpg":
+                raise OSError("disk error")
+            return f"https://bucket.s3.amazonaws.com/{image_path.name}"
+
+        with patch.object(
+            service_with_s3_repo, "_upload_single_image_to_s3", side_effect=fail_for_second
+        ):
+            with pytest.raises(ConfigurationError) as exc_info:
+                service_with_s3_repo.upload_images_to_s3(test_images)
+
+        assert "test1.jpg" in str(exc_info.value)
+        assert exc_info.value.config_key == "s3_upload"
+
     def test_upload_images_to_s3_no_repository_fails(self, service_no_repo):
         test_images = [Path("/tmp/test.jpg")]
 
@@ -118,33 +158,34 @@ class TestSeedreamImageGenerationService:  # pylint: disable=too-many-public-met
     def test_upload_images_to_s3_s3_upload_error_handling(
         self,
         service_with_s3_repo,
-        mock_pil_image_context_manager,
+        tmp_path,
         mock_config_with_s3,
         mock_s3_file_repository,
     ):
-        test_images = [Path("/tmp/test.jpg")]
-        mock_pil_image_context_manager.format = "JPEG"
+        test_images = [tmp_path / "test.jpg"]
+        for image_path in test_images:
+            image_path.write_bytes(b"fake jpeg data")
 
-        mock_s3_file_repository.s3_client.put_object.side_effect = Exception("S3 upload failed")
+        mock_s3_file_repository.s3_client.upload_fileobj.side_effect = Exception("S3 upload failed")
 
-        with patch("PIL.Image.open", return_value=mock_pil_image_context_manager):
+        with patch(
+            "stable_delusion.services.seedream_service.generate_timestamped_filename",
+            return_value="file.jpg",
+        ):
             with patch(
-                "stable_delusion.utils.generate_timestamped_filename", return_value="file.jpg"
+                "stable_delusion.services.seedream_service.ConfigManager.get_config",
+                return_value=mock_config_with_s3,
             ):
                 with patch(
-                    "stable_delusion.services.seedream_service.ConfigManager.get_config",
-                    return_value=mock_config_with_s3,
+                    "stable_delusion.services.seedream_service.S3FileRepository",
+                    return_value=mock_s3_file_repository,
                 ):
                     with patch(
-                        "stable_delusion.repositories.s3_file_repository.S3FileRepository",
-                        return_value=mock_s3_file_repository,
+                        "stable_delusion.services.seedream_service.optimize_image_size",
+                        side_effect=lambda path, **kwargs: path,
                     ):
-                        with patch(
-                            "stable_delusion.utils.optimize_image_size",
-                            side_effect=lambda path, **kwargs: path,
-                        ):
-                            with pytest.raises(ConfigurationError) as exc_info:
-                                service_with_s3_repo.upload_images_to_s3(test_images)
+                        with pytest.raises(ConfigurationError) as exc_info:
+                            service_with_s3_repo.upload_images_to_s3(test_images)
 
         assert "Failed to upload image" in str(exc_info.value)
         assert "S3 upload failed" in str(exc_info.value)
@@ -262,48 +303,129 @@ class TestSeedreamImageGenerationService:  # pylint: disable=too-many-public-met
         assert exc_info.value.config_key == "SEEDREAM_API_KEY"
 
     def test_upload_images_to_s3_timestamped_filenames(
-        self, service_with_s3_repo, mock_pil_image_context_manager, mock_s3_file_repository
+        self, service_with_s3_repo, tmp_path, mock_s3_file_repository
     ):
-        test_images = [Path("/tmp/base.jpg")]
+        test_images = [tmp_path / "base.jpg"]
+        for image_path in test_images:
+            image_path.write_bytes(b"fake jpeg data")
+
+        with patch(
+            "stable_delusion.services.seedream_service.generate_timestamped_filename",
+            return_value="base_2025-09-27-12:34:56.jpg",
+        ) as mock_timestamp:
+            with patch(
+                "stable_delusion.services.seedream_service.S3FileRepository",
+                return_value=mock_s3_file_repository,
+            ):
+                with patch(
+                    "stable_delusion.services.seedream_service.optimize_image_size",
+                    side_effect=lambda path, **kwargs: path,
+                ):
+                    service_with_s3_repo.upload_images_to_s3(test_images)
 
-        with patch("PIL.Image.open", return_value=mock_pil_image_context_manager):
+        mock_timestamp.assert_called_once_with("base", "jpg", timestamp=ANY)
+
+    def test_upload_images_to_s3_batch_shares_timestamp(
+        self, service_with_s3_repo, tmp_path, mock_s3_file_repository
+    ):
+        test_images = [tmp_path / f"test{i}.jpg" for i in range(3)]
+        for image_path in test_images:
+            image_path.write_bytes(f"fake jpeg data {image_path.name}".encode())
+
+        with patch(
+            "stable_delusion.services.seedream_service.get_current_timestamp",
+            return_value="2025-09-27-12:34:56",
+        ) as mock_current_timestamp:
             with patch(
-                "stable_delusion.utils.generate_timestamped_filename",
-                return_value="base_2025-09-27-12:34:56.jpg",
-            ) as mock_timestamp:
+                "stable_delusion.services.seedream_service.S3FileRepository",
+                return_value=mock_s3_file_repository,
+            ):
                 with patch(
-                    "stable_delusion.repositories.s3_file_repository.S3FileRepository",
-                    return_value=mock_s3_file_repository,
+                    "stable_delusion.services.seedream_service.optimize_image_size",
+                    side_effect=lambda path, **kwargs: path,
                 ):
-                    with patch(
-                        "stable_delusion.utils.optimize_image_size",
-                        side_effect=lambda path, **kwargs: path,
-                    ):
-                        service_with_s3_repo.upload_images_to_s3(test_images)
+                    urls = service_with_s3_repo.upload_images_to_s3(test_images)
 
-        mock_timestamp.assert_called_once_with("base", "jpg")
+        mock_current_timestamp.assert_called_once_with("filename")
+        for i, url in enumerate(urls):
+            assert url.endswith(f"/input/test{i}_2025-09-27-12:34:56.jpg")
 
-    def test_upload_images_to_s3_path_structure(
-        self, service_with_s3_repo, mock_pil_image_context_manager, mock_s3_file_repository
+    def test_upload_images_to_s3_same_named_inputs_get_distinct_keys(
+        self, service_with_s3_repo, tmp_path, mock_s3_file_repository
     ):
-        test_images = [Path("/tmp/test.jpg")]
+        test_images = [tmp_path / "a" / "photo.png", tmp_path / "b" / "photo.png"]
+        for image_path in test_images:
+            image_path.parent.mkdir()
+            image_path.write_bytes(f"fake png data {image_path.parent.name}".encode())
+
+        with patch(
+            "stable_delusion.services.seedream_service.get_current_timestamp",
+            return_value="2025-09-27-12:34:56",
+        ):
+            with patch(
+                "stable_delusion.services.seedream_service.S3FileRepository",
+                return_value=mock_s3_file_repository,
+            ):
+                with patch(
+                    "stable_delusion.services.seedream_service.optimize_image_size",
+                    side_effect=lambda path, **kwargs: path,
+                ):
+                    urls = service_with_s3_repo.upload_images_to_s3(test_images)
+
+        keys = [
+            call.kwargs["Key"]
+            for call in mock_s3_file_repository.s3_client.upload_fileobj.call_args_list
+        ]
+        assert sorted(keys) == [
+            "input/photo_2025-09-27-12:34:56.png",
+            "input/photo_2025-09-27-12:34:56_1.png",
+        ]
+        assert urls[0].endswith("/input/photo_2025-09-27-12:34:56.png")
+        assert urls[1].endswith("/input/photo_2025-09-27-12:34:56_1.png")
 
-        with patch("PIL.Image.open", return_value=mock_pil_image_context_manager):
+    def test_upload_images_to_s3_path_structure(
+        self, service_with_s3_repo, tmp_path, mock_s3_file_repository
+    ):
+        test_images = [tmp_path / "test.jpg"]
+        for image_path in test_images:
+            image_path.write_bytes(b"fake jpeg data")
+
+        with patch(
+            "stable_delusion.services.seedream_service.generate_timestamped_filename",
+            return_value="file.jpg",
+        ):
             with patch(
-                "stable_delusion.utils.generate_timestamped_filename", return_value="file.jpg"
+                "stable_delusion.services.seedream_service.S3FileRepository",
+                return_value=mock_s3_file_repository,
             ):
                 with patch(
-                    "stable_delusion.repositories.s3_file_repository.S3FileRepository",
-                    return_value=mock_s3_file_repository,
+                    "stable_delusion.services.seedream_service.optimize_image_size",
+                    side_effect=lambda path, **kwargs: path,
                 ):
-                    with patch(
-                        "stable_delusion.utils.optimize_image_size",
-                        side_effect=lambda path, **kwargs: path,
-                    ):
-                        urls = service_with_s3_repo.upload_images_to_s3(test_images)
+                    urls = service_with_s3_repo.upload_images_to_s3(test_images)
 
         assert len(urls) == 1
 
+    def test_upload_images_to_s3_reuses_file_repository(
+        self, service_with_s3_repo, tmp_path, mock_s3_file_repository
+    ):
+        test_images = [tmp_path / f"test{i}.jpg" for i in range(3)]
+        for image_path in test_images:
+            image_path.write_bytes(b"fake jpeg data")
+
+        with patch(
+            "stable_delusion.services.seedream_service.S3FileRepository",
+            return_value=mock_s3_file_repository,
+        ) as mock_repo_class:
+            with patch(
+                "stable_delusion.services.seedream_service.optimize_image_size",
+                side_effect=lambda path, **kwargs: path,
+            ):
+                service_with_s3_repo.upload_images_to_s3(test_images)
+                service_with_s3_repo.upload_images_to_s3(test_images[:1])
+
+        mock_repo_class.assert_called_once()
+
     @patch("stable_delusion.config.ConfigManager.get_config")
     def test_generated_image_uploaded_to_s3(self, mock_config, service_with_s3_repo):
         """Test that generated images are uploaded to S3 when storage type is s3."""
@@ -315,30 +437,29 @@ class TestSeedreamImageGenerationService:  # pylint: disable=too-many-public-met
             "/tmp/generated_image.png"
         )
 
-        # Mock PIL Image.open for the upload
-        mock_image = Mock()
-        mock_image.__enter__ = Mock(return_value=mock_image)
-        mock_image.__exit__ = Mock(return_value=None)
-
-        with patch("PIL.Image.open", return_value=mock_image):
-            # Mock S3 repository save_image to return S3 path
-            service_with_s3_repo.image_repository.save_image.return_value = Path(
-                "https://bucket.s3.region.amazonaws.com/output/seedream/generated_image.png"
-            )
+        # The generated file is uploaded as-is, without decoding it
+        service_with_s3_repo.image_repository.save_image_file.return_value = Path(
+            "https://bucket.s3.region.amazonaws.com/output/seedream/generated_image.png"
+        )
 
-            request = GenerateImageRequest(
-                prompt="Test prompt",
-                images=[],
-                model="seedream",
-                storage_type="s3",
-            )
+        request = GenerateImageRequest(
+            prompt="Test prompt",
+            images=[],
+            model="seedream",
+            storage_type="s3",
+        )
 
+        with patch("PIL.Image.open") as mock_open:
             response = service_with_s3_repo.generate_image(request)
 
-            # Verify the image was uploaded to S3
-            service_with_s3_repo.image_repository.save_image.assert_called_once()
-            # Verify response contains S3 path
-            assert "s3" in str(response.image_config.generated_file).lower()
+        # Verify the image was uploaded to S3
+        service_with_s3_repo.image_repository.save_image_file.assert_called_once_with(
+            Path("/tmp/generated_image.png")
+        )
+        service_with_s3_repo.image_repository.save_image.assert_not_called()
+        mock_open.assert_not_called()
+        # Verify response contains S3 path
+        assert "s3" in str(response.image_config.generated_file).lower()
 
     @patch("stable_delusion.config.ConfigManager.get_config")
     def test_metadata_creation_for_seedream(self, mock_config, service_with_s3_repo):
@@ -0,0 +1,37 @@
+"""
+Tests for lazy loading of concrete services from the services package.
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+import stable_delusion.services as services
+from stable_delusion.services.gemini_service import GeminiImageGenerationService
+from stable_delusion.services.upscaling_service import VertexAIUpscalingService
+
+
+class TestServicesPackage:
+    """Test the PEP 562 lazy attribute loading in stable_delusion.services."""
+
+    def test_package_import_does_not_load_concrete_services(self):
+        code = (
+            "import sys, stable_delusion.services; "
+            "print('stable_delusion.services.gemini_service' in sys.modules, "
+            "'stable_delusion.services.upscaling_service' in sys.modules)"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+
+        assert result.stdout.strip() == "False False"
+
+    def test_lazy_attributes_resolve_to_service_classes(self):
+        assert services.GeminiImageGenerationService is GeminiImageGenerationService
+        assert services.VertexAIUpscalingService is VertexAIUpscalingService
+        assert set(services.__all__) <= set(dir(services))
+
+    def test_unknown_attribute_raises(self):
+        with pytest.raises(AttributeError, match="NoSuchService"):
+            getattr(services, "NoSuchService")
@@ -0,0 +1,52 @@
+"""
+Unit tests for the size-bounded LRU cache used by repositories.
+"""
+
+from stable_delusion.repositories.sized_lru_cache import SizedLRUCache
+
+
+class TestSizedLRUCache:
+    def test_get_returns_stored_value(self):
+        cache: SizedLRUCache[str, bytes] = SizedLRUCache(maxsize=4, max_bytes=100)
+        cache.put("a", b"aaa", 3)
+
+        assert cache.get("a") == b"aaa"
+        assert cache.get("missing") is None
+
+    def test_evicts_least_recently_used_beyond_maxsize(self):
+        cache: SizedLRUCache[str, int] = SizedLRUCache(maxsize=2, max_bytes=100)
+        cache.put("a", 1, 1)
+        cache.put("b", 2, 1)
+        cache.get("a")
+        cache.put("c", 3, 1)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_evicts_until_total_bytes_fit(self):
+        cache: SizedLRUCache[str, int] = SizedLRUCache(maxsize=10, max_bytes=10)
+        cache.put("a", 1, 4)
+        cache.put("b", 2, 4)
+        cache.put("c", 3, 4)
+
+        assert cache.get("a") is None
+        assert cache.total_bytes == 8
+        assert len(cache) == 2
+
+    def test_oversized_value_is_not_stored(self):
+        cache: SizedLRUCache[str, int] = SizedLRUCache(maxsize=10, max_bytes=10)
+        cache.put("big", 1, 11)
+
+        assert cache.get("big") is None
+        assert cache.total_bytes == 0
+
+    def test_replacing_and_invalidating_keep_size_accounting(self):
+        cache: SizedLRUCache[str, int] = SizedLRUCache(maxsize=10, max_bytes=10)
+        cache.put("a", 1, 4)
+        cache.put("a", 2, 6)
+        assert cache.total_bytes == 6
+
+        cache.invalidate("a")
+        assert cache.total_bytes == 0
+        assert len(cache) == 0
@@ -0,0 +1,57 @@
+"""
+Unit tests for the TTLCache used by repositories.
+"""
+
+from unittest.mock import patch
+
+from stable_delusion.repositories.ttl_cache import TTLCache
+
+
+class TestTTLCache:
+    """Test TTLCache expiry, eviction and invalidation."""
+
+    def test_get_returns_stored_value(self):
+        cache: TTLCache[str, bool] = TTLCache(ttl_seconds=60)
+        cache.set("key", False)
+
+        assert cache.get("key") is False
+        assert cache.get("missing") is None
+
+    @patch("stable_delusion.repositories.ttl_cache.time.monotonic")
+    def test_entries_expire(self, mock_monotonic):
+        mock_monotonic.return_value = 100.0
+        cache: TTLCache[str, bool] = TTLCache(ttl_seconds=5)
+        cache.set("key", True)
+
+        mock_monotonic.return_value = 104.9
+        assert cache.get("key") is True
+        mock_monotonic.return_value = 105.0
+        assert cache.get("key") is None
+        assert len(cache) == 0
+
+    def test_disabled_cache_stores_nothing(self):
+        cache: TTLCache[str, bool] = TTLCache(ttl_seconds=0)
+        cache.set("key", True)
+
+        assert not cache.enabled
+        assert cache.get("key") is None
+
+    def test_evicts_oldest_entry_when_full(self):
+        cache: TTLCache[str, int] = TTLCache(ttl_seconds=60, maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.set("c", 3)
+
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+        assert cache.get("c") == 3
+
+    def test_invalidate_and_clear(self):
+        cache: TTLCache[str, int] = TTLCache(ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+
+        cache.invalidate("a")
+        assert cache.get("a") is None
+        cache.clear()
+        assert len(cache) == 0
@@ -1,17 +1,33 @@
 """Unit tests for image upscaling functionality using Google Vertex AI."""
 
 import argparse
+import base64
+import io
 import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
 import requests
 from PIL import Image
+from urllib3.exceptions import MaxRetryError, ReadTimeoutError
 
 from stable_delusion.config import DEFAULT_LOCATION, DEFAULT_PROJECT_ID
 from stable_delusion.exceptions import UpscalingError, APIError
-from stable_delusion.upscale import upscale_image
+from stable_delusion import upscale
+from stable_delusion.upscale import (
+    _SESSION,
+    B64_CHUNK_SIZE,
+    _read_upscaled_base64,
+    _refresh_in_background,
+    _encode_file_base64,
+    _get_authenticated_headers,
+    save_upscaled_data,
+    upscale_image,
+)
 
 sys.path.append("stable_delusion")
 
@@ -19,11 +35,12 @@ sys.path.append("stable_delusion")
 class TestUpscaleImage:
     """Test cases for image upscaling functionality."""
 
-    @patch("stable_delusion.upscale.requests.post")
+    @patch("stable_delusion.upscale._SESSION.post")
     @patch("stable_delusion.upscale.default")
     def test_upscale_image_success_x2(self, mock_default, mock_post):
         # Mock authentication
         mock_credentials = MagicMock()
+        mock_credentials.valid = False  # fresh credentials carry no token yet
         mock_credentials.token = "test-token"  # nosec B105 - test-only mock credential
         mock_default.return_value = (mock_credentials, None)
 
@@ -34,8 +51,8 @@ class TestUpscaleImage:
         }
         mock_post.return_value = mock_response
 
-        # Mock Path.read_bytes and PIL Image operations
-        with patch.object(Path, "read_bytes", return_value=b"test_image_data"):
+        # Mock the image file and PIL Image operations
+        with patch.object(Path, "open", return_value=io.BytesIO(b"test_image_data")):
             with patch("stable_delusion.upscale.Image.open") as mock_image_open:
                 mock_image = MagicMock(spec=Image.Image)
                 mock_image_open.return_value = mock_image
@@ -69,11 +86,12 @@ class TestUpscaleImage:
                         # Check result
                         assert result == mock_image
 
-    @patch("stable_delusion.upscale.requests.post")
+    @patch("stable_delusion.upscale._SESSION.post")
     @patch("stable_delusion.upscale.default")
     def test_upscale_image_success_x4(self, mock_default, mock_post):
         # Mock authentication
         mock_credentials = MagicMock()
+        mock_credentials.valid = False  # fresh credentials carry no token yet
         mock_credentials.token = "test-token"  # nosec B105 - test-only mock credential
         mock_default.return_value = (mock_credentials, None)
 
@@ -85,7 +103,7 @@ class TestUpscaleImage:
         mock_post.return_value = mock_response
 
         # Mock PIL Image operations
-        with patch.object(Path, "read_bytes", return_value=b"test_image_data"):
+        with patch.object(Path, "open", return_value=io.BytesIO(b"test_image_data")):
             with patch("stable_delusion.upscale.Image.open") as mock_image_open:
                 mock_image = MagicMock(spec=Image.Image)
                 mock_image_open.return_value = mock_image
@@ -103,23 +121,25 @@ class TestUpscaleImage:
                         payload = call_args[1]["json"]
                         assert payload["parameters"]["upscaleConfig"]["upscaleFactor"] == "x4"
 
-    @patch("stable_delusion.upscale.requests.post")
+    @patch("stable_delusion.upscale._SESSION.post")
     @patch("stable_delusion.upscale.default")
     def test_upscale_image_file_not_found(self, mock_default, _mock_post):
         # Mock authentication
         mock_credentials = MagicMock()
+        mock_credentials.valid = False  # fresh credentials carry no token yet
         mock_default.return_value = (mock_credentials, None)
 
         # Mock file not found
-        with patch.object(Path, "read_bytes", side_effect=FileNotFoundError):
+        with patch.object(Path, "open", side_effect=FileNotFoundError):
             with pytest.raises(UpscalingError, match="Failed to read image file"):
                 upscale_image(Path("nonexistent.jpg"), "test-project")
 
-    @patch("stable_delusion.upscale.requests.post")
+    @patch("stable_delusion.upscale._SESSION.post")
     @patch("stable_delusion.upscale.default")
     def test_upscale_image_api_error(self, mock_default, mock_post):
         # Mock authentication
         mock_credentials = MagicMock()
+        mock_credentials.valid = False  # fresh credentials carry no token yet
         mock_default.return_value = (mock_credentials, None)
 
         # Mock API error
@@ -129,7 +149,7 @@ class TestUpscaleImage:
         mock_response.text = "Internal Server Error"
         mock_post.return_value = mock_response
 
-        with patch.object(Path, "read_bytes", return_value=b"test_data"):
+        with patch.object(Path, "open", return_value=io.BytesIO(b"test_data")):
             with pytest.raises(APIError, match="Upscaling API request failed"):
                 upscale_image(Path("test.jpg"), "test-project")
 
@@ -141,11 +161,12 @@ class TestUpscaleImage:
         with pytest.raises(Exception, match="Authentication failed"):
             upscale_image(Path("test.jpg"), "test-project")
 
-    @patch("stable_delusion.upscale.requests.post")
+    @patch("stable_delusion.upscale._SESSION.post")
     @patch("stable_delusion.upscale.default")
     def test_upscale_image_default_location(self, mock_default, mock_post):
         # Mock authentication
         mock_credentials = MagicMock()
+        mock_credentials.valid = False  # fresh credentials carry no token yet
         mock_credentials.token = "test-token"  # nosec B105 - test-only mock credential
         mock_default.return_value = (mock_credentials, None)
 
@@ -154,7 +175,7 @@ class TestUpscaleImage:
         mock_response.json.return_value = {"predictions": [{"bytesBase64Encoded": "dGVzdA=="}]}
         mock_post.return_value = mock_response
 
-        with patch.object(Path, "read_bytes", return_value=b"test"):
+        with patch.object(Path, "open", return_value=io.BytesIO(b"test")):
 
             with patch("stable_delusion.upscale.Image.open"):
                 with patch("stable_delusion.upscale.base64.b64encode"):
@@ -171,17 +192,18 @@ class TestUpscaleImage:
     def test_upscale_image_headers_format(self):
         with patch("stable_delusion.upscale.default") as mock_default:
             mock_credentials = MagicMock()
+            mock_credentials.valid = False  # fresh credentials carry no token yet
             mock_credentials.token = "test-bearer-token"  # nosec B105 - test-only mock
             mock_default.return_value = (mock_credentials, None)
 
-            with patch("stable_delusion.upscale.requests.post") as mock_post:
+            with patch("stable_delusion.upscale._SESSION.post") as mock_post:
                 mock_response = MagicMock()
                 mock_response.json.return_value = {
                     "predictions": [{"bytesBase64Encoded": "dGVzdA=="}]
                 }
                 mock_post.return_value = mock_response
 
-                with patch.object(Path, "read_bytes", return_value=b"test"):
+                with patch.object(Path, "open", return_value=io.BytesIO(b"test")):
 
                     with patch("stable_delusion.upscale.Image.open"):
                         with patch("stable_delusion.upscale.base64.b64encode"):
@@ -197,6 +219,247 @@ class TestUpscaleImage:
                                 assert headers["Content-Type"] == "application/json"
 
 
+class TestEncodeFileBase64:
+    """Test cases for block-wise base64 encoding of input images."""
+
+    @pytest.mark.parametrize(
+        "size", [0, 1, B64_CHUNK_SIZE - 1, B64_CHUNK_SIZE, 3 * B64_CHUNK_SIZE + 2]
+    )
+    def test_matches_single_shot_encoding(self, tmp_path, size):
+        image_path = tmp_path / "image.png"
+        data = bytes(i % 251 for i in range(size))
+        image_path.write_bytes(data)
+
+        assert _encode_file_base64(image_path) == base64.b64encode(data).decode("ascii")
+
+    def test_unmappable_stream_is_encoded_in_blocks(self):
+        data = bytes(range(256)) * 1000
+
+        with patch.object(Path, "open", return_value=io.BytesIO(data)):
+            encoded = _encode_file_base64(Path("stream.png"))
+
+        assert encoded == base64.b64encode(data).decode("ascii")
+
+
+class TestSaveUpscaledData:
+    """Test cases for writing upscaled image data to disk."""
+
+    @staticmethod
+    def _png_bytes() -> bytes:
+        buffer = io.BytesIO()
+        Image.new("RGB", (4, 4), color="green").save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    def test_png_data_is_written_unchanged(self, tmp_path):
+        data = self._png_bytes()
+        output_path = tmp_path / "upscaled_image.png"
+
+        with patch("stable_delusion.upscale.Image.open") as mock_open_image:
+            save_upscaled_data(data, output_path)
+
+        mock_open_image.assert_not_called()
+        assert output_path.read_bytes() == data
+
+    def test_other_formats_are_converted(self, tmp_path):
+        output_path = tmp_path / "upscaled_image.jpg"
+
+        save_upscaled_data(self._png_bytes(), output_path)
+
+        with Image.open(output_path) as saved:
+            assert saved.format == "JPEG"
+            assert saved.size == (4, 4)
+
+
+class TestReadUpscaledBase64:
+    """Test cases for extracting the image payload from the API response."""
+
+    def test_parses_full_json_without_ijson(self):
+        response = MagicMock()
+        response.json.return_value = {"predictions": [{"bytesBase64Encoded": "aW1n"}]}
+
+        with patch.object(upscale, "IJSON_AVAILABLE", False):
+            assert _read_upscaled_base64(response) == "aW1n"
+
+    def test_streams_payload_with_ijson(self):
+        response = MagicMock()
+        fake_ijson = MagicMock()
+        fake_ijson.items.return_value = iter(["aW1n", "b3RoZXI="])
+
+        with patch.object(upscale, "IJSON_AVAILABLE", True), patch.object(
+            upscale, "ijson", fake_ijson
+        ):
+            assert _read_upscaled_base64(response) == "aW1n"
+
+        fake_ijson.items.assert_called_once_with(
+            response.raw, "predictions.item.bytesBase64Encoded"
+        )
+        response.json.assert_not_called()
+        response.close.assert_called_once()
+
+    def test_streamed_response_without_predictions_is_a_key_error(self):
+        fake_ijson = MagicMock()
+        fake_ijson.items.return_value = iter([])
+
+        with patch.object(upscale, "IJSON_AVAILABLE", True), patch.object(
+            upscale, "ijson", fake_ijson
+        ):
+            with pytest.raises(KeyError):
+                _read_upscaled_base64(MagicMock())
+
+
+class TestHttpSession:
+    """Test cases for the shared HTTP session used for upscale requests."""
+
+    def test_https_adapter_retries_transient_failures(self):
+        retries = _SESSION.get_adapter("https://example.com").max_retries
+
+        assert retries.total == 3
+        assert {429, 503}.issubset(retries.status_forcelist)
+        assert "POST" in retries.allowed_methods
+        assert retries.raise_on_status is False
+
+    def test_https_adapter_does_not_retry_read_errors(self):
+        retries = _SESSION.get_adapter("https://example.com").max_retries
+
+        assert retries.read == 0
+        with pytest.raises(MaxRetryError):
+            retries.increment("POST", "/upscale", error=ReadTimeoutError(None, "/upscale", "t"))
+
+
+class _FakeCredentials:
+    """Minimal stand-in for google-auth credentials that records how it was refreshed."""
+
+    def __init__(self, error=None):
+        self.valid = True
+        self.token = "cached-token"  # nosec B105 - test-only mock credential
+        self.expiry = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(hours=1)
+        self.refreshed_under_lock = None
+        self._error = error
+
+    def refresh(self, _request):
+        self.refreshed_under_lock = upscale._credentials_lock.locked()
+        if self._error is not None:
+            raise self._error
+        self.token = "renewed-token"  # nosec B105 - test-only mock credential
+        self.expiry = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(hours=1)
+
+
+class TestCredentialCache:
+    """Test cases for reuse of Google Cloud credentials between upscale calls."""
+
+    @staticmethod
+    def _credentials(expires_in: timedelta) -> MagicMock:
+        credentials = MagicMock()
+        credentials.valid = True
+        credentials.token = "cached-token"  # nosec B105 - test-only mock credential
+        credentials.expiry = datetime.now(timezone.utc).replace(tzinfo=None) + expires_in
+        return credentials
+
+    @patch("stable_delusion.upscale.default")
+    def test_valid_token_is_reused_without_refresh(self, mock_default):
+        credentials = self._credentials(timedelta(hours=1))
+        mock_default.return_value = (credentials, None)
+
+        first = _get_authenticated_headers()
+        second = _get_authenticated_headers()
+
+        assert first == second
+        assert first["Authorization"] == "Bearer cached-token"
+        mock_default.assert_called_once()
+        credentials.refresh.assert_not_called()
+
+    @patch("stable_delusion.upscale.default")
+    def test_token_close_to_expiry_is_refreshed(self, mock_default):
+        credentials = self._credentials(timedelta(minutes=2))
+        mock_default.return_value = (credentials, None)
+
+        _get_authenticated_headers()
+
+        credentials.refresh.assert_called_once()
+
+    @patch("stable_delusion.upscale.default")
+    def test_refresh_schedules_background_renewal(self, mock_default):
+        credentials = self._credentials(timedelta(minutes=1))
+        renewed_expiry = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(hours=1)
+        credentials.refresh.side_effect = lambda _: setattr(credentials, "expiry", renewed_expiry)
+        mock_default.return_value = (credentials, None)
+
+        _get_authenticated_headers()
+
+        timer = upscale._token_state.refresh_timer
+        assert timer.daemon
+        assert 49 * 60 < timer.interval <= 50 * 60
+
+    @staticmethod
+    def _run_refresh_timer(credentials, used_since_scheduled: bool = True) -> None:
+        scheduled_at = time.monotonic()
+        upscale._token_state.credentials = credentials
+        if used_since_scheduled:
+            upscale._token_state.last_use = scheduled_at + 1
+        timer = threading.Timer(0, _refresh_in_background, args=(scheduled_at,))
+        upscale._token_state.refresh_timer = timer
+        timer.start()
+        timer.join()
+
+    def test_background_refresh_renews_and_reschedules(self):
+        credentials = _FakeCredentials()
+
+        self._run_refresh_timer(credentials)
+
+        renewed = upscale._token_state.credentials
+        assert renewed is not credentials
+        assert renewed.token == "renewed-token"
+        assert renewed.refreshed_under_lock is False
+        # Requests still holding the previous credentials object see it unchanged
+        assert credentials.token == "cached-token"
+        assert upscale._token_state.refresh_timer.is_alive()
+
+    def test_requests_use_credentials_renewed_in_background(self):
+        self._run_refresh_timer(_FakeCredentials())
+
+        assert _get_authenticated_headers()["Authorization"] == "Bearer renewed-token"
+
+    def test_idle_token_is_not_renewed(self):
+        credentials = _FakeCredentials()
+
+        self._run_refresh_timer(credentials, used_since_scheduled=False)
+
+        assert upscale._token_state.credentials is credentials
+        assert credentials.token == "cached-token"
+        assert upscale._token_state.refresh_timer is None
+
+    def test_superseded_timer_does_not_refresh(self):
+        credentials = _FakeCredentials()
+        upscale._token_state.credentials = credentials
+        upscale._token_state.last_use = time.monotonic() + 1
+        # Not registered as the refresh timer, as after clear_credentials_cache()
+        timer = threading.Timer(0, _refresh_in_background, args=(time.monotonic(),))
+        timer.start()
+        timer.join()
+
+        assert upscale._token_state.credentials is credentials
+        assert credentials.token == "cached-token"
+        assert upscale._token_state.refresh_timer is None
+
+    def test_failed_background_refresh_is_left_to_next_request(self):
+        credentials = _FakeCredentials(error=Exception("token endpoint down"))
+
+        self._run_refresh_timer(credentials)
+
+        assert upscale._token_state.credentials is credentials
+        assert credentials.token == "cached-token"
+        assert upscale._token_state.refresh_timer is None
+
+    @patch("stable_delusion.upscale.default")
+    def test_failed_lookup_is_retried(self, mock_default):
+        credentials = self._credentials(timedelta(hours=1))
+        mock_default.side_effect = [Exception("metadata server unavailable"), (credentials, None)]
+
+        with pytest.raises(Exception, match="metadata server unavailable"):
+            _get_authenticated_headers()
+        assert _get_authenticated_headers()["Authorization"] == "Bearer cached-token"
+
+
 class TestUpscaleCommandLine:
     """Test cases for upscale command line interface."""
 
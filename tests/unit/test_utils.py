@@ -2,14 +2,31 @@
 Tests for utility functions in stable_delusion.utils.
 """
 
+import hashlib
+import logging
+import shutil
 import tempfile
+from datetime import datetime, timedelta
 from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 from PIL import Image
 import pytest
+from werkzeug.utils import secure_filename as werkzeug_secure_filename
 
 from stable_delusion.utils import (
+    calculate_file_sha256,
+    deduplicate_filename,
+    ensure_directory_cached,
+    ensure_directory_exists,
+    get_current_timestamp,
+    is_any_s3_url,
+    is_https_s3_url,
+    is_s3_url,
+    log_operation_start,
+    log_upload_info,
     optimize_image_size,
+    secure_filename,
+    write_into_directory,
     _get_file_size_mb,
     _convert_to_jpeg_with_quality,
     _find_optimal_jpeg_quality,
@@ -292,3 +309,206 @@ class TestImageOptimization:
                 assert not result_path.exists()
         finally:
             temp_path.unlink(missing_ok=True)
+
+
+class TestCalculateFileSha256:
+    """Tests for SHA-256 hashing of in-memory content and files."""
+
+    EXPECTED = hashlib.sha256(b"image payload").hexdigest()
+
+    @pytest.mark.parametrize(
+        "content", [b"image payload", bytearray(b"image payload"), memoryview(b"image payload")]
+    )
+    def test_hashes_bytes_like_content(self, content):
+        assert calculate_file_sha256(content) == self.EXPECTED
+
+    def test_hashes_file_path(self, tmp_path):
+        file_path = tmp_path / "payload.bin"
+        file_path.write_bytes(b"image payload")
+
+        assert calculate_file_sha256(file_path) == self.EXPECTED
+
+
+class TestSecureFilename:
+    """Tests that secure_filename matches werkzeug's sanitization."""
+
+    @pytest.mark.parametrize(
+        "filename",
+        [
+            "test_image.png",
+            "../../../evil.png",
+            "My cool movie.mov",
+            "i contain cool \xfcml\xe4uts.txt",
+            "\u5f71\u50cf.png",
+            "  spaced\tout\nname .jpg",
+            "weird$chars!@#%^&*().gif",
+            "..hidden_",
+            "a/b\\c.webp",
+            "",
+        ],
+    )
+    def test_matches_werkzeug(self, filename):
+        assert secure_filename(filename) == werkzeug_secure_filename(filename)
+
+    @pytest.mark.parametrize(
+        "filename", ["CON", "nul.txt", "com1.png", "LPT9.tar.gz", "console.txt"]
+    )
+    def test_matches_werkzeug_for_windows_device_names(self, filename):
+        secure_filename.cache_clear()
+        try:
+            with patch("os.name", "nt"):
+                assert secure_filename(filename) == werkzeug_secure_filename(filename)
+        finally:
+            secure_filename.cache_clear()
+
+    def test_device_names_are_kept_on_posix(self):
+        with patch("os.name", "posix"):
+            assert secure_filename("CON.txt") == "CON.txt"
+
+
+class TestEnsureDirectoryExists:
+    """Tests for the cached directory creation helpers."""
+
+    @pytest.fixture(autouse=True)
+    def clear_directory_cache(self):
+        with patch.dict("stable_delusion.utils._ensured_directories", clear=True):
+            yield
+
+    def test_creates_directory_once(self, tmp_path):
+        target = tmp_path / "a"
+
+        with patch.object(Path, "mkdir", autospec=True, side_effect=Path.mkdir) as mock_mkdir:
+            ensure_directory_cached(target)
+            ensure_directory_cached(target)
+
+        assert target.is_dir()
+        mock_mkdir.assert_called_once_with(target, parents=True, exist_ok=True)
+
+    def test_evicts_oldest_directory(self, tmp_path):
+        with patch("stable_delusion.utils.MAX_ENSURED_DIRECTORIES", 2):
+            for name in ("first", "second", "third"):
+                ensure_directory_cached(tmp_path / name)
+
+            with patch.object(Path, "mkdir") as mock_mkdir:
+                ensure_directory_cached(tmp_path / "third")
+                ensure_directory_cached(tmp_path / "first")
+
+        mock_mkdir.assert_called_once_with(parents=True, exist_ok=True)
+
+    def test_uncached_helper_recreates_removed_directory(self, tmp_path):
+        target = tmp_path / "a"
+        ensure_directory_exists(target)
+        target.rmdir()
+
+        ensure_directory_exists(target)
+
+        assert target.is_dir()
+
+    def test_write_into_directory_recreates_removed_directory(self, tmp_path):
+        target_dir = tmp_path / "out"
+        write_into_directory(target_dir, lambda: (target_dir / "one.txt").write_text("1"))
+        shutil.rmtree(target_dir)
+
+        write_into_directory(target_dir, lambda: (target_dir / "two.txt").write_text("2"))
+
+        assert (target_dir / "two.txt").read_text() == "2"
+
+
+class TestDeduplicateFilename:
+    """Tests for per-batch filename deduplication."""
+
+    def test_suffixes_repeated_names(self):
+        seen: dict = {}
+        names = ["a.png", "a.png", "b.png", "a.png", "noext", "noext"]
+
+        result = [deduplicate_filename(name, seen) for name in names]
+
+        assert result == ["a.png", "a_1.png", "b.png", "a_2.png", "noext", "noext_1"]
+
+    def test_skips_names_already_taken_by_suffixing(self):
+        seen: dict = {}
+
+        result = [deduplicate_filename(name, seen) for name in ["a_1.png", "a.png", "a.png"]]
+
+        assert result == ["a_1.png", "a.png", "a_1_1.png"]
+
+
+class TestGetCurrentTimestamp:
+    """Tests for the current-time timestamp formats."""
+
+    @pytest.mark.parametrize(
+        "format_type, expected_format",
+        [
+            ("standard", "%Y-%m-%d %H:%M:%S"),
+            ("filename", "%Y-%m-%d-%H:%M:%S"),
+            ("compact", "%y%m%d-%H:%M:%S"),
+            ("unknown", "%Y-%m-%d %H:%M:%S"),
+        ],
+    )
+    def test_formats_local_time(self, format_type, expected_format):
+        result = get_current_timestamp(format_type)
+
+        drift = abs(datetime.strptime(result, expected_format) - datetime.now())
+        # Not an exact window: the wall clock may be adjusted between the two readings
+        assert drift < timedelta(minutes=1)
+
+
+class TestIsS3Url:
+    """Tests for s3:// URL detection."""
+
+    @pytest.mark.parametrize(
+        "url, expected",
+        [
+            ("s3://bucket/key.png", True),
+            ("s3://", True),
+            ("s3:/bucket/key.png", False),
+            ("https://bucket.s3.amazonaws.com/key.png", False),
+            ("", False),
+        ],
+    )
+    def test_detects_s3_scheme(self, url, expected):
+        assert is_s3_url(url) is expected
+
+
+class TestIsAnyS3Url:
+    """Tests for combined s3:// and HTTPS S3 URL detection."""
+
+    @pytest.mark.parametrize(
+        "url",
+        [
+            "s3://bucket/key.png",
+            "https://bucket.s3.amazonaws.com/key.png",
+            "https://bucket.s3-eu-west-1.amazonaws.com/key.png",
+            "https://example.com/key.png",
+            "http://bucket.s3.amazonaws.com/key.png",
+            "/local/path/image.png",
+            "",
+        ],
+    )
+    def test_matches_individual_checks(self, url):
+        assert is_any_s3_url(url) is (is_s3_url(url) or is_https_s3_url(url))
+
+
+class TestLogUploadInfo:
+    """Tests for upload logging."""
+
+    def test_logs_formatted_timestamps(self, caplog):
+        uploaded_file = MagicMock(size_bytes=3, create_time=datetime(2024, 1, 2, 3, 4, 5))
+        uploaded_file.expiration_time = None
+
+        with caplog.at_level(logging.INFO):
+            log_upload_info("image.png", uploaded_file)
+
+        assert "create_time=2024-01-02 03:04:05" in caplog.text
+        assert "expiration_time=Unknown" in caplog.text
+
+    def test_skips_formatting_when_info_is_disabled(self, caplog):
+        uploaded_file = MagicMock()
+
+        with caplog.at_level(logging.WARNING):
+            with patch("stable_delusion.utils.safe_format_timestamps") as mock_format:
+                log_upload_info("image.png", uploaded_file)
+                log_operation_start("upload", path="image.png")
+
+        mock_format.assert_not_called()
+        assert not caplog.records
@@ -0,0 +1,78 @@
+"""
+Unit tests for the optional libvips image encoding path.
+"""
+
+import io
+from unittest.mock import MagicMock, patch
+
+import pytest
+from PIL import Image
+
+from stable_delusion.repositories import vips_encoder
+
+
+@pytest.fixture
+def mock_pyvips():
+    fake_pyvips = MagicMock()
+    fake_pyvips.Image.new_from_memory.return_value.write_to_buffer.return_value = b"vips-bytes"
+    with patch.object(vips_encoder, "pyvips", fake_pyvips), patch.object(
+        vips_encoder, "PYVIPS_AVAILABLE", True
+    ), patch.object(vips_encoder, "VIPS_MIN_PIXELS", 100):
+        yield fake_pyvips
+
+
+class TestVipsEncoder:
+    """Test when images are routed to libvips and when Pillow is used."""
+
+    def test_large_png_uses_vips(self, mock_pyvips):
+        image = Image.new("RGB", (20, 10), color="red")
+        output = io.BytesIO()
+
+        vips_encoder.encode_image(image, "PNG", output)
+
+        assert output.getvalue() == b"vips-bytes"
+        mock_pyvips.Image.new_from_memory.assert_called_once_with(
+            image.tobytes(), 20, 10, 3, "uchar"
+        )
+        mock_pyvips.Image.new_from_memory.return_value.write_to_buffer.assert_called_once_with(
+            ".png"
+        )
+
+    @pytest.mark.parametrize(
+        "mode,size,file_format",
+        [
+            ("RGB", (5, 5), "PNG"),  # below the pixel threshold
+            ("P", (20, 10), "PNG"),  # palette images are not handled by the vips path
+            ("RGBA", (20, 10), "JPEG"),  # JPEG has no alpha
+            ("RGB", (20, 10), "GIF"),  # format not routed to vips
+        ],
+    )
+    def test_falls_back_to_pillow(self, mock_pyvips, mode, size, file_format):
+        output = io.BytesIO()
+
+        with patch.object(Image.Image, "save") as mock_save:
+            vips_encoder.encode_image(Image.new(mode, size), file_format, output)
+
+        mock_save.assert_called_once_with(output, format=file_format)
+        mock_pyvips.Image.new_from_memory.assert_not_called()
+
+    def test_pillow_used_when_pyvips_missing(self):
+        image = Image.new("RGB", (20, 10), color="red")
+        output = io.BytesIO()
+
+        with patch.object(vips_encoder, "PYVIPS_AVAILABLE", False), patch.object(
+            vips_encoder, "VIPS_MIN_PIXELS", 100
+        ):
+            vips_encoder.encode_image(image, "PNG", output)
+
+        assert output.getvalue().startswith(b"\x89PNG")
+
+    def test_save_image_file_detects_format_from_suffix(self, mock_pyvips, tmp_path):
+        file_path = tmp_path / "large.JPEG"
+
+        vips_encoder.save_image_file(Image.new("RGB", (20, 10)), file_path)
+
+        assert file_path.read_bytes() == b"vips-bytes"
+        mock_pyvips.Image.new_from_memory.return_value.write_to_buffer.assert_called_once_with(
+            ".jpg"
+        )